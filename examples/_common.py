@@ -0,0 +1,36 @@
+"""示例脚本共用的辅助函数（需先将 src 加入 sys.path 再导入）."""
+
+import asyncio
+
+from mobile_use.domain.value_objects.ui_index import UIIndex
+from mobile_use.infrastructure.devices.android_controller import AndroidController
+
+
+async def wait_ui_stable(
+    controller: AndroidController,
+    min_ms: int = 150,
+    max_ms: int = 2000,
+    poll_ms: int = 80
+) -> UIIndex:
+    """等待UI稳定：连续两次层级快照一致或超时，返回最后一次快照的索引."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_ms / 1000
+    await asyncio.sleep(min_ms / 1000)
+    last_digest = None
+    while True:
+        index = UIIndex.build(await controller.get_ui_hierarchy())
+        if index.digest == last_digest or loop.time() >= deadline:
+            return index
+        last_digest = index.digest
+        await asyncio.sleep(poll_ms / 1000)
+
+
+def run(coro) -> None:
+    """运行协程；已安装 uvloop 时使用 uvloop 事件循环（Windows 无 uvloop，回退默认循环）."""
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(coro)
+        return
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        runner.run(coro)
@@ -1,21 +1,30 @@
 """AI任务执行 - 用自然语言控制手机."""
 
 import asyncio
+import logging
 import os
+import re
 import sys
 
 sys.path.insert(0, "src")
 
 from mobile_use.domain.entities.device import Device, DevicePlatform
+from mobile_use.domain.value_objects.ui_index import UIIndex
 from mobile_use.infrastructure.devices.android_controller import AndroidController
+from mobile_use.infrastructure.logging import setup_console_logging
 from mobile_use.infrastructure.llm.base import LLMConfig, LLMProviderType
 from mobile_use.infrastructure.llm.openai_provider import OpenAIProvider
+from mobile_use.infrastructure.llm.rate_limit import LLMGate
 from mobile_use.domain.services.agents.orchestrator import AgentOrchestrator
 from mobile_use.domain.services.agents.task_planner import TaskPlannerAgent
 from mobile_use.domain.services.agents.context_analyzer import ContextAnalyzerAgent
 from mobile_use.domain.services.agents.action_executor import ActionExecutorAgent
 from mobile_use.domain.services.agents.result_validator import ResultValidatorAgent
 
+from _common import run, wait_ui_stable
+
+log = logging.getLogger("mobile_use.demo")
+
 
 class AITaskExecutor:
     """AI驱动的任务执行器."""
@@ -24,11 +33,16 @@ class AITaskExecutor:
         self.device = None
         self.controller = None
         self.llm_provider = None
+        self.llm_gate = None
         self.orchestrator = None
+        self._screenshot_seq: int = 0
+        self._screen_info_dict: dict | None = None
+        self._device_id_cached: str | None = None
+        self._screenshot_lock = asyncio.Lock()
 
     async def initialize(self, device_id: str = "emulator-5554"):
         """初始化设备和AI组件."""
-        print("[初始化] 连接设备...")
+        log.info("[初始化] 连接设备...")
 
         # 连接设备
         self.device = Device(
@@ -40,10 +54,17 @@ class AITaskExecutor:
         await self.controller.connect()
 
         screen = self.device.screen_info
-        print(f"[初始化] 设备已连接: {screen.width}x{screen.height}")
+        log.info(f"[初始化] 设备已连接: {screen.width}x{screen.height}")
+
+        # 设备不变量只计算一次，execute 中直接复用
+        self._screen_info_dict = {"width": screen.width, "height": screen.height}
+        self._device_id_cached = self.device.device_id
+
+        # 从已有截图中续编号，之后只在内存中递增
+        self._screenshot_seq = self._next_screenshot_seq("screenshots")
 
         # 初始化LLM
-        print("[初始化] 加载AI模型...")
+        log.info("[初始化] 加载AI模型...")
         llm_config = LLMConfig(
             provider=LLMProviderType.OPENAI,
             model="deepseek-v3",
@@ -52,7 +73,13 @@ class AITaskExecutor:
             temperature=0.7,
             max_tokens=2048
         )
-        self.llm_provider = OpenAIProvider(llm_config)
+        # 所有代理共享同一个限流闸门
+        self.llm_gate = LLMGate(
+            max_concurrency=llm_config.max_concurrency,
+            qpm=llm_config.qpm,
+            tpm=llm_config.tpm
+        )
+        self.llm_provider = OpenAIProvider(llm_config, gate=self.llm_gate)
         await self.llm_provider.initialize()
 
         # 创建代理
@@ -69,58 +96,76 @@ class AITaskExecutor:
             max_iterations=15
         )
 
-        print("[初始化] AI系统就绪!")
+        log.info("[初始化] AI系统就绪!")
+
+    async def plan_ahead(self, instructions: list[str]) -> list:
+        """基于当前屏幕并发规划多个任务的第一步（经共享限流闸门）."""
+        screenshot_result, ui_elements = await asyncio.gather(
+            self.controller.take_screenshot_thumbnail(),
+            self.controller.get_ui_hierarchy()
+        )
+        screenshot_data = screenshot_result.data.get("screenshot") if screenshot_result.success else None
+
+        log.info(f"\n[预规划] 并发规划 {len(instructions)} 个任务...")
+        return await asyncio.gather(*(
+            self.orchestrator.plan_only(t, self._screen_info_dict, ui_elements, screenshot_data)
+            for t in instructions
+        ))
 
-    async def execute(self, instruction: str) -> dict:
+    async def execute(self, instruction: str, initial_plan=None) -> dict:
         """执行自然语言指令."""
-        print(f"\n{'='*50}")
-        print(f"[AI任务] {instruction}")
-        print("=" * 50)
+        log.info(f"\n{'='*50}")
+        log.info(f"[AI任务] {instruction}")
+        log.info("=" * 50)
 
         # 获取当前屏幕状态
-        print("\n[分析] 获取屏幕状态...")
-        screenshot_result = await self.controller.take_screenshot()
+        log.info("\n[分析] 获取屏幕状态...")
+        # 截图与UI层级相互独立，并发获取；截图只给视觉模型看，使用缩略图
+        screenshot_result, ui_elements = await asyncio.gather(
+            self.controller.take_screenshot_thumbnail(),
+            self.controller.get_ui_hierarchy()
+        )
         screenshot_data = screenshot_result.data.get("screenshot") if screenshot_result.success else None
 
-        ui_elements = await self.controller.get_ui_hierarchy()
-        print(f"[分析] 找到 {len(ui_elements)} 个UI元素")
+        log.info(f"[分析] 找到 {len(ui_elements)} 个UI元素")
 
         # 显示可交互元素
-        clickable = [e for e in ui_elements if e.get("clickable") and (e.get("text") or e.get("content_desc"))]
+        clickable = UIIndex.build(ui_elements).clickable_labeled[:8]
         if clickable:
-            print("[分析] 可交互元素:")
-            for elem in clickable[:8]:
+            log.info("[分析] 可交互元素:")
+            for elem in clickable:
                 name = elem.get("text") or elem.get("content_desc")
-                print(f"       - {name}")
+                log.info(f"       - {name}")
 
         # 执行AI任务
-        print("\n[执行] AI正在规划任务...")
+        log.info("\n[执行] AI正在规划任务...")
         result = await self.orchestrator.execute_task(
             instruction=instruction,
-            device_id=self.device.device_id,
+            device_id=self._device_id_cached,
             initial_screenshot=screenshot_data,
             initial_ui_elements=ui_elements,
-            screen_info={
-                "width": self.device.screen_info.width,
-                "height": self.device.screen_info.height
-            }
+            screen_info=self._screen_info_dict,
+            initial_plan=initial_plan
         )
 
         # 输出结果
-        print(f"\n[结果] 执行{'成功' if result.success else '失败'}")
-        print(f"[结果] 步骤: {result.steps_executed}/{result.total_steps}")
-        print(f"[结果] 耗时: {result.duration_ms}ms")
+        log.info(f"\n[结果] 执行{'成功' if result.success else '失败'}")
+        log.info(f"[结果] 步骤: {result.steps_executed}/{result.total_steps}")
+        log.info(f"[结果] 耗时: {result.duration_ms}ms")
 
         if result.actions:
-            print("[结果] 执行的操作:")
+            log.info("[结果] 执行的操作:")
             for action in result.actions:
-                print(f"       - {action.get('action')}: {action.get('target', 'N/A')}")
+                log.info(f"       - {action.get('action')}: {action.get('target', 'N/A')}")
 
         if result.error:
-            print(f"[错误] {result.error}")
+            log.info(f"[错误] {result.error}")
 
         # 保存截图
-        await self.controller.take_screenshot(f"screenshots/ai_result_{len(os.listdir('screenshots'))}.png")
+        async with self._screenshot_lock:
+            seq = self._screenshot_seq
+            self._screenshot_seq += 1
+        await self.controller.take_screenshot(f"screenshots/ai_result_{seq}.png")
 
         return {
             "success": result.success,
@@ -129,19 +174,33 @@ class AITaskExecutor:
             "error": result.error
         }
 
+    @staticmethod
+    def _next_screenshot_seq(directory: str) -> int:
+        """扫描目录中已有的 ai_result_N.png，返回下一个可用编号."""
+        if not os.path.isdir(directory):
+            return 0
+        pattern = re.compile(r"ai_result_(\d+)\.png")
+        with os.scandir(directory) as entries:
+            matches = (pattern.fullmatch(entry.name) for entry in entries)
+            return max((int(m.group(1)) for m in matches if m), default=-1) + 1
+
     async def close(self):
         """关闭连接."""
         if self.llm_provider:
             await self.llm_provider.close()
         if self.controller:
             await self.controller.disconnect()
-        print("\n[关闭] 已断开连接")
+        log.info("\n[关闭] 已断开连接")
 
 
-async def main():
-    print("=" * 60)
-    print("Mobile-Use v2.0 - AI自然语言任务执行")
-    print("=" * 60)
+async def main(plan_ahead: bool = False):
+    # 配置整个 mobile_use 命名空间，Agent 的执行日志也会输出；
+    # LLM 调用的逐条日志（Prompt长度、响应内容）只保留警告以上
+    listener = setup_console_logging("mobile_use")
+    logging.getLogger("mobile_use.llm").setLevel(logging.WARNING)
+    log.info("=" * 60)
+    log.info("Mobile-Use v2.0 - AI自然语言任务执行")
+    log.info("=" * 60)
 
     # 示例任务列表
     DEMO_TASKS = [
@@ -156,27 +215,39 @@ async def main():
     try:
         await executor.initialize()
 
-        print("\n" + "-" * 40)
-        print("示例任务:")
+        log.info("\n" + "-" * 40)
+        log.info("示例任务:")
         for i, task in enumerate(DEMO_TASKS):
-            print(f"  {i+1}. {task}")
-        print("-" * 40)
+            log.info(f"  {i+1}. {task}")
+        log.info("-" * 40)
 
         # 执行示例任务
-        for task in DEMO_TASKS[:2]:  # 只执行前2个作为演示
-            await executor.execute(task)
-            await asyncio.sleep(2)
-
-        print("\n" + "=" * 60)
-        print("AI任务演示完成!")
-        print("=" * 60)
+        tasks = DEMO_TASKS[:2]  # 只执行前2个作为演示
+        if plan_ahead:
+            # 设备先回到桌面，所有任务基于同一初始状态并发规划，再依次执行
+            await executor.controller.press_key("HOME")
+            await wait_ui_stable(executor.controller)
+            plans = await executor.plan_ahead(tasks)
+            for task, plan in zip(tasks, plans):
+                await executor.controller.press_key("HOME")
+                await wait_ui_stable(executor.controller)
+                await executor.execute(task, initial_plan=plan)
+        else:
+            for task in tasks:
+                await executor.execute(task)
+                await wait_ui_stable(executor.controller)
+
+        log.info("\n" + "=" * 60)
+        log.info("AI任务演示完成!")
+        log.info("=" * 60)
 
     except Exception as e:
-        print(f"\n错误: {e}")
+        log.info(f"\n错误: {e}")
         import traceback
         traceback.print_exc()
     finally:
         await executor.close()
+        listener.stop()
 
 
 async def interactive_mode():
@@ -187,6 +258,10 @@ async def interactive_mode():
     print("\n输入自然语言指令，AI将自动执行")
     print("输入 'quit' 退出\n")
 
+    # 配置整个 mobile_use 命名空间，Agent 的执行日志也会输出；
+    # LLM 调用的逐条日志（Prompt长度、响应内容）只保留警告以上
+    listener = setup_console_logging("mobile_use")
+    logging.getLogger("mobile_use.llm").setLevel(logging.WARNING)
     executor = AITaskExecutor()
 
     try:
@@ -209,6 +284,7 @@ async def interactive_mode():
 
     finally:
         await executor.close()
+        listener.stop()
 
 
 if __name__ == "__main__":
@@ -223,6 +299,6 @@ if __name__ == "__main__":
     mode = input("\n请选择 (1/2): ").strip()
 
     if mode == "2":
-        asyncio.run(interactive_mode())
+        run(interactive_mode())
     else:
-        asyncio.run(main())
+        run(main(plan_ahead="--plan-ahead" in sys.argv))
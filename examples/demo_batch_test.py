@@ -1,18 +1,40 @@
 """批量任务脚本 - 自动化测试流程."""
 
 import asyncio
+import copy
 import json
+import logging
 import os
 import sys
+from contextlib import aclosing
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any
+from functools import lru_cache
+from typing import Any, Awaitable, Sequence, TypeVar
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，缺失时回退到标准库 json
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:  # 可选依赖，缺失时逐个文本查找
+    ahocorasick = None
 
 sys.path.insert(0, "src")
 
 from mobile_use.domain.entities.device import Device, DevicePlatform
 from mobile_use.domain.value_objects.point import Point
+from mobile_use.domain.value_objects.ui_index import UIIndex
 from mobile_use.infrastructure.devices.android_controller import AndroidController
+from mobile_use.infrastructure.logging import setup_console_logging
+
+from _common import run, wait_ui_stable
+
+log = logging.getLogger("mobile_use.demo")
+
+T = TypeVar("T")
 
 
 @dataclass
@@ -33,6 +55,8 @@ class TestCase:
     steps: list[TestStep] = field(default_factory=list)
     setup: list[TestStep] = field(default_factory=list)
     teardown: list[TestStep] = field(default_factory=list)
+    parallel_group: str | None = None  # 同组用例在多台设备上并发执行
+    independent: bool = False  # 与其他独立用例无依赖，多台设备时可并发执行
 
 
 @dataclass
@@ -47,91 +71,204 @@ class TestResult:
     screenshots: list[str] = field(default_factory=list)
 
 
+@lru_cache(maxsize=256)
+def _pt(x: int, y: int) -> Point:
+    """复用常用坐标的 Point 实例."""
+    return Point(x, y)
+
+
+# 执行后需要等待界面稳定的步骤
+UI_MUTATING_ACTIONS = frozenset({"tap", "tap_text", "swipe", "input", "press", "launch_app"})
+# 可合并为一次 adb shell 调用的步骤
+FUSABLE_ACTIONS = frozenset({"tap", "press", "wait"})
+# 合并执行时每个动作后的间隔，与控制器内的动作延迟一致
+FUSED_ACTION_DELAY = 0.3
+
+
 class BatchTestRunner:
     """批量测试执行器."""
 
-    def __init__(self, controller: AndroidController):
+    def __init__(
+        self,
+        controller: AndroidController,
+        max_concurrency: int = 4,
+        extra_controllers: Sequence[AndroidController] = ()
+    ):
         self.controller = controller
         self.results: list[TestResult] = []
         self.screenshot_dir = "screenshots/batch_test"
+        # 限制同一设备上并发的 adb 调用数
+        self._max_concurrency = max_concurrency
+        self._adb_semaphore = asyncio.Semaphore(max_concurrency)
+        # 并发分组中的用例各占一台设备；只有一台设备时同组用例依次执行
+        self._devices = [controller, *extra_controllers]
+        self._results_lock = asyncio.Lock()
+        # 多目标文本匹配自动机（pyahocorasick），及其在当前快照上的命中结果
+        self._ac: Any = None
+        self._ac_keys: frozenset[str] = frozenset()
+        self._ac_hits: dict[str, list[dict]] = {}
+        self._ac_hits_for: UIIndex | None = None
+        # 同一UI状态内复用层级快照，避免重复 dump
+        self._ui_cache: UIIndex | None = None
+        self._ui_cache_valid: bool = False
+
+    def _on_device(self, controller: AndroidController) -> "BatchTestRunner":
+        """创建绑定到指定设备的执行器：UI缓存与 adb 信号量独立，共享自动机和结果列表."""
+        runner = copy.copy(self)
+        runner.controller = controller
+        runner._adb_semaphore = asyncio.Semaphore(self._max_concurrency)
+        runner._ac_hits, runner._ac_hits_for = {}, None
+        runner._ui_cache, runner._ui_cache_valid = None, False
+        return runner
+
+    async def _adb(self, call: Awaitable[T]) -> T:
+        """在设备的 adb 并发上限内执行一次控制器调用."""
+        async with self._adb_semaphore:
+            return await call
+
+    async def _get_ui(self) -> UIIndex:
+        """获取UI层级索引（UI未变化时复用缓存）."""
+        if not self._ui_cache_valid or self._ui_cache is None:
+            elements = await self._adb(self.controller.get_ui_hierarchy())
+            self._ui_cache = UIIndex.build(elements)
+            self._ui_cache_valid = True
+        return self._ui_cache
+
+    def _invalidate_ui(self) -> None:
+        """标记UI已变化."""
+        self._ui_cache_valid = False
+
+    async def _find_text(self, text: str, predicate=None) -> dict | None:
+        """查找文本匹配的元素：有缓存时查索引，否则流式解析并在首个命中处停止."""
+        if self._ui_cache_valid and self._ui_cache is not None:
+            return self._ui_cache.find_text(text, predicate)
+
+        def matches(elem: dict) -> bool:
+            label = elem.get("text") or elem.get("content_desc") or ""
+            return text in label and (predicate is None or predicate(elem))
+
+        async with self._adb_semaphore, aclosing(self.controller.iter_ui_hierarchy(matches)) as elems:
+            async for elem in elems:
+                return elem
+        return None
+
+    def build_text_automaton(self, tests: list[TestCase]) -> None:
+        """为所有 tap_text/assert_text 的目标文本构建 Aho-Corasick 自动机."""
+        texts = {
+            step.params.get("text", "")
+            for test in tests
+            for step in (*test.setup, *test.steps, *test.teardown)
+            if step.action in ("tap_text", "assert_text")
+        }
+        texts.discard("")
+        if ahocorasick is None or not texts:
+            self._ac, self._ac_keys = None, frozenset()
+            return
+
+        automaton = ahocorasick.Automaton()
+        for text in texts:
+            automaton.add_word(text, text)
+        automaton.make_automaton()
+        self._ac, self._ac_keys = automaton, frozenset(texts)
+        self._ac_hits_for = None
+
+    async def _lookup_text(self, text: str, predicate=None) -> dict | None:
+        """查找文本匹配的元素：已缓存快照上一次扫描得到所有目标文本的命中."""
+        index = self._ui_cache
+        if text not in self._ac_keys or not self._ui_cache_valid or index is None:
+            return await self._find_text(text, predicate)
+
+        if self._ac_hits_for is not index:
+            hits: dict[str, list[dict]] = {}
+            for label, elem in index.haystack:
+                for _, key in self._ac.iter(label):
+                    matched = hits.setdefault(key, [])
+                    if not matched or matched[-1] is not elem:
+                        matched.append(elem)
+            self._ac_hits, self._ac_hits_for = hits, index
+
+        for elem in self._ac_hits.get(text, ()):
+            if predicate is None or predicate(elem):
+                return elem
+        return None
+
+    async def _wait_ui_stable(self, min_ms: int = 150, max_ms: int = 2000, poll_ms: int = 80) -> None:
+        """等待UI稳定，最后一次快照写入缓存."""
+        self._ui_cache = await self._adb(wait_ui_stable(self.controller, min_ms, max_ms, poll_ms))
+        self._ui_cache_valid = True
 
     async def run_step(self, step: TestStep) -> tuple[bool, str]:
         """执行单个测试步骤."""
         try:
             if step.action == "tap":
+                self._invalidate_ui()
                 x, y = step.params.get("x", 0), step.params.get("y", 0)
-                result = await self.controller.tap(Point(x, y))
+                result = await self._adb(self.controller.tap(_pt(x, y)))
                 return result.success, ""
 
             elif step.action == "tap_text":
                 text = step.params.get("text", "")
-                elements = await self.controller.get_ui_hierarchy()
-                for elem in elements:
-                    elem_text = elem.get("text") or elem.get("content_desc") or ""
-                    if text in elem_text and elem.get("center"):
-                        center = elem["center"]
-                        result = await self.controller.tap(Point(center[0], center[1]))
-                        return result.success, ""
+                elem = await self._lookup_text(text, lambda e: bool(e.get("center")))
+                if elem:
+                    center = elem["center"]
+                    self._invalidate_ui()
+                    result = await self._adb(self.controller.tap(Point(center[0], center[1])))
+                    return result.success, ""
                 return False, f"未找到元素: {text}"
 
             elif step.action == "swipe":
+                self._invalidate_ui()
                 direction = step.params.get("direction", "down")
-                screen = self.controller.device.screen_info
-                cx, cy = screen.width // 2, screen.height // 2
-
-                if direction == "up":
-                    start, end = Point(cx, int(screen.height * 0.7)), Point(cx, int(screen.height * 0.3))
-                elif direction == "down":
-                    start, end = Point(cx, int(screen.height * 0.3)), Point(cx, int(screen.height * 0.7))
-                elif direction == "left":
-                    start, end = Point(int(screen.width * 0.8), cy), Point(int(screen.width * 0.2), cy)
-                else:  # right
-                    start, end = Point(int(screen.width * 0.2), cy), Point(int(screen.width * 0.8), cy)
-
-                result = await self.controller.swipe(start, end)
+                # 起止点由 ScreenInfo 按屏幕尺寸预计算并缓存
+                endpoints = self.controller.device.screen_info.swipe_endpoints
+                start, end = endpoints.get(direction, endpoints["right"])
+
+                result = await self._adb(self.controller.swipe(start, end))
                 return result.success, ""
 
             elif step.action == "input":
+                self._invalidate_ui()
                 text = step.params.get("text", "")
-                result = await self.controller.input_text(text)
+                result = await self._adb(self.controller.input_text(text))
                 return result.success, ""
 
             elif step.action == "press":
+                self._invalidate_ui()
                 key = step.params.get("key", "BACK")
-                result = await self.controller.press_key(key)
+                result = await self._adb(self.controller.press_key(key))
                 return result.success, ""
 
             elif step.action == "wait":
                 duration = step.params.get("duration", 1.0)
                 await asyncio.sleep(duration)
+                if duration > 0.3:
+                    self._invalidate_ui()
                 return True, ""
 
             elif step.action == "screenshot":
                 name = step.params.get("name", "screenshot")
                 path = f"{self.screenshot_dir}/{name}.png"
-                result = await self.controller.take_screenshot(path)
+                result = await self._adb(self.controller.take_screenshot(path))
                 return result.success, path
 
             elif step.action == "launch_app":
+                self._invalidate_ui()
                 package = step.params.get("package", "")
-                result = await self.controller.launch_app(package)
+                result = await self._adb(self.controller.launch_app(package))
                 return result.success, ""
 
             elif step.action == "assert_text":
                 text = step.params.get("text", "")
-                elements = await self.controller.get_ui_hierarchy()
-                for elem in elements:
-                    elem_text = elem.get("text") or elem.get("content_desc") or ""
-                    if text in elem_text:
-                        return True, ""
+                await self._get_ui()
+                if await self._lookup_text(text):
+                    return True, ""
                 return False, f"断言失败: 未找到文本 '{text}'"
 
             elif step.action == "assert_element":
                 element_id = step.params.get("id", "")
-                elements = await self.controller.get_ui_hierarchy()
-                for elem in elements:
-                    if element_id in (elem.get("id") or ""):
-                        return True, ""
+                index = await self._get_ui()
+                if index.find_id(element_id):
+                    return True, ""
                 return False, f"断言失败: 未找到元素 '{element_id}'"
 
             else:
@@ -140,13 +277,75 @@ class BatchTestRunner:
         except Exception as e:
             return False, str(e)
 
+    def _shell_command(self, step: TestStep) -> str | None:
+        """将步骤转换为 shell 命令，无法转换时返回 None."""
+        if step.action == "tap":
+            if "x" not in step.params or "y" not in step.params:
+                return None
+            return f"input tap {int(step.params['x'])} {int(step.params['y'])} && sleep {FUSED_ACTION_DELAY}"
+        if step.action == "press":
+            keycode = AndroidController.KEYCODES.get(step.params.get("key", "BACK").upper())
+            if keycode is None:
+                return None
+            return f"input keyevent {keycode} && sleep {FUSED_ACTION_DELAY}"
+        if step.action == "wait":
+            return f"sleep {float(step.params.get('duration', 1.0))}"
+        return None
+
+    def _fusable_run(self, steps: list[TestStep], start: int) -> list[TestStep]:
+        """从 start 开始取出连续可合并的步骤，至少返回一个步骤."""
+        end = start
+        while (
+            end < len(steps)
+            and steps[end].action in FUSABLE_ACTIONS
+            and self._shell_command(steps[end]) is not None
+        ):
+            end += 1
+        return steps[start:max(end, start + 1)]
+
+    async def run_fused(self, steps: list[TestStep]) -> list[tuple[bool, str]]:
+        """一次 adb shell 执行多个步骤，失败时从失败步骤起逐个执行以定位错误."""
+        commands = [self._shell_command(step) for step in steps]
+        self._invalidate_ui()
+        result = await self._adb(self.controller.shell_batch(commands))
+        completed = (result.data or {}).get("completed", 0)
+        outcomes: list[tuple[bool, str]] = [(True, "")] * completed
+
+        if not result.success:
+            for step in steps[completed:]:
+                success, msg = await self.run_step(step)
+                outcomes.append((success, msg))
+                if not success:
+                    break
+        return outcomes
+
+    async def run_steps(self, steps: list[TestStep]) -> list[tuple[bool, str]]:
+        """执行 setup/teardown 步骤，连续的 wait 步骤合并为一次等待（时长相加）."""
+        results: list[tuple[bool, str]] = []
+        i = 0
+        while i < len(steps):
+            step = steps[i]
+            j = i + 1
+            if step.action != "wait":
+                results.append(await self.run_step(step))
+                i = j
+                continue
+            while j < len(steps) and steps[j].action == "wait":
+                j += 1
+            total = sum(s.params.get("duration", 1.0) for s in steps[i:j])
+            outcome = await self.run_step(TestStep(step.name, "wait", {"duration": total}))
+            results.extend([outcome] * (j - i))
+            i = j
+        return results
+
     async def run_test(self, test: TestCase) -> TestResult:
         """执行单个测试用例."""
-        print(f"\n{'='*50}")
-        print(f"[测试] {test.name}")
-        print(f"[描述] {test.description}")
-        print("=" * 50)
+        log.info(f"\n{'='*50}")
+        log.info(f"[测试] {test.name}")
+        log.info(f"[描述] {test.description}")
+        log.info("=" * 50)
 
+        self._invalidate_ui()
         start_time = datetime.now()
         steps_passed = 0
         screenshots = []
@@ -154,37 +353,43 @@ class BatchTestRunner:
 
         # Setup
         if test.setup:
-            print("\n[Setup]")
-            for step in test.setup:
-                success, msg = await self.run_step(step)
+            log.info("\n[Setup]")
+            for step, (success, msg) in zip(test.setup, await self.run_steps(test.setup)):
                 if not success:
-                    print(f"  Setup失败: {step.name} - {msg}")
+                    log.info(f"  Setup失败: {step.name} - {msg}")
 
         # 执行测试步骤
-        print("\n[Steps]")
-        for i, step in enumerate(test.steps):
-            print(f"  {i+1}. {step.name}...", end=" ")
+        log.info("\n[Steps]")
+        i = 0
+        while i < len(test.steps) and error is None:
+            batch = self._fusable_run(test.steps, i)
+            if len(batch) > 1:
+                outcomes = await self.run_fused(batch)
+            else:
+                outcomes = [await self.run_step(batch[0])]
 
-            success, msg = await self.run_step(step)
+            for offset, (step, (success, msg)) in enumerate(zip(batch, outcomes)):
+                label = f"  {i+offset+1}. {step.name}..."
 
-            if step.action == "screenshot" and msg:
-                screenshots.append(msg)
+                if step.action == "screenshot" and msg:
+                    screenshots.append(msg)
 
-            if success:
-                print("PASS")
-                steps_passed += 1
-            else:
-                print(f"FAIL - {msg}")
-                error = f"步骤 {i+1} ({step.name}) 失败: {msg}"
-                break
+                if success:
+                    log.info(f"{label} PASS")
+                    steps_passed += 1
+                else:
+                    log.info(f"{label} FAIL - {msg}")
+                    error = f"步骤 {i+offset+1} ({step.name}) 失败: {msg}"
+                    break
 
-            await asyncio.sleep(0.5)
+            if error is None and any(s.action in UI_MUTATING_ACTIONS for s in batch):
+                await self._wait_ui_stable()
+            i += len(batch)
 
         # Teardown
         if test.teardown:
-            print("\n[Teardown]")
-            for step in test.teardown:
-                await self.run_step(step)
+            log.info("\n[Teardown]")
+            await self.run_steps(test.teardown)
 
         duration = int((datetime.now() - start_time).total_seconds() * 1000)
 
@@ -198,41 +403,80 @@ class BatchTestRunner:
             screenshots=screenshots
         )
 
-        self.results.append(result)
+        async with self._results_lock:
+            self.results.append(result)
         return result
 
+    async def _run_parallel(self, batch: list[TestCase]) -> None:
+        """同组用例分配到不同设备并发执行，空闲设备不足时排队等待."""
+        pool: asyncio.Queue[AndroidController] = asyncio.Queue()
+        for controller in self._devices:
+            pool.put_nowait(controller)
+
+        async def run_on_free_device(test: TestCase) -> TestResult:
+            controller = await pool.get()
+            try:
+                return await self._on_device(controller).run_test(test)
+            finally:
+                pool.put_nowait(controller)
+
+        await asyncio.gather(*(run_on_free_device(t) for t in batch))
+
+    @staticmethod
+    def _partition(tests: list[TestCase]) -> list[list[TestCase]]:
+        """按并发分组划分测试用例，保持首次出现的顺序."""
+        batches: list[list[TestCase]] = []
+        groups: dict[str, list[TestCase]] = {}
+        for test in tests:
+            key = test.parallel_group or ("__independent__" if test.independent else None)
+            if key is None:
+                batches.append([test])
+            elif key in groups:
+                groups[key].append(test)
+            else:
+                groups[key] = [test]
+                batches.append(groups[key])
+        return batches
+
     async def run_all(self, tests: list[TestCase]) -> list[TestResult]:
         """执行所有测试用例."""
-        print("\n" + "=" * 60)
-        print("Mobile-Use v2.0 - 批量自动化测试")
-        print("=" * 60)
-        print(f"\n共 {len(tests)} 个测试用例")
-
-        for test in tests:
-            await self.run_test(test)
-            await asyncio.sleep(1)
+        log.info("\n" + "=" * 60)
+        log.info("Mobile-Use v2.0 - 批量自动化测试")
+        log.info("=" * 60)
+        log.info(f"\n共 {len(tests)} 个测试用例")
+
+        self.build_text_automaton(tests)
+        for batch in self._partition(tests):
+            if len(batch) > 1 and len(self._devices) > 1:
+                await self._run_parallel(batch)
+                await self._wait_ui_stable()
+                continue
+            # 同一设备上的用例共享屏幕，只能依次执行
+            for test in batch:
+                await self.run_test(test)
+                await self._wait_ui_stable()
 
         return self.results
 
     def print_summary(self):
         """打印测试摘要."""
-        print("\n" + "=" * 60)
-        print("测试摘要")
-        print("=" * 60)
+        log.info("\n" + "=" * 60)
+        log.info("测试摘要")
+        log.info("=" * 60)
 
         passed = sum(1 for r in self.results if r.success)
         failed = len(self.results) - passed
         total_duration = sum(r.duration_ms for r in self.results)
 
-        print(f"\n总计: {len(self.results)} | 通过: {passed} | 失败: {failed}")
-        print(f"总耗时: {total_duration}ms")
+        log.info(f"\n总计: {len(self.results)} | 通过: {passed} | 失败: {failed}")
+        log.info(f"总耗时: {total_duration}ms")
 
-        print("\n详细结果:")
+        log.info("\n详细结果:")
         for r in self.results:
             status = "PASS" if r.success else "FAIL"
-            print(f"  [{status}] {r.test_name} ({r.steps_passed}/{r.steps_total}) - {r.duration_ms}ms")
+            log.info(f"  [{status}] {r.test_name} ({r.steps_passed}/{r.steps_total}) - {r.duration_ms}ms")
             if r.error:
-                print(f"         错误: {r.error}")
+                log.info(f"         错误: {r.error}")
 
     def save_report(self, filename: str = "test_report.json"):
         """保存测试报告."""
@@ -258,11 +502,24 @@ class BatchTestRunner:
             ]
         }
 
+        _write_report(report, filename)
+
+        log.info(f"\n测试报告已保存: {filename}")
+
+    async def save_report_async(self, filename: str = "test_report.json"):
+        """在线程中保存测试报告，避免阻塞事件循环."""
+        await asyncio.to_thread(self.save_report, filename)
+
+
+def _write_report(report: dict[str, Any], filename: str) -> None:
+    """写入 JSON 报告，优先使用 orjson."""
+    if orjson is not None:
+        with open(filename, "wb") as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
         with open(filename, "w", encoding="utf-8") as f:
             json.dump(report, f, ensure_ascii=False, indent=2)
 
-        print(f"\n测试报告已保存: {filename}")
-
 
 # 预定义测试用例
 def get_sample_tests() -> list[TestCase]:
@@ -322,6 +579,7 @@ def get_sample_tests() -> list[TestCase]:
 
 async def main():
     os.makedirs("screenshots/batch_test", exist_ok=True)
+    listener = setup_console_logging(log.name)
 
     device = Device(
         device_id="emulator-5554",
@@ -331,9 +589,9 @@ async def main():
     controller = AndroidController(device)
 
     try:
-        print("[初始化] 连接设备...")
+        log.info("[初始化] 连接设备...")
         await controller.connect()
-        print(f"[初始化] 已连接: {device.screen_info.width}x{device.screen_info.height}")
+        log.info(f"[初始化] 已连接: {device.screen_info.width}x{device.screen_info.height}")
 
         # 创建测试运行器
         runner = BatchTestRunner(controller)
@@ -348,15 +606,16 @@ async def main():
         runner.print_summary()
 
         # 保存报告
-        runner.save_report("screenshots/batch_test/test_report.json")
+        await runner.save_report_async("screenshots/batch_test/test_report.json")
 
     except Exception as e:
-        print(f"\n错误: {e}")
+        log.info(f"\n错误: {e}")
         import traceback
         traceback.print_exc()
     finally:
         await controller.disconnect()
+        listener.stop()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run(main())
@@ -2,13 +2,17 @@
 
 import asyncio
 import sys
+from itertools import islice
 
 sys.path.insert(0, "src")
 
 from mobile_use.domain.entities.device import Device, DevicePlatform
 from mobile_use.domain.value_objects.point import Point
+from mobile_use.domain.value_objects.ui_index import UIIndex
 from mobile_use.infrastructure.devices.android_controller import AndroidController
 
+from _common import run
+
 
 async def main():
     print("=" * 50)
@@ -47,12 +51,12 @@ async def main():
         # 获取UI元素
         print("\n[5] 获取桌面应用...")
         elements = await controller.get_ui_hierarchy()
-        apps = [e for e in elements if e.get("clickable") and (e.get("text") or e.get("content_desc"))]
+        apps = UIIndex.build(elements).clickable_labeled
         print(f"    找到 {len(apps)} 个可点击元素")
 
         # 显示前10个应用
         print("\n    桌面应用:")
-        for i, app in enumerate(apps[:10]):
+        for i, app in enumerate(islice(apps, 10)):
             name = app.get("text") or app.get("content_desc") or "未知"
             center = app.get("center", (0, 0))
             print(f"    {i+1}. {name} @ ({center[0]}, {center[1]})")
@@ -104,4 +108,4 @@ async def main():
 if __name__ == "__main__":
     import os
     os.makedirs("screenshots", exist_ok=True)
-    asyncio.run(main())
+    run(main())
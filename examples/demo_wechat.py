@@ -2,13 +2,17 @@
 
 import asyncio
 import sys
+from contextlib import aclosing
 
 sys.path.insert(0, "src")
 
 from mobile_use.domain.entities.device import Device, DevicePlatform
 from mobile_use.domain.value_objects.point import Point
+from mobile_use.domain.value_objects.ui_index import UIIndex
 from mobile_use.infrastructure.devices.android_controller import AndroidController
 
+from _common import run, wait_ui_stable
+
 
 class WeChatAutomation:
     """微信自动化控制类."""
@@ -19,6 +23,40 @@ class WeChatAutomation:
         self.controller = controller
         self.screen_width = 1080
         self.screen_height = 1920
+        # 同一UI状态内复用层级快照，避免重复 dump
+        self._ui_cache: UIIndex | None = None
+        self._ui_cache_valid: bool = False
+
+    async def _get_ui(self) -> UIIndex:
+        """获取UI层级索引（UI未变化时复用缓存）."""
+        if not self._ui_cache_valid or self._ui_cache is None:
+            elements = await self.controller.get_ui_hierarchy()
+            self._ui_cache = UIIndex.build(elements)
+            self._ui_cache_valid = True
+        return self._ui_cache
+
+    def _invalidate_ui(self) -> None:
+        """标记UI已变化."""
+        self._ui_cache_valid = False
+
+    async def _find_text(self, text: str, predicate=None) -> dict | None:
+        """查找文本匹配的元素：有缓存时查索引，否则流式解析并在首个命中处停止."""
+        if self._ui_cache_valid and self._ui_cache is not None:
+            return self._ui_cache.find_text(text, predicate)
+
+        def matches(elem: dict) -> bool:
+            label = elem.get("text") or elem.get("content_desc") or ""
+            return text in label and (predicate is None or predicate(elem))
+
+        async with aclosing(self.controller.iter_ui_hierarchy(matches)) as elems:
+            async for elem in elems:
+                return elem
+        return None
+
+    async def _wait_ui_stable(self, min_ms: int = 150, max_ms: int = 2000, poll_ms: int = 80) -> None:
+        """等待UI稳定，最后一次快照写入缓存."""
+        self._ui_cache = await wait_ui_stable(self.controller, min_ms, max_ms, poll_ms)
+        self._ui_cache_valid = True
 
     async def init(self):
         """初始化屏幕信息."""
@@ -29,34 +67,43 @@ class WeChatAutomation:
     async def open_wechat(self) -> bool:
         """打开微信应用."""
         print("  打开微信...")
+        self._invalidate_ui()
         result = await self.controller.launch_app(self.WECHAT_PACKAGE)
-        await asyncio.sleep(3)  # 等待微信启动
+        await self._wait_ui_stable(min_ms=500, max_ms=5000)  # 等待微信启动
         return result.success
 
     async def find_and_click(self, text: str, timeout: int = 5) -> bool:
-        """查找并点击包含指定文本的元素."""
-        for _ in range(timeout):
-            elements = await self.controller.get_ui_hierarchy()
-            for elem in elements:
-                elem_text = elem.get("text") or elem.get("content_desc") or ""
-                if text in elem_text and elem.get("clickable"):
-                    center = elem.get("center")
-                    if center:
-                        print(f"  点击: {text} @ ({center[0]}, {center[1]})")
-                        await self.controller.tap(Point(center[0], center[1]))
-                        await asyncio.sleep(1)
-                        return True
-            await asyncio.sleep(1)
-        return False
+        """查找并点击包含指定文本的元素.
+
+        以指数退避轮询（50ms 起，最长 400ms）直到超时；界面暂时不变不代表元素
+        不会出现（加载中、动画、网络请求），所以不提前放弃.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = 0.05
+
+        while True:
+            index = await self._get_ui()
+            elem = index.find_text(text, lambda e: bool(e.get("clickable") and e.get("center")))
+            if elem:
+                center = elem["center"]
+                print(f"  点击: {text} @ ({center[0]}, {center[1]})")
+                self._invalidate_ui()
+                await self.controller.tap(Point(center[0], center[1]))
+                await self._wait_ui_stable()
+                return True
+
+            if loop.time() >= deadline:
+                return False
+
+            # 轮询等待新界面，下一轮需要重新获取
+            self._invalidate_ui()
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.8, 0.4)
 
     async def find_element_by_text(self, text: str) -> dict | None:
         """查找包含指定文本的元素."""
-        elements = await self.controller.get_ui_hierarchy()
-        for elem in elements:
-            elem_text = elem.get("text") or elem.get("content_desc") or ""
-            if text in elem_text:
-                return elem
-        return None
+        return await self._find_text(text)
 
     async def click_contact(self, contact_name: str) -> bool:
         """点击联系人进入聊天."""
@@ -64,12 +111,11 @@ class WeChatAutomation:
 
         # 先点击搜索
         if await self.find_and_click("搜索"):
-            await asyncio.sleep(1)
-
             # 输入联系人名称
             print(f"  输入: {contact_name}")
+            self._invalidate_ui()
             await self.controller.input_text(contact_name)
-            await asyncio.sleep(2)
+            await self._wait_ui_stable(max_ms=3000)
 
             # 点击搜索结果
             return await self.find_and_click(contact_name)
@@ -81,30 +127,28 @@ class WeChatAutomation:
         print(f"  发送消息: {message}")
 
         # 查找输入框并点击
-        elements = await self.controller.get_ui_hierarchy()
-        input_box = None
-        for elem in elements:
-            class_name = elem.get("class_name") or ""
-            if "EditText" in class_name:
-                input_box = elem
-                break
+        index = await self._get_ui()
+        input_box = index.find_class("android.widget.EditText") or index.find_class("EditText")
 
         if input_box and input_box.get("center"):
             center = input_box["center"]
+            self._invalidate_ui()
             await self.controller.tap(Point(center[0], center[1]))
-            await asyncio.sleep(0.5)
+            await self._wait_ui_stable()
 
         # 输入消息
+        self._invalidate_ui()
         await self.controller.input_text(message)
-        await asyncio.sleep(1)
+        await self._wait_ui_stable()
 
         # 点击发送按钮
         return await self.find_and_click("发送")
 
     async def go_back(self):
         """返回上一页."""
+        self._invalidate_ui()
         await self.controller.press_key("BACK")
-        await asyncio.sleep(0.5)
+        await self._wait_ui_stable()
 
 
 async def main():
@@ -184,4 +228,4 @@ async def main():
 if __name__ == "__main__":
     import os
     os.makedirs("screenshots", exist_ok=True)
-    asyncio.run(main())
+    run(main())
@@ -1,6 +1,7 @@
 """执行AI驱动的自动化任务示例."""
 
 import asyncio
+import logging
 import os
 import sys
 
@@ -8,21 +9,95 @@ sys.path.insert(0, "src")
 
 from mobile_use.domain.entities.device import Device, DevicePlatform
 from mobile_use.domain.value_objects.point import Point
+from mobile_use.infrastructure.devices.adb_direct_controller import AdbDirectController
 from mobile_use.infrastructure.devices.android_controller import AndroidController
 from mobile_use.infrastructure.llm.base import LLMConfig, LLMProviderType
+from mobile_use.infrastructure.llm.cache import CachedLLMProvider
 from mobile_use.infrastructure.llm.openai_provider import OpenAIProvider
+from mobile_use.infrastructure.logging import setup_console_logging
 from mobile_use.domain.services.agents.orchestrator import AgentOrchestrator
 from mobile_use.domain.services.agents.task_planner import TaskPlannerAgent
 from mobile_use.domain.services.agents.context_analyzer import ContextAnalyzerAgent
 from mobile_use.domain.services.agents.action_executor import ActionExecutorAgent
 from mobile_use.domain.services.agents.result_validator import ResultValidatorAgent
 
+log = logging.getLogger("mobile_use.demo")
+
+# 进程级共享的 LLM 提供者，保持连接池常驻，避免每个任务重新握手
+_LLM_SINGLETON: CachedLLMProvider | None = None
+_LLM_LOCK = asyncio.Lock()
+
+# 按 (模型, 设备ID) 复用已构建的协调器及其代理
+_ORCHESTRATORS: dict[tuple[str, str], AgentOrchestrator] = {}
+
+
+async def _get_llm_provider() -> CachedLLMProvider:
+    """获取（首次调用时创建并初始化）共享的 LLM 提供者."""
+    global _LLM_SINGLETON
+    async with _LLM_LOCK:
+        if _LLM_SINGLETON is None:
+            llm_config = LLMConfig(
+                provider=LLMProviderType.OPENAI,
+                model="deepseek-v3",
+                api_key=os.getenv("LLM_API_KEY", "sk-I8yPynC3wWW8PMYxSeJanLTRsj5qsF1lLh4vbd929nkWLgb8"),
+                base_url=os.getenv("LLM_BASE_URL", "https://api.chat.csu.edu.cn/v1"),
+                temperature=0.7,
+                max_tokens=2048
+            )
+            # 相同请求直接命中缓存
+            provider = CachedLLMProvider(OpenAIProvider(llm_config), ttl=3600)
+            await provider.initialize()
+            _LLM_SINGLETON = provider
+        return _LLM_SINGLETON
+
+
+async def _get_orchestrator(controller: AndroidController) -> AgentOrchestrator:
+    """获取（首次调用时构建）对应模型与设备的协调器，并绑定当前控制器."""
+    llm_provider = await _get_llm_provider()
+    key = (llm_provider.config.model, controller.device.device_id)
+    orchestrator = _ORCHESTRATORS.get(key)
+    if orchestrator is None:
+        orchestrator = AgentOrchestrator(
+            task_planner=TaskPlannerAgent(llm_provider=llm_provider),
+            context_analyzer=ContextAnalyzerAgent(vision_provider=None),
+            action_executor=ActionExecutorAgent(
+                device_controller=controller,
+                # 点击/滑动/按键经常驻 adb shell 直接下发，失败时回退到 UIAutomator2
+                direct_controller=AdbDirectController(controller.device.device_id)
+            ),
+            result_validator=ResultValidatorAgent(),
+            max_iterations=10
+        )
+        _ORCHESTRATORS[key] = orchestrator
+    # 每个任务使用新连接的控制器
+    orchestrator.action_executor.device_controller = controller
+    return orchestrator
+
+
+async def _close_llm_provider() -> None:
+    """关闭共享的 LLM 提供者（及依赖它的协调器）."""
+    global _LLM_SINGLETON
+    for orchestrator in _ORCHESTRATORS.values():
+        await orchestrator.action_executor.direct_controller.close()
+    _ORCHESTRATORS.clear()
+    if _LLM_SINGLETON is not None:
+        await _LLM_SINGLETON.close()
+        _LLM_SINGLETON = None
+
+
+async def _run_with_shared_llm(coro) -> None:
+    """运行任务协程，并在事件循环结束前关闭共享的 LLM 提供者."""
+    try:
+        await coro
+    finally:
+        await _close_llm_provider()
+
 
 async def run_simple_task():
     """运行简单的自动化任务（不使用AI）."""
-    print("\n" + "=" * 60)
-    print("Mobile-Use v2.0 - 简单自动化任务")
-    print("=" * 60)
+    log.info("\n" + "=" * 60)
+    log.info("Mobile-Use v2.0 - 简单自动化任务")
+    log.info("=" * 60)
 
     # 连接设备
     device = Device(
@@ -33,52 +108,48 @@ async def run_simple_task():
     controller = AndroidController(device)
 
     try:
-        print("\n[1] 连接模拟器...")
+        log.info("\n[1] 连接模拟器...")
         await controller.connect()
-        print(f"    已连接: {device.screen_info.width}x{device.screen_info.height}")
+        log.info(f"    已连接: {device.screen_info.width}x{device.screen_info.height}")
 
         # 截图
-        print("\n[2] 截取当前屏幕...")
+        log.info("\n[2] 截取当前屏幕...")
         await controller.take_screenshot("screenshots/before_task.png")
 
-        # 获取屏幕中心点
+        # 获取屏幕信息
         screen = device.screen_info
-        center = Point(screen.width // 2, screen.height // 2)
 
         # 示例操作：从屏幕中间向上滑动（模拟下拉刷新）
-        print("\n[3] 执行滑动操作...")
-        start = Point(center.x, int(screen.height * 0.3))
-        end = Point(center.x, int(screen.height * 0.7))
+        log.info("\n[3] 执行滑动操作...")
+        start, end = screen.swipe_endpoints["down"]
         result = await controller.swipe(start, end, duration_ms=500)
-        print(f"    滑动: {result.success}")
+        log.info(f"    滑动: {result.success}")
 
         await asyncio.sleep(1)
 
         # 再次截图
-        print("\n[4] 截取操作后屏幕...")
+        log.info("\n[4] 截取操作后屏幕...")
         await controller.take_screenshot("screenshots/after_task.png")
 
         # 按返回键
-        print("\n[5] 按返回键...")
+        log.info("\n[5] 按返回键...")
         result = await controller.press_key("BACK")
-        print(f"    返回: {result.success}")
+        log.info(f"    返回: {result.success}")
 
-        print("\n任务完成!")
+        log.info("\n任务完成!")
 
     except Exception as e:
-        print(f"\n错误: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception(f"\n错误: {e}")
     finally:
         await controller.disconnect()
 
 
 async def run_ai_task(instruction: str):
     """运行AI驱动的自动化任务."""
-    print("\n" + "=" * 60)
-    print("Mobile-Use v2.0 - AI自动化任务")
-    print("=" * 60)
-    print(f"\n指令: {instruction}")
+    log.info("\n" + "=" * 60)
+    log.info("Mobile-Use v2.0 - AI自动化任务")
+    log.info("=" * 60)
+    log.info(f"\n指令: {instruction}")
 
     # 连接设备
     device = Device(
@@ -89,48 +160,21 @@ async def run_ai_task(instruction: str):
     controller = AndroidController(device)
 
     try:
-        print("\n[1] 连接模拟器...")
+        log.info("\n[1] 连接模拟器...")
         await controller.connect()
-        print(f"    已连接: {device.screen_info.width}x{device.screen_info.height}")
+        log.info(f"    已连接: {device.screen_info.width}x{device.screen_info.height}")
 
         # 获取初始截图和UI层级
-        print("\n[2] 分析当前屏幕...")
-        screenshot_result = await controller.take_screenshot()
-        screenshot_data = screenshot_result.data.get("screenshot") if screenshot_result.success else None
-
-        ui_elements = await controller.get_ui_hierarchy()
-        print(f"    找到 {len(ui_elements)} 个UI元素")
-
-        # 配置LLM（使用DeepSeek）
-        print("\n[3] 初始化AI代理...")
-        llm_config = LLMConfig(
-            provider=LLMProviderType.OPENAI,
-            model="deepseek-v3",
-            api_key=os.getenv("LLM_API_KEY", "sk-I8yPynC3wWW8PMYxSeJanLTRsj5qsF1lLh4vbd929nkWLgb8"),
-            base_url=os.getenv("LLM_BASE_URL", "https://api.chat.csu.edu.cn/v1"),
-            temperature=0.7,
-            max_tokens=2048
-        )
-        llm_provider = OpenAIProvider(llm_config)
-        await llm_provider.initialize()
-
-        # 创建代理
-        task_planner = TaskPlannerAgent(llm_provider=llm_provider)
-        context_analyzer = ContextAnalyzerAgent(vision_provider=None)
-        action_executor = ActionExecutorAgent(device_controller=controller)
-        result_validator = ResultValidatorAgent()
-
-        # 创建协调器
-        orchestrator = AgentOrchestrator(
-            task_planner=task_planner,
-            context_analyzer=context_analyzer,
-            action_executor=action_executor,
-            result_validator=result_validator,
-            max_iterations=10
+        # 截图+UI层级（单次ADB往返）与LLM初始化互不依赖，并发执行
+        log.info("\n[2] 分析当前屏幕 / [3] 初始化AI代理...")
+        (screenshot_data, ui_elements), orchestrator = await asyncio.gather(
+            controller.snapshot(),
+            _get_orchestrator(controller)  # 配置LLM（使用DeepSeek）与代理，进程内复用
         )
+        log.info(f"    找到 {len(ui_elements)} 个UI元素")
 
         # 执行任务
-        print("\n[4] 执行AI任务...")
+        log.info("\n[4] 执行AI任务...")
         result = await orchestrator.execute_task(
             instruction=instruction,
             device_id=device.device_id,
@@ -144,34 +188,98 @@ async def run_ai_task(instruction: str):
         )
 
         # 输出结果
-        print("\n" + "-" * 40)
-        print("执行结果:")
-        print(f"  成功: {result.success}")
-        print(f"  执行步骤: {result.steps_executed}/{result.total_steps}")
-        print(f"  耗时: {result.duration_ms}ms")
+        log.info("\n" + "-" * 40)
+        log.info("执行结果:")
+        log.info(f"  成功: {result.success}")
+        log.info(f"  执行步骤: {result.steps_executed}/{result.total_steps}")
+        log.info(f"  耗时: {result.duration_ms}ms")
 
         if result.actions:
-            print(f"\n  执行的操作:")
+            log.info(f"\n  执行的操作:")
             for i, action in enumerate(result.actions):
-                print(f"    {i+1}. {action.get('action', 'unknown')}: {action.get('target', 'N/A')}")
+                log.info(f"    {i+1}. {action.get('action', 'unknown')}: {action.get('target', 'N/A')}")
 
         if result.error:
-            print(f"\n  错误: {result.error}")
+            log.info(f"\n  错误: {result.error}")
 
         # 最终截图
-        print("\n[5] 保存最终截图...")
+        log.info("\n[5] 保存最终截图...")
         await controller.take_screenshot("screenshots/ai_task_result.png")
 
-        await llm_provider.close()
-
     except Exception as e:
-        print(f"\n错误: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception(f"\n错误: {e}")
     finally:
         await controller.disconnect()
 
 
+async def _cmd_tap(controller, screen, arg: str) -> None:
+    """点击坐标."""
+    parts = arg.split()
+    if len(parts) == 2:
+        x, y = int(parts[0]), int(parts[1])
+        result = await controller.tap(Point(x, y))
+        print(f"点击 ({x}, {y}): {result.success}")
+
+
+async def _cmd_swipe(controller, screen, arg: str) -> None:
+    """按方向滑动."""
+    direction = arg.strip().lower()
+    points = screen.swipe_endpoints.get(direction)
+    if points is None:
+        print("方向: up/down/left/right")
+        return
+    start, end = points
+    result = await controller.swipe(start, end)
+    print(f"滑动 {direction}: {result.success}")
+
+
+async def _cmd_input(controller, screen, arg: str) -> None:
+    """输入文本."""
+    result = await controller.input_text(arg)
+    print(f"输入: {result.success}")
+
+
+async def _cmd_back(controller, screen, arg: str) -> None:
+    """返回."""
+    result = await controller.press_key("BACK")
+    print(f"返回: {result.success}")
+
+
+async def _cmd_home(controller, screen, arg: str) -> None:
+    """主页."""
+    result = await controller.press_key("HOME")
+    print(f"主页: {result.success}")
+
+
+async def _cmd_screenshot(controller, screen, arg: str) -> None:
+    """截图."""
+    result = await controller.take_screenshot("screenshots/interactive.png")
+    print(f"截图: {result.success}")
+
+
+async def _cmd_elements(controller, screen, arg: str) -> None:
+    """显示UI元素."""
+    elements = await controller.get_ui_hierarchy()
+    print(f"\n找到 {len(elements)} 个元素:")
+    for i, elem in enumerate(elements[:15]):
+        text = elem.get("text") or elem.get("content_desc") or ""
+        if text:
+            center = elem.get("center", (0, 0))
+            print(f"  {i+1}. [{center[0]},{center[1]}] {text[:40]}")
+
+
+# 交互命令 -> 处理函数(controller, screen, 参数字符串)
+CMD_TABLE = {
+    "tap": _cmd_tap,
+    "swipe": _cmd_swipe,
+    "input": _cmd_input,
+    "back": _cmd_back,
+    "home": _cmd_home,
+    "screenshot": _cmd_screenshot,
+    "elements": _cmd_elements,
+}
+
+
 async def interactive_control():
     """交互式控制模式."""
     print("\n" + "=" * 60)
@@ -202,63 +310,17 @@ async def interactive_control():
 
         while True:
             try:
-                cmd = input("\n> ").strip().lower()
+                name, _, arg = input("\n> ").strip().partition(" ")
+                name = name.lower()
 
-                if cmd == "quit" or cmd == "exit":
+                if name == "quit" or name == "exit":
                     break
 
-                elif cmd.startswith("tap "):
-                    parts = cmd.split()
-                    if len(parts) == 3:
-                        x, y = int(parts[1]), int(parts[2])
-                        result = await controller.tap(Point(x, y))
-                        print(f"点击 ({x}, {y}): {result.success}")
-
-                elif cmd.startswith("swipe "):
-                    direction = cmd.split()[1]
-                    cx, cy = screen.width // 2, screen.height // 2
-                    if direction == "up":
-                        start, end = Point(cx, int(screen.height * 0.7)), Point(cx, int(screen.height * 0.3))
-                    elif direction == "down":
-                        start, end = Point(cx, int(screen.height * 0.3)), Point(cx, int(screen.height * 0.7))
-                    elif direction == "left":
-                        start, end = Point(int(screen.width * 0.8), cy), Point(int(screen.width * 0.2), cy)
-                    elif direction == "right":
-                        start, end = Point(int(screen.width * 0.2), cy), Point(int(screen.width * 0.8), cy)
-                    else:
-                        print("方向: up/down/left/right")
-                        continue
-                    result = await controller.swipe(start, end)
-                    print(f"滑动 {direction}: {result.success}")
-
-                elif cmd.startswith("input "):
-                    text = cmd[6:]
-                    result = await controller.input_text(text)
-                    print(f"输入: {result.success}")
-
-                elif cmd == "back":
-                    result = await controller.press_key("BACK")
-                    print(f"返回: {result.success}")
-
-                elif cmd == "home":
-                    result = await controller.press_key("HOME")
-                    print(f"主页: {result.success}")
-
-                elif cmd == "screenshot":
-                    result = await controller.take_screenshot("screenshots/interactive.png")
-                    print(f"截图: {result.success}")
-
-                elif cmd == "elements":
-                    elements = await controller.get_ui_hierarchy()
-                    print(f"\n找到 {len(elements)} 个元素:")
-                    for i, elem in enumerate(elements[:15]):
-                        text = elem.get("text") or elem.get("content_desc") or ""
-                        if text:
-                            center = elem.get("center", (0, 0))
-                            print(f"  {i+1}. [{center[0]},{center[1]}] {text[:40]}")
-
-                else:
+                handler = CMD_TABLE.get(name)
+                if handler is None:
                     print("未知命令，输入 'quit' 退出")
+                    continue
+                await handler(controller, screen, arg)
 
             except KeyboardInterrupt:
                 break
@@ -285,12 +347,19 @@ def main():
 
     choice = input("\n请选择 (1-4): ").strip()
 
+    # 非交互模式的输出经后台线程写出，不阻塞事件循环
     if choice == "1":
+        listener = setup_console_logging(log.name)
         asyncio.run(run_simple_task())
+        listener.stop()
     elif choice == "2":
         instruction = input("\n请输入任务指令: ").strip()
         if instruction:
-            asyncio.run(run_ai_task(instruction))
+            # 同时输出 mobile_use.agents 的执行日志，LLM 调用日志只保留警告以上
+            listener = setup_console_logging("mobile_use")
+            logging.getLogger("mobile_use.llm").setLevel(logging.WARNING)
+            asyncio.run(_run_with_shared_llm(run_ai_task(instruction)))
+            listener.stop()
     elif choice == "3":
         asyncio.run(interactive_control())
     else:
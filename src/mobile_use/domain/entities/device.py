@@ -1,5 +1,6 @@
 """Device entity representing mobile devices."""
 
+import time
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -23,7 +24,7 @@ class DeviceStatus(Enum):
     ERROR = "error"
 
 
-@dataclass
+@dataclass(slots=True)
 class Device:
     """Device entity representing a mobile device."""
     
@@ -38,28 +39,38 @@ class Device:
     screen_info: ScreenInfo | None = None
     capabilities: dict[str, Any] = field(default_factory=dict)
     metadata: dict[str, Any] = field(default_factory=dict)
-    last_seen: datetime | None = None
-    connected_at: datetime | None = None
+    # Epoch nanoseconds (0 = never); datetimes are built only on access
+    last_seen_ns: int = 0
+    connected_at_ns: int = 0
     
     def connect(self) -> None:
         """Mark device as connected."""
         self.status = DeviceStatus.CONNECTED
-        self.connected_at = datetime.now()
-        self.last_seen = datetime.now()
+        self.connected_at_ns = self.last_seen_ns = time.time_ns()
     
     def disconnect(self) -> None:
         """Mark device as disconnected."""
         self.status = DeviceStatus.DISCONNECTED
-        self.last_seen = datetime.now()
+        self.last_seen_ns = time.time_ns()
     
     def update_last_seen(self) -> None:
         """Update last seen timestamp."""
-        self.last_seen = datetime.now()
+        self.last_seen_ns = time.time_ns()
     
     def set_error(self) -> None:
         """Mark device as having an error."""
         self.status = DeviceStatus.ERROR
-        self.last_seen = datetime.now()
+        self.last_seen_ns = time.time_ns()
+    
+    @property
+    def last_seen(self) -> datetime | None:
+        """Get last seen time."""
+        return datetime.fromtimestamp(self.last_seen_ns / 1e9) if self.last_seen_ns else None
+    
+    @property
+    def connected_at(self) -> datetime | None:
+        """Get connection time."""
+        return datetime.fromtimestamp(self.connected_at_ns / 1e9) if self.connected_at_ns else None
     
     @property
     def is_connected(self) -> bool:
@@ -1,10 +1,32 @@
 """Task entity representing automation tasks."""
 
+import itertools
+import time
 import uuid
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from enum import Enum
-from typing import Any
+from typing import Any, Iterable, SupportsIndex
+
+
+# Step ids never leave the process: a per-process random prefix plus a
+# counter is unique enough and avoids a urandom read per step
+_STEP_ID_PREFIX = uuid.uuid4().hex[:8]
+_STEP_ID_COUNTER = itertools.count()
+
+
+def _next_step_id() -> str:
+    """Generate a process-unique step id."""
+    return f"{_STEP_ID_PREFIX}-{next(_STEP_ID_COUNTER):x}"
+
+
+# TaskStep fields included in to_dict(); assigning any of them drops the memo
+_SERIALIZED_FIELDS = frozenset({"id", "action", "target", "status", "result", "error"})
+
+
+def _to_datetime(ns: int) -> datetime | None:
+    """Convert an epoch-nanosecond stamp (0 = unset) to a datetime."""
+    return datetime.fromtimestamp(ns / 1e9) if ns else None
 
 
 class TaskStatus(Enum):
@@ -24,38 +46,160 @@ class TaskPriority(Enum):
     URGENT = "urgent"
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskStep:
     """Individual step within a task."""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=_next_step_id)
     action: str = ""
     target: str | None = None
     parameters: dict[str, Any] = field(default_factory=dict)
     status: TaskStatus = TaskStatus.PENDING
     result: dict[str, Any] | None = None
     error: str | None = None
-    started_at: datetime | None = None
-    completed_at: datetime | None = None
+    # Epoch nanoseconds (0 = unset); datetimes are built only on access
+    started_at_ns: int = 0
+    completed_at_ns: int = 0
+    # Owning step list (kept in sync by _StepList) and memoized to_dict() output
+    _owner: "_StepList | None" = field(default=None, init=False, repr=False, compare=False)
+    _serialized: dict[str, Any] | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Keep the owner's completed count and the memoized dict in sync."""
+        if name in _SERIALIZED_FIELDS:
+            if name == "status":
+                # Slots are unset while __init__ runs, hence the getattr defaults
+                owner = getattr(self, "_owner", None)
+                if owner is not None:
+                    was_done = getattr(self, "status", None) == TaskStatus.COMPLETED
+                    owner.completed += (value == TaskStatus.COMPLETED) - was_done
+            object.__setattr__(self, "_serialized", None)
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Copy/pickle state; the owner link is rebuilt by the list that adopts the copy."""
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.init}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """Restore copy/pickle state without an owner or memoized dict."""
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_owner", None)
+        object.__setattr__(self, "_serialized", None)
 
     def start(self) -> None:
         """Mark step as started."""
         self.status = TaskStatus.RUNNING
-        self.started_at = datetime.now()
+        self.started_at_ns = time.time_ns()
 
     def complete(self, result: dict[str, Any] | None = None) -> None:
         """Mark step as completed."""
         self.status = TaskStatus.COMPLETED
         self.result = result
-        self.completed_at = datetime.now()
+        self.completed_at_ns = time.time_ns()
 
     def fail(self, error: str) -> None:
         """Mark step as failed."""
         self.status = TaskStatus.FAILED
         self.error = error
-        self.completed_at = datetime.now()
+        self.completed_at_ns = time.time_ns()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the step, reusing the result until a serialized field changes."""
+        if self._serialized is None:
+            self._serialized = {
+                "id": self.id,
+                "action": self.action,
+                "target": self.target,
+                "status": self.status.value,
+                "result": self.result,
+                "error": self.error,
+            }
+        return dict(self._serialized)
+
+    @property
+    def started_at(self) -> datetime | None:
+        """Get start time."""
+        return _to_datetime(self.started_at_ns)
+
+    @property
+    def completed_at(self) -> datetime | None:
+        """Get completion time."""
+        return _to_datetime(self.completed_at_ns)
+
+
+class _StepList(list):
+    """List of task steps that keeps a running count of completed steps.
+
+    Steps added through any list method are adopted, so later status
+    changes on them update ``completed`` without rescanning the list.
+    """
+
+    __slots__ = ("completed",)
+
+    def __init__(self, steps: Iterable[TaskStep] = ()) -> None:
+        super().__init__()
+        self.completed = 0
+        self.extend(steps)
 
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Rebuild through __init__ so copies and pickles recount their steps
+        return type(self), (list(self),)
 
-@dataclass
+    def _adopt(self, step: TaskStep) -> TaskStep:
+        step._owner = self
+        if step.status == TaskStatus.COMPLETED:
+            self.completed += 1
+        return step
+
+    def _release(self, step: TaskStep) -> None:
+        if step._owner is self:
+            step._owner = None
+            if step.status == TaskStatus.COMPLETED:
+                self.completed -= 1
+
+    def append(self, step: TaskStep) -> None:
+        super().append(self._adopt(step))
+
+    def extend(self, steps: Iterable[TaskStep]) -> None:
+        super().extend([self._adopt(step) for step in steps])
+
+    def insert(self, index: SupportsIndex, step: TaskStep) -> None:
+        super().insert(index, self._adopt(step))
+
+    def __iadd__(self, steps: Iterable[TaskStep]) -> "_StepList":
+        self.extend(steps)
+        return self
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        if isinstance(index, slice):
+            for step in self[index]:
+                self._release(step)
+            value = [self._adopt(step) for step in value]
+        else:
+            self._release(self[index])
+            self._adopt(value)
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index: Any) -> None:
+        for step in (self[index] if isinstance(index, slice) else [self[index]]):
+            self._release(step)
+        super().__delitem__(index)
+
+    def pop(self, index: SupportsIndex = -1) -> TaskStep:
+        step = super().pop(index)
+        self._release(step)
+        return step
+
+    def remove(self, step: TaskStep) -> None:
+        del self[self.index(step)]
+
+    def clear(self) -> None:
+        for step in self:
+            self._release(step)
+        super().clear()
+
+
+@dataclass(slots=True)
 class Task:
     """Main task entity representing an automation task."""
     
@@ -67,11 +211,18 @@ class Task:
     status: TaskStatus = TaskStatus.PENDING
     steps: list[TaskStep] = field(default_factory=list)
     metadata: dict[str, Any] = field(default_factory=dict)
-    created_at: datetime = field(default_factory=datetime.now)
-    started_at: datetime | None = None
-    completed_at: datetime | None = None
+    # Epoch nanoseconds (0 = unset); datetimes are built only on access
+    created_at_ns: int = field(default_factory=time.time_ns)
+    started_at_ns: int = 0
+    completed_at_ns: int = 0
     error: str | None = None
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Wrap assigned step lists so the completed count stays current."""
+        if name == "steps" and not isinstance(value, _StepList):
+            value = _StepList(value)
+        object.__setattr__(self, name, value)
+
     def add_step(self, action: str, target: str | None = None,
                  parameters: dict[str, Any] | None = None) -> TaskStep:
         """Add a new step to the task."""
@@ -86,23 +237,38 @@ class Task:
     def start(self) -> None:
         """Mark task as started."""
         self.status = TaskStatus.RUNNING
-        self.started_at = datetime.now()
+        self.started_at_ns = time.time_ns()
 
     def complete(self) -> None:
         """Mark task as completed."""
         self.status = TaskStatus.COMPLETED
-        self.completed_at = datetime.now()
+        self.completed_at_ns = time.time_ns()
 
     def fail(self, error: str) -> None:
         """Mark task as failed."""
         self.status = TaskStatus.FAILED
         self.error = error
-        self.completed_at = datetime.now()
+        self.completed_at_ns = time.time_ns()
 
     def cancel(self) -> None:
         """Cancel the task."""
         self.status = TaskStatus.CANCELLED
-        self.completed_at = datetime.now()
+        self.completed_at_ns = time.time_ns()
+
+    @property
+    def created_at(self) -> datetime:
+        """Get creation time."""
+        return datetime.fromtimestamp(self.created_at_ns / 1e9)
+
+    @property
+    def started_at(self) -> datetime | None:
+        """Get start time."""
+        return _to_datetime(self.started_at_ns)
+
+    @property
+    def completed_at(self) -> datetime | None:
+        """Get completion time."""
+        return _to_datetime(self.completed_at_ns)
 
     @property
     def is_completed(self) -> bool:
@@ -112,8 +278,8 @@ class Task:
     @property
     def duration(self) -> float | None:
         """Get task duration in seconds."""
-        if self.started_at and self.completed_at:
-            return (self.completed_at - self.started_at).total_seconds()
+        if self.started_at_ns and self.completed_at_ns:
+            return (self.completed_at_ns - self.started_at_ns) / 1e9
         return None
 
     @property
@@ -121,11 +287,10 @@ class Task:
         """Get task progress as percentage (0.0 to 1.0)."""
         if not self.steps:
             return 0.0
-        completed_steps = sum(1 for step in self.steps if step.status == TaskStatus.COMPLETED)
-        return completed_steps / len(self.steps)
+        return self.steps.completed / len(self.steps)
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskResult:
     """Result of task execution."""
     
@@ -143,17 +308,7 @@ class TaskResult:
         return cls(
             task_id=task.id,
             success=task.status == TaskStatus.COMPLETED,
-            steps=[
-                {
-                    "id": step.id,
-                    "action": step.action,
-                    "target": step.target,
-                    "status": step.status.value,
-                    "result": step.result,
-                    "error": step.error,
-                }
-                for step in task.steps
-            ],
+            steps=[step.to_dict() for step in task.steps],
             error=task.error,
             duration=task.duration,
         )
@@ -1,6 +1,19 @@
 """Action Executor Agent - Executes device actions."""
 
-from typing import Any, Protocol
+import asyncio
+import functools
+import hashlib
+import itertools
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from enum import Enum
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, Protocol
 
 from mobile_use.domain.services.agents.base import (
     AgentContext,
@@ -8,6 +21,177 @@ from mobile_use.domain.services.agents.base import (
     BaseAgent,
 )
 from mobile_use.domain.value_objects.point import Point
+from mobile_use.domain.value_objects.ui_index import UIIndex
+
+logger = logging.getLogger("mobile_use.agents")
+
+try:
+    import ahocorasick
+except ImportError:  # Optional: fall back to a regex alternation
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the stdlib json module
+    orjson = None
+
+
+# 目标描述中的常见修饰词，提取关键词时去除（顺序即删除顺序）
+_STOP_WORDS = ("app", "icon", "button", "the", "a", "an", "click", "tap", "open", "launch", "打开", "点击", "按钮", "图标")
+_STOP_WORD_SET = frozenset(_STOP_WORDS)
+_KEYWORD_SPLIT_RE = re.compile(r"[,.\s]+")
+# 以坐标形式给出的目标，如 "100,200" 或 "(100, 200)"
+_COORD_TARGET_RE = re.compile(r"^\(?\s*(\d+)\s*,\s*(\d+)\s*\)?$")
+# LLM 回复中的 JSON：优先取 ``` 代码块内容，否则取最外层的 {...}
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+# 常见桌面启动器的包名，桌面上不做障碍物检测
+_LAUNCHER_PACKAGES = frozenset({
+    "com.android.launcher",
+    "com.android.launcher2",
+    "com.android.launcher3",
+    "com.google.android.apps.nexuslauncher",
+    "com.miui.home",
+    "com.huawei.android.launcher",
+    "com.hihonor.android.launcher",
+    "com.oppo.launcher",
+    "com.bbk.launcher2",
+    "com.sec.android.app.launcher",
+    "net.oneplus.launcher",
+})
+# 桌面特有的 resource-id 片段（底部常驻栏、工作区）
+_LAUNCHER_ID_HINTS = ("hotseat", "workspace")
+# 元素列表中出现这些词时，障碍物检测需要结合截图判断
+_OBSTACLE_VISION_HINTS = ("广告", "跳过", "skip", "×")
+
+# 恢复决策提示词的固定部分，作为 system prompt 放在最前面，
+# 每次请求的前缀完全一致，可命中服务端的前缀缓存
+_RECOVERY_PROMPT_PREFIX = """你是一个移动应用自动化助手。当前执行遇到了问题，需要你决定如何恢复。
+
+## 可选恢复策略
+1. scroll_down - 向下滚动（目标可能在下方）
+2. scroll_up - 向上滚动（目标可能在上方）
+3. swipe_left - 向左滑动（可能需要切换tab或页面）
+4. swipe_right - 向右滑动
+5. go_back - 返回上一页（可能进入了错误页面）
+6. close_popup - 关闭弹窗（如果有遮挡）
+7. tap_element - 点击一个替代元素（指定index）
+8. wait - 等待页面加载
+9. give_up - 放弃恢复
+
+## 分析要求
+1. 分析当前页面元素，判断失败信息中的目标元素是否可能存在
+2. 如果页面上有相似或相关的元素，可以选择点击它
+3. 如果目标可能在屏幕外，选择滚动
+4. 如果页面看起来不对，选择返回
+5. 如果有弹窗遮挡，选择关闭
+6. 不要选择已尝试过的策略
+7. 按优先级给出最多3个候选策略，第一个无效时会依次执行后面的
+
+## 页面元素格式
+当前页面元素是一个JSON数组，每个元素包含 index（元素索引）、text（文本）、desc（描述）、
+class（控件类型）、clickable（是否可点击）、y（纵坐标，越大越靠下）
+
+请返回JSON格式：
+{
+    "strategies": [
+        {
+            "strategy": "策略名称",
+            "element_index": 如果是tap_element则填写元素index否则为null,
+            "confidence": 0.0-1.0
+        }
+    ],
+    "reason": "选择这些策略的原因"
+}"""
+
+
+@functools.lru_cache(maxsize=32)
+def _swipe_endpoints(width: int, height: int, direction: str) -> tuple[Point, Point] | None:
+    """Get the (start, end) points for a swipe, or None for an unknown direction.
+
+    Matches ``ScreenInfo.swipe_endpoints``: vertical swipes run between 70%
+    and 30% of the height, horizontal ones between 80% and 20% of the width.
+    Points are immutable, so cached instances are shared between calls.
+    """
+    center_x = width // 2
+    center_y = height // 2
+    top, bottom = Point(center_x, int(height * 0.3)), Point(center_x, int(height * 0.7))
+    left, right = Point(int(width * 0.2), center_y), Point(int(width * 0.8), center_y)
+    return {
+        "up": (bottom, top),
+        "down": (top, bottom),
+        "left": (right, left),
+        "right": (left, right),
+    }.get(direction)
+
+
+@functools.lru_cache(maxsize=8)
+def _keyword_matcher(keywords: tuple[str, ...]) -> Callable[[str], bool]:
+    """Build a predicate telling whether a string contains any of the keywords.
+
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, so each
+    string is scanned once regardless of the keyword count; otherwise a
+    compiled regex alternation.
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return lambda s: next(automaton.iter(s), None) is not None
+
+    pattern = re.compile("|".join(map(re.escape, keywords)))
+    return lambda s: pattern.search(s) is not None
+
+
+def _compact_json(value: Any) -> str:
+    """Serialize a prompt payload without whitespace to save input tokens."""
+    if orjson is not None:
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _parse_llm_json(response: str) -> Any:
+    """Parse the JSON object in an LLM response.
+
+    The object is taken from a ``` code fence if there is one, else from
+    the outermost braces, so surrounding prose is ignored.
+    """
+    match = _JSON_FENCE_RE.search(response)
+    if match:
+        json_str = match.group(1)
+    else:
+        match = _JSON_OBJECT_RE.search(response)
+        json_str = match.group() if match else response
+    if orjson is not None:
+        return orjson.loads(json_str)
+    return json.loads(json_str)
+
+
+class RecoveryState(Enum):
+    """Recovery progress for one failing step."""
+    INIT = "init"
+    SCROLL_TRIED = "scroll_tried"
+    POPUP_TRIED = "popup_tried"
+    BACK_TRIED = "back_tried"
+    LLM_DECIDED = "llm_decided"
+    EXHAUSTED = "exhausted"
+
+
+@dataclass
+class RecoveryRecord:
+    """Recovery state of one step, persisted across re-entries."""
+    state: RecoveryState = RecoveryState.INIT
+    tried: set[str] = field(default_factory=set)
+    attempts: int = 0
+    elapsed: float = 0.0  # 在恢复中花费的总时间（秒）
+    # LLM 给出但尚未执行的候选策略，及其对应的页面（元素索引只在该页面有效）
+    pending: list[tuple[str, int | None]] = field(default_factory=list)
+    pending_screen: bytes | None = None
+    # 最近一次执行的LLM策略及其缓存键、页面结构，步骤重试成功后才写入决策缓存和页面记忆
+    last_decision: tuple[bytes, tuple[str, int | None]] | None = None
+    last_shape: frozenset[tuple[str, int]] | None = None
 
 
 class DeviceControllerProtocol(Protocol):
@@ -40,38 +224,131 @@ class ActionExecutorAgent(BaseAgent):
     handling the low-level interaction with the device controller.
     """
 
-    def __init__(self, device_controller: DeviceControllerProtocol | None = None, llm_provider: Any = None):
+    # 映射常见按键到设备支持的按键
+    KEY_MAP = MappingProxyType({
+        # 基础导航
+        "ENTER": "ENTER",
+        "BACK": "BACK",
+        "HOME": "HOME",
+        "MENU": "MENU",
+        "RECENT": "RECENT",  # 最近任务/多任务
+        "RECENTS": "RECENT",
+        # 搜索
+        "SEARCH": "SEARCH",
+        # 音量控制
+        "VOLUME_UP": "VOLUME_UP",
+        "VOLUMEUP": "VOLUME_UP",
+        "VOLUME_DOWN": "VOLUME_DOWN",
+        "VOLUMEDOWN": "VOLUME_DOWN",
+        # 电源
+        "POWER": "POWER",
+        # 编辑
+        "TAB": "TAB",
+        "DELETE": "DEL",
+        "BACKSPACE": "DEL",
+        "DEL": "DEL",
+        # 方向键
+        "UP": "UP",
+        "DOWN": "DOWN",
+        "LEFT": "LEFT",
+        "RIGHT": "RIGHT",
+        "CENTER": "CENTER",
+    })
+
+    # 需要忽略的系统元素（如ATX悬浮窗）
+    ignore_elements: tuple[str, ...] = ("atx", "uiautomator", "floating", "悬浮")
+
+    # 可用的恢复策略
+    recovery_strategies: tuple[str, ...] = (
+        "scroll_down",      # 向下滚动寻找目标
+        "scroll_up",        # 向上滚动寻找目标
+        "swipe_left",       # 向左滑动（切换tab等）
+        "swipe_right",      # 向右滑动
+        "go_back",          # 返回上一页
+        "close_popup",      # 关闭弹窗
+        "tap_alternative",  # 点击替代元素
+        "wait_and_retry",   # 等待后重试
+        "llm_decide",       # 让LLM决定
+    )
+
+    # 无需重新定位元素、可在同一轮中紧接着执行的动作
+    BATCHABLE_ACTIONS = frozenset({"tap", "click", "input", "press_key", "wait", "back", "home"})
+
+    # 恢复决策提示词中最多列出的页面元素数
+    RECOVERY_PROMPT_ELEMENTS = 40
+    # 提示词中每个元素 text/desc 的最大字符数
+    PROMPT_LABEL_MAX_CHARS = 40
+    # LLM 决策缓存的最大条目数
+    LLM_CACHE_SIZE = 64
+    # 恢复决策缓存的最大条目数与有效期（秒）
+    RECOVERY_CACHE_SIZE = 256
+    RECOVERY_CACHE_TTL_S = 300.0
+    # 页面结构记忆的最大条目数，以及直接采用记忆策略所需的成功次数
+    SCREEN_MEMORY_SIZE = 512
+    SCREEN_MEMORY_MIN_HITS = 3
+
+    # 无LLM时的恢复策略顺序
+    RULE_STRATEGIES = ("scroll_down", "scroll_up", "go_back")
+    # 执行各策略后进入的恢复状态
+    STRATEGY_STATES = {
+        "scroll_down": RecoveryState.SCROLL_TRIED,
+        "scroll_up": RecoveryState.SCROLL_TRIED,
+        "swipe_left": RecoveryState.SCROLL_TRIED,
+        "swipe_right": RecoveryState.SCROLL_TRIED,
+        "close_popup": RecoveryState.POPUP_TRIED,
+        "go_back": RecoveryState.BACK_TRIED,
+    }
+    # 滑动类恢复策略: 策略 -> (手指滑动方向, 时长ms, 日志描述)
+    RECOVERY_SWIPES = MappingProxyType({
+        "scroll_down": ("up", 500, "向下滚动"),
+        "scroll_up": ("down", 500, "向上滚动"),
+        "swipe_left": ("left", 300, "向左滑动"),
+        "swipe_right": ("right", 300, "向右滑动"),
+    })
+    # 可以重复执行的策略（结果取决于参数或页面加载进度）
+    REPEATABLE_STRATEGIES = frozenset({"tap_element", "wait"})
+    # 单个步骤在恢复中（含LLM决策）花费的总时间预算（秒）
+    RECOVERY_BUDGET_S = 15.0
+    # 一次LLM恢复决策返回的候选策略数
+    RECOVERY_CANDIDATES = 3
+    # 恢复决策的LLM请求次数（遇到超时、限流等临时错误时重试）
+    RECOVERY_LLM_ATTEMPTS = 2
+    # 保留最近多少个失败步骤的恢复历史和恢复状态
+    RECOVERY_HISTORY_STEPS = 16
+
+    def __init__(
+        self,
+        device_controller: DeviceControllerProtocol | None = None,
+        llm_provider: Any = None,
+        direct_controller: DeviceControllerProtocol | None = None
+    ):
         super().__init__(
             name="ActionExecutor",
             description="Executes device actions based on planned steps"
         )
         self.device_controller = device_controller
+        # 可选的直连ADB后端：tap/swipe/input/按键优先走它，失败再回退到 device_controller
+        self.direct_controller = direct_controller
         self.llm_provider = llm_provider
         self.default_action_delay_ms = 500
         self.max_recovery_attempts = 3  # 最大恢复尝试次数
-        self.recovery_history: list[dict] = []  # 恢复操作历史
+        self._recent_fail_count = 0  # 最近连续失败次数，用于调整动作后的等待时间
+        # 最近的恢复操作历史（每个步骤最多 max_recovery_attempts 条）
+        self.recovery_history: deque[dict] = deque(maxlen=self.max_recovery_attempts * self.RECOVERY_HISTORY_STEPS)
+        self._recovery_fsm: dict[tuple[int, str], RecoveryRecord] = {}  # 每个步骤的恢复状态
         self.obstacle_check_count = 0  # 障碍物检测次数
         self.max_obstacle_checks = 2  # 每个步骤最多检测2次障碍物
-        
-        # 需要忽略的系统元素（如ATX悬浮窗）
-        self.ignore_elements = [
-            "atx", "uiautomator", "floating", "悬浮"
-        ]
+        self._ui_index_cache: UIIndex | None = None  # 最近一次 UI 快照的索引
+        self._clear_screen_hash: int | None = None  # 最近一次判定为无障碍物的页面结构哈希
+        # 相同截图+目标+元素时复用LLM的判断结果，避免重试时重复推理
+        self._llm_cache: OrderedDict[bytes, dict[str, Any]] = OrderedDict()
+        # 同一页面上同一目标恢复成功过的LLM决策: key -> (写入时间, (策略, 元素索引))
+        self._recovery_cache: OrderedDict[bytes, tuple[float, tuple[str, int | None]]] = OrderedDict()
+        self._llm_warmup: asyncio.Task | None = None  # 进行中的LLM连接预热
+        # 页面结构（控件类型及数量）-> 在该类页面上恢复成功过的策略及次数，与具体目标无关
+        self._screen_memory: OrderedDict[frozenset[tuple[str, int]], Counter[str]] = OrderedDict()
         
         # 障碍物检测现在主要依赖LLM+截图，不再使用固定关键词
-        
-        # 可用的恢复策略
-        self.recovery_strategies = [
-            "scroll_down",      # 向下滚动寻找目标
-            "scroll_up",        # 向上滚动寻找目标
-            "swipe_left",       # 向左滑动（切换tab等）
-            "swipe_right",      # 向右滑动
-            "go_back",          # 返回上一页
-            "close_popup",      # 关闭弹窗
-            "tap_alternative",  # 点击替代元素
-            "wait_and_retry",   # 等待后重试
-            "llm_decide",       # 让LLM决定
-        ]
 
     async def execute(self, context: AgentContext) -> AgentResult:
         """Execute planned actions.
@@ -110,8 +387,8 @@ class ActionExecutorAgent(BaseAgent):
         target = step.get("target")
         parameters = step.get("parameters", {})
         
-        print(f"[ActionExecutor] ========== 执行步骤 {current_step_index + 1}/{len(steps)} ==========")
-        print(f"[ActionExecutor] 动作: {action}, 目标: {target}, 参数: {parameters}")
+        logger.info("[ActionExecutor] ========== 执行步骤 %s/%s ==========", current_step_index + 1, len(steps))
+        logger.info("[ActionExecutor] 动作: %s, 目标: %s, 参数: %s", action, target, parameters)
 
         # 暂时禁用障碍物检测模块
         # TODO: 后续优化后再启用
@@ -145,7 +422,8 @@ class ActionExecutorAgent(BaseAgent):
 
             # 检查是否需要自主恢复
             if not result.get("success") and result.get("needs_recovery"):
-                print(f"[ActionExecutor] 动作执行失败，启动自主恢复...")
+                self._recent_fail_count += 1
+                logger.warning("[ActionExecutor] 动作执行失败，启动自主恢复...")
                 recovery_result = await self._autonomous_recovery(
                     failed_action=action,
                     failed_target=target,
@@ -173,26 +451,39 @@ class ActionExecutorAgent(BaseAgent):
                         message=f"Failed to execute and recover: {action} (step {current_step_index}, recovery failed)"
                     )
 
-            # 动作成功执行，重置障碍物检测计数
+            # 动作成功执行，重置障碍物检测计数和该步骤的恢复状态
             self.obstacle_check_count = 0
+            record = self._recovery_fsm.pop(self._recovery_key(current_step_index, action, target), None)
+            if record is not None and record.last_decision is not None:
+                # 恢复后重试成功，说明最近一次的恢复决策确实有效
+                self._recovery_cache_put(*record.last_decision)
+                if record.last_shape is not None:
+                    self._screen_memory_put(record.last_shape, record.last_decision[1][0])
             
-            # 每个操作后短暂等待页面响应
-            import asyncio
-            wait_time = 0.3  # 统一短暂等待
-            await asyncio.sleep(wait_time)
-            
+            # 每个操作后短暂等待页面响应，页面最近反复失败时等待更久
+            self._recent_fail_count = max(0, self._recent_fail_count - 1)
+            await asyncio.sleep(self._settle_delay())
+
+            actions = [{
+                "action": action,
+                "target": target,
+                "parameters": parameters,
+                "result": result
+            }]
+
+            # 后续的简单动作在同一轮内连续执行，省去逐步的规划/验证往返
+            batch_actions, batch_aborted = await self.execute_batch_after(steps, current_step_index + 1, context)
+            actions.extend(batch_actions)
+
             return AgentResult.success_result(
-                message=f"Executed action: {action}",
-                actions=[{
-                    "action": action,
-                    "target": target,
-                    "parameters": parameters,
-                    "result": result
-                }],
+                message=f"Executed action: {action}" if len(actions) == 1 else f"Executed {len(actions)} actions",
+                actions=actions,
                 data={
                     "step_index": current_step_index,
                     "action_result": result,
-                    "next_step": current_step_index + 1
+                    "next_step": current_step_index + len(actions),
+                    # 合并执行异常中断时无法确定执行到哪一步，调用方不应从 next_step 续跑
+                    "batch_aborted": batch_aborted
                 },
                 next_step="validate"
             )
@@ -203,6 +494,188 @@ class ActionExecutorAgent(BaseAgent):
                 message=f"Failed to execute action: {action}"
             )
 
+    async def execute_batch_after(
+        self,
+        steps: list[dict[str, Any]],
+        start: int,
+        context: AgentContext
+    ) -> tuple[list[dict[str, Any]], bool]:
+        """Execute the run of batchable steps beginning at ``steps[start]``.
+
+        ``execute`` calls this after the current step; callers that ran the
+        first step before the full plan was known (streamed planning) call
+        it once the plan is complete, with the same batching rules.
+
+        Returns:
+            Tuple of (action records, aborted) as from ``_execute_batch``
+        """
+        batch = self._collect_batch(steps, start)
+        if not batch:
+            return [], False
+        logger.info("[ActionExecutor] 合并执行后续 %s 个简单动作", len(batch))
+        return await self._execute_batch(batch, context)
+
+    def _collect_batch(self, steps: list[dict[str, Any]], start: int) -> list[dict[str, Any]]:
+        """Collect the run of steps after ``start`` that can execute without re-planning.
+
+        Taps qualify only with explicit coordinates: the UI snapshot is stale
+        once the previous action has run, so targets cannot be re-resolved.
+        """
+        batch: list[dict[str, Any]] = []
+        for step in steps[start:]:
+            action = step.get("action", "")
+            parameters = step.get("parameters") or {}
+            if action not in self.BATCHABLE_ACTIONS:
+                break
+            if action in ("tap", "click") and not ("x" in parameters and "y" in parameters):
+                break
+            if action == "input" and not (parameters.get("text") or parameters.get("content")):
+                break
+            batch.append(step)
+        return batch
+
+    def _batch_command(self, step: dict[str, Any]) -> str | None:
+        """Build the direct-backend shell command for a batchable step, if possible."""
+        action = step.get("action", "")
+        parameters = step.get("parameters") or {}
+        backend = self.direct_controller
+        if action in ("tap", "click"):
+            return backend.tap_command(Point(int(parameters["x"]), int(parameters["y"])))  # type: ignore
+        if action == "input":
+            return backend.text_command(parameters.get("text") or parameters.get("content"))  # type: ignore
+        if action in ("back", "home"):
+            return backend.key_command(action.upper())  # type: ignore
+        if action == "press_key":
+            key = parameters.get("key", "ENTER").upper()
+            return backend.key_command(self.KEY_MAP.get(key, key))  # type: ignore
+        if action == "wait":
+            return f"sleep {parameters.get('duration_ms', 1000) / 1000:g}"
+        return None
+
+    async def _execute_batch(
+        self,
+        batch: list[dict[str, Any]],
+        context: AgentContext
+    ) -> tuple[list[dict[str, Any]], bool]:
+        """Execute batchable steps in order, stopping at the first failure.
+
+        With a direct backend that supports ``run_batch`` the whole run is
+        sent as one shell script; otherwise steps run one by one, with runs
+        of consecutive taps still sent together via ``_execute_tap_batch``.
+
+        Returns:
+            Tuple of (action records for the steps that succeeded, aborted).
+            ``aborted`` is True when a shell script failed mid-way and it is
+            unknown how many of the remaining steps already ran on the device
+        """
+        def record(step: dict[str, Any], result: dict[str, Any]) -> dict[str, Any]:
+            return {
+                "action": step.get("action", ""),
+                "target": step.get("target"),
+                "parameters": step.get("parameters") or {},
+                "result": result
+            }
+
+        if self.direct_controller is not None and hasattr(self.direct_controller, "run_batch"):
+            commands = [self._batch_command(step) for step in batch]
+            if all(commands):
+                try:
+                    completed, output = await self.direct_controller.run_batch(commands)  # type: ignore
+                    if completed < len(batch):
+                        logger.warning("[ActionExecutor] 合并执行在第 %s 个动作失败: %s", completed + 1, output)
+                    await asyncio.sleep(self._settle_delay())
+                    return [record(step, {"success": True, "batched": True}) for step in batch[:completed]], False
+                except Exception as e:
+                    # 无法确定执行到哪一步，不再逐个重试以免重复操作
+                    logger.warning("[ActionExecutor] 合并执行异常: %s", e)
+                    return [], True
+
+        actions: list[dict[str, Any]] = []
+        i = 0
+        while i < len(batch):
+            # 连续的坐标点击合并为一次执行（_collect_batch 保证点击都带坐标）
+            j = i
+            while j < len(batch) and batch[j].get("action") in ("tap", "click"):
+                j += 1
+            if j - i > 1:
+                taps = batch[i:j]
+                points = [Point(int(s["parameters"]["x"]), int(s["parameters"]["y"])) for s in taps]
+                completed = await self._execute_tap_batch(points)
+                if completed is None:
+                    return actions, True
+                actions.extend(
+                    record(step, {"success": True, "x": point.x, "y": point.y, "batched": True})
+                    for step, point in zip(taps, points[:completed])
+                )
+                if completed < len(taps):
+                    logger.warning("[ActionExecutor] 合并点击在第 %s 个失败", completed + 1)
+                    break
+                await asyncio.sleep(self._settle_delay())
+                i = j
+                continue
+
+            step = batch[i]
+            i += 1
+            result = await self._execute_action(
+                action=step.get("action", ""),
+                target=step.get("target"),
+                parameters=step.get("parameters") or {},
+                context=context
+            )
+            if not result.get("success"):
+                logger.warning("[ActionExecutor] 合并执行中断: %s", result.get('error'))
+                break
+            actions.append(record(step, result))
+            await asyncio.sleep(self._settle_delay())
+        return actions, False
+
+    async def _execute_tap_batch(self, points: list[Point]) -> int | None:
+        """Tap several points in order, in one shell round-trip when possible.
+
+        Reached from ``_execute_batch`` for runs of coordinate taps, e.g. a
+        digit keypad plan from ModularOrchestrator, when the direct backend
+        cannot take the whole batch as one script.
+
+        Returns:
+            Number of taps that succeeded before the first failure, or None
+            if the shell script failed and the number of taps is unknown
+        """
+        if self.direct_controller is not None and hasattr(self.direct_controller, "run_batch"):
+            try:
+                commands = [self.direct_controller.tap_command(point) for point in points]  # type: ignore
+                completed, _ = await self.direct_controller.run_batch(commands)  # type: ignore
+                return completed
+            except Exception as e:
+                # 无法确定执行到哪一步，不再逐个重试以免重复点击
+                logger.warning("[ActionExecutor] 合并点击异常: %s", e)
+                return None
+
+        for n, point in enumerate(points):
+            try:
+                await self.device_controller.tap(point)  # type: ignore
+            except Exception as e:
+                logger.warning("[ActionExecutor] 点击 (%s, %s) 失败: %s", point.x, point.y, e)
+                return n
+            if n + 1 < len(points):
+                await asyncio.sleep(self._settle_delay())
+        return len(points)
+
+    def _settle_delay(self) -> float:
+        """Seconds to wait after an action: 50ms, doubling per recent failure, capped at 1s."""
+        return min(0.05 * 2 ** self._recent_fail_count, 1.0)
+
+    async def _device_call(self, method: str, *args: Any) -> Any:
+        """Run a device action on the direct backend, falling back to device_controller."""
+        if self.direct_controller is not None:
+            try:
+                result = await getattr(self.direct_controller, method)(*args)
+                if getattr(result, "success", True):
+                    return result
+                logger.warning("[ActionExecutor] ADB直连 %s 失败: %s，回退到设备控制器", method, getattr(result, 'error', None))
+            except Exception as e:
+                logger.warning("[ActionExecutor] ADB直连 %s 异常: %s，回退到设备控制器", method, e)
+        return await getattr(self.device_controller, method)(*args)
+
     async def _execute_action(
         self,
         action: str,
@@ -241,19 +714,16 @@ class ActionExecutorAgent(BaseAgent):
         context: AgentContext
     ) -> dict[str, Any]:
         """Execute tap action."""
-        point: Point | None = None
-
-        # Try to get coordinates from parameters
-        if "x" in parameters and "y" in parameters:
-            point = Point(int(parameters["x"]), int(parameters["y"]))
+        # 先尝试坐标/bounds/resource-id 等无需文本匹配的方式
+        point = self._resolve_tap_point(target, parameters, context.ui_elements)
 
         # Try to find element by target text (使用异步版本支持LLM)
-        elif target and context.ui_elements:
+        if point is None and target and context.ui_elements:
             element = await self._find_element_by_target_async(target, context.ui_elements)
             if element and element.get("center"):
                 center = element["center"]
                 point = Point(center[0], center[1])
-                print(f"[ActionExecutor] 找到元素: {element.get('text') or element.get('content_desc')}, 坐标: {center}")
+                logger.debug("[ActionExecutor] 找到元素: %s, 坐标: %s", element.get('text') or element.get('content_desc'), center)
 
         if not point:
             # 找不到目标，触发自主恢复
@@ -264,13 +734,50 @@ class ActionExecutorAgent(BaseAgent):
                 "target": target
             }
 
-        action_result = await self.device_controller.tap(point)  # type: ignore
+        action_result = await self._device_call("tap", point)
         return {
             "success": True,
             "point": {"x": point.x, "y": point.y},
             "device_result": action_result
         }
 
+    def _resolve_tap_point(
+        self,
+        target: str | None,
+        parameters: dict[str, Any],
+        ui_elements: list[dict[str, Any]] | None
+    ) -> Point | None:
+        """Resolve a tap point without text matching, if the step allows it.
+
+        Tried in order: ``x``/``y`` parameters, the center of ``bounds``
+        (``[left, top, right, bottom]``), a literal ``"x,y"`` target, then an
+        exact resource-id lookup in the snapshot.
+        """
+        if "x" in parameters and "y" in parameters:
+            return Point(int(parameters["x"]), int(parameters["y"]))
+
+        bounds = parameters.get("bounds")
+        if isinstance(bounds, dict):
+            bounds = [bounds.get(k) for k in ("left", "top", "right", "bottom")]
+        if isinstance(bounds, (list, tuple)) and len(bounds) == 4 and all(isinstance(v, (int, float)) for v in bounds):
+            left, top, right, bottom = bounds
+            return Point(int(left + right) // 2, int(top + bottom) // 2)
+
+        if not target:
+            return None
+
+        match = _COORD_TARGET_RE.match(target)
+        if match:
+            return Point(int(match.group(1)), int(match.group(2)))
+
+        if ui_elements:
+            element = self._ui_index(ui_elements).by_id.get(target)
+            if element and element.get("center"):
+                center = element["center"]
+                logger.debug("[ActionExecutor] 按 resource-id 找到元素: %s, 坐标: %s", target, center)
+                return Point(center[0], center[1])
+        return None
+
     async def _execute_swipe(
         self,
         parameters: dict[str, Any],
@@ -284,25 +791,12 @@ class ActionExecutorAgent(BaseAgent):
         direction = parameters.get("direction", "down")
         duration = parameters.get("duration_ms", 500)
 
-        center_x = width // 2
-        center_y = height // 2
-
-        if direction == "up":
-            start = Point(center_x, int(height * 0.7))
-            end = Point(center_x, int(height * 0.3))
-        elif direction == "down":
-            start = Point(center_x, int(height * 0.3))
-            end = Point(center_x, int(height * 0.7))
-        elif direction == "left":
-            start = Point(int(width * 0.8), center_y)
-            end = Point(int(width * 0.2), center_y)
-        elif direction == "right":
-            start = Point(int(width * 0.2), center_y)
-            end = Point(int(width * 0.8), center_y)
-        else:
+        endpoints = _swipe_endpoints(width, height, direction)
+        if endpoints is None:
             return {"success": False, "error": f"Unknown direction: {direction}"}
+        start, end = endpoints
 
-        action_result = await self.device_controller.swipe(start, end, duration)  # type: ignore
+        action_result = await self._device_call("swipe", start, end, duration)
         return {
             "success": True,
             "direction": direction,
@@ -316,18 +810,18 @@ class ActionExecutorAgent(BaseAgent):
         # 尝试从多个来源获取文本
         text = parameters.get("text", "") or parameters.get("content", "") or ""
         
-        print(f"[ActionExecutor] 执行输入: text='{text}', target='{target}', parameters={parameters}")
+        logger.debug("[ActionExecutor] 执行输入: text='%s', target='%s', parameters=%s", text, target, parameters)
         
         if not text:
-            print(f"[ActionExecutor] 输入失败: 没有提供文本内容")
+            logger.warning("[ActionExecutor] 输入失败: 没有提供文本内容")
             return {
                 "success": False, 
                 "error": "No text provided in parameters",
                 "needs_recovery": True  # 需要恢复，可能是计划生成问题
             }
 
-        action_result = await self.device_controller.input_text(text)  # type: ignore
-        print(f"[ActionExecutor] 输入成功: '{text}'")
+        action_result = await self._device_call("input_text", text)
+        logger.debug("[ActionExecutor] 输入成功: '%s'", text)
         return {
             "success": True,
             "text": text,
@@ -336,8 +830,6 @@ class ActionExecutorAgent(BaseAgent):
 
     async def _execute_wait(self, parameters: dict[str, Any]) -> dict[str, Any]:
         """Execute wait action."""
-        import asyncio
-
         duration_ms = parameters.get("duration_ms", 1000)
         await asyncio.sleep(duration_ms / 1000)
         return {"success": True, "waited_ms": duration_ms}
@@ -353,49 +845,19 @@ class ActionExecutorAgent(BaseAgent):
 
     async def _execute_back(self) -> dict[str, Any]:
         """Execute back button press."""
-        action_result = await self.device_controller.press_key("BACK")  # type: ignore
+        action_result = await self._device_call("press_key", "BACK")
         return {"success": True, "key": "BACK", "device_result": action_result}
 
     async def _execute_home(self) -> dict[str, Any]:
         """Execute home button press."""
-        action_result = await self.device_controller.press_key("HOME")  # type: ignore
+        action_result = await self._device_call("press_key", "HOME")
         return {"success": True, "key": "HOME", "device_result": action_result}
 
     async def _execute_press_key(self, parameters: dict[str, Any]) -> dict[str, Any]:
         """Execute key press action (ENTER, SEARCH, BACK, HOME, etc.)."""
         key = parameters.get("key", "ENTER").upper()
-        # 映射常见按键到设备支持的按键
-        key_map = {
-            # 基础导航
-            "ENTER": "ENTER",
-            "BACK": "BACK",
-            "HOME": "HOME",
-            "MENU": "MENU",
-            "RECENT": "RECENT",  # 最近任务/多任务
-            "RECENTS": "RECENT",
-            # 搜索
-            "SEARCH": "SEARCH",
-            # 音量控制
-            "VOLUME_UP": "VOLUME_UP",
-            "VOLUMEUP": "VOLUME_UP",
-            "VOLUME_DOWN": "VOLUME_DOWN",
-            "VOLUMEDOWN": "VOLUME_DOWN",
-            # 电源
-            "POWER": "POWER",
-            # 编辑
-            "TAB": "TAB",
-            "DELETE": "DEL",
-            "BACKSPACE": "DEL",
-            "DEL": "DEL",
-            # 方向键
-            "UP": "UP",
-            "DOWN": "DOWN",
-            "LEFT": "LEFT",
-            "RIGHT": "RIGHT",
-            "CENTER": "CENTER",
-        }
-        mapped_key = key_map.get(key, key)
-        action_result = await self.device_controller.press_key(mapped_key)  # type: ignore
+        mapped_key = self.KEY_MAP.get(key, key)
+        action_result = await self._device_call("press_key", mapped_key)
         return {"success": True, "key": mapped_key, "device_result": action_result}
 
     async def _find_element_by_target_async(
@@ -411,7 +873,7 @@ class ActionExecutorAgent(BaseAgent):
         
         # 精确匹配失败，使用LLM智能选择
         if self.llm_provider and ui_elements:
-            print(f"[ActionExecutor] 精确匹配失败，调用LLM智能选择元素...")
+            logger.info("[ActionExecutor] 精确匹配失败，调用LLM智能选择元素...")
             result = await self._find_element_with_llm(target, ui_elements)
             if result:
                 return result
@@ -436,49 +898,47 @@ class ActionExecutorAgent(BaseAgent):
         
         # 提取关键词（去除常见后缀如 app, icon, button 等）
         keywords = self._extract_keywords(target_lower)
-        print(f"[ActionExecutor] 查找目标: {target}, 关键词: {keywords}")
-        
-        # 过滤掉不可点击的元素和屏幕顶部的搜索框元素（y < 150 通常是状态栏/搜索框区域）
-        def is_valid_target(elem: dict) -> bool:
-            # 必须可点击
-            if not elem.get("clickable", False):
-                return False
-            # 排除搜索框区域的元素（通常在屏幕顶部）
-            center = elem.get("center", (0, 0))
-            if center[1] < 150:  # y坐标太小，可能是搜索框
-                return False
-            return True
+        logger.debug("[ActionExecutor] 查找目标: %s, 关键词: %s", target, keywords)
         
+        # 通过索引只取出可能命中的元素，避免每次重试都全量扫描
+        index = self._ui_index(ui_elements)
+        # 有效目标：可点击且不在屏幕顶部的状态栏/搜索框区域（y < 150）
+        valid_mask = index.clickable_mask(min_y=150)
+        keyword_hits = [
+            index.positions_containing(keyword)
+            for keyword in keywords if keyword and len(keyword) >= 2
+        ]
+        positions = set(index.by_exact_lower.get(target_lower, ()))
+        positions |= index.positions_containing(target_lower)
+        positions = positions.union(*keyword_hits)
+
         # 收集所有匹配的候选元素，然后选择最佳的
-        candidates: list[tuple[dict, int, str]] = []  # (element, priority, match_type)
+        candidates: list[tuple[int, int, str]] = []  # (position, priority, match_type)
 
-        for element in ui_elements:
+        for i in sorted(positions):
+            element = ui_elements[i]
             text = element.get("text", "") or ""
             content_desc = element.get("content_desc", "") or ""
-            text_lower = text.lower()
-            desc_lower = content_desc.lower()
+            text_lower = index.texts_lower[i]
+            desc_lower = index.descs_lower[i]
             
             # 精确匹配 - 最高优先级
             if text and text_lower == target_lower:
-                candidates.append((element, 1, f"精确匹配: {text}"))
+                candidates.append((i, 1, f"精确匹配: {text}"))
             elif content_desc and desc_lower == target_lower:
-                candidates.append((element, 1, f"精确匹配(desc): {content_desc}"))
+                candidates.append((i, 1, f"精确匹配(desc): {content_desc}"))
             # 目标包含在元素文本中
             elif text and target_lower in text_lower:
-                candidates.append((element, 2, f"部分匹配: {text}"))
+                candidates.append((i, 2, f"部分匹配: {text}"))
             elif content_desc and target_lower in desc_lower:
-                candidates.append((element, 2, f"部分匹配(desc): {content_desc}"))
+                candidates.append((i, 2, f"部分匹配(desc): {content_desc}"))
             # 关键词匹配 - 需要匹配多个关键词才更可靠
             else:
-                matched_keywords = []
-                for keyword in keywords:
-                    if keyword and len(keyword) >= 2:
-                        if keyword in text_lower or keyword in desc_lower:
-                            matched_keywords.append(keyword)
-                if matched_keywords:
+                matched_count = sum(1 for hits in keyword_hits if i in hits)
+                if matched_count:
                     # 匹配的关键词越多，优先级越高
-                    priority = 5 - min(len(matched_keywords), 3)  # 3个以上关键词优先级为2
-                    candidates.append((element, priority, f"关键词匹配({len(matched_keywords)}个): {text or content_desc}"))
+                    priority = 5 - min(matched_count, 3)  # 3个以上关键词优先级为2
+                    candidates.append((i, priority, f"关键词匹配({matched_count}个): {text or content_desc}"))
         
         # 按优先级排序，优先级相同时优先选择可点击且位置合理的元素
         if candidates:
@@ -486,26 +946,34 @@ class ActionExecutorAgent(BaseAgent):
             candidates.sort(key=lambda x: x[1])
             
             # 在相同优先级中，优先选择有效目标
-            for elem, priority, match_type in candidates:
-                if is_valid_target(elem):
-                    print(f"[ActionExecutor] {match_type}, 坐标: {elem.get('center')}")
+            for i, priority, match_type in candidates:
+                if valid_mask >> i & 1:
+                    elem = ui_elements[i]
+                    logger.debug("[ActionExecutor] %s, 坐标: %s", match_type, elem.get('center'))
                     return elem
             
             # 如果没有有效目标，返回第一个匹配（可能是搜索框等）
-            elem, priority, match_type = candidates[0]
-            print(f"[ActionExecutor] {match_type} (非理想目标), 坐标: {elem.get('center')}")
+            i, priority, match_type = candidates[0]
+            elem = ui_elements[i]
+            logger.debug("[ActionExecutor] %s (非理想目标), 坐标: %s", match_type, elem.get('center'))
             return elem
 
-        print(f"[ActionExecutor] 未找到匹配元素")
+        logger.info("[ActionExecutor] 未找到匹配元素")
         return None
 
+    def _ui_index(self, ui_elements: list[dict[str, Any]]) -> UIIndex:
+        """Return the index for this UI snapshot, building it on first use."""
+        cached = self._ui_index_cache
+        if cached is None or cached.elements is not ui_elements:
+            cached = self._ui_index_cache = UIIndex.build(ui_elements)
+        return cached
+
     def _extract_keywords(self, target: str) -> list[str]:
         """从目标描述中提取关键词."""
-        stop_words = ["app", "icon", "button", "the", "a", "an", "click", "tap", "open", "launch", "打开", "点击", "按钮", "图标"]
-        words = target.replace(",", " ").replace(".", " ").split()
-        keywords = [w for w in words if w not in stop_words and len(w) >= 2]
+        words = _KEYWORD_SPLIT_RE.split(target)
+        keywords = [w for w in words if len(w) >= 2 and w not in _STOP_WORD_SET]
         clean_target = "".join(target.split())
-        for sw in stop_words:
+        for sw in _STOP_WORDS:
             clean_target = clean_target.replace(sw, "")
         if clean_target and len(clean_target) >= 2:
             keywords.append(clean_target)
@@ -543,13 +1011,12 @@ class ActionExecutorAgent(BaseAgent):
                     break
             if element_type:
                 break
-        print(f"[ActionExecutor] 位置查找: position={position}, type={element_type}")
+        logger.debug("[ActionExecutor] 位置查找: position=%s, type=%s", position, element_type)
         if element_type == "视频":
-            clickable = [e for e in ui_elements if e.get("clickable") and e.get("center")]
-            clickable.sort(key=lambda e: (e.get("center", [0, 0])[1], e.get("center", [0, 0])[0]))
+            clickable = self._ui_index(ui_elements).clickable_by_position
             if position < len(clickable):
                 elem = clickable[position]
-                print(f"[ActionExecutor] 位置匹配: 第{position+1}个可点击元素")
+                logger.debug("[ActionExecutor] 位置匹配: 第%s个可点击元素", position+1)
                 return elem
         else:
             clickable = [e for e in ui_elements if e.get("clickable") and e.get("center")]
@@ -562,12 +1029,25 @@ class ActionExecutorAgent(BaseAgent):
         # 没有LLM则不进行障碍物检测
         if not self.llm_provider:
             return False
+
+        # 桌面上不会有需要处理的弹窗，无需调用LLM
+        if self._is_home_screen(ui_elements):
+            logger.debug("[ActionExecutor] 当前是桌面，跳过障碍物检测")
+            return False
+
+        # 页面结构与上次判定无障碍物时相同，直接沿用结论
+        screen_hash = hash(tuple(sorted(e.get("id") or "" for e in ui_elements)))
+        if screen_hash == self._clear_screen_hash:
+            return False
         
         # 过滤掉系统元素（如ATX悬浮窗）
         filtered_elements = self._filter_system_elements(ui_elements)
         
         # 使用LLM分析截图判断是否有障碍物
         result = await self._detect_obstacle_with_llm(filtered_elements, context)
+
+        if result and not result.get("has_obstacle"):
+            self._clear_screen_hash = screen_hash
         
         if result and result.get("has_obstacle"):
             action = result.get("action")
@@ -578,75 +1058,117 @@ class ActionExecutorAgent(BaseAgent):
                     center = elem.get("center")
                     if center:
                         point = Point(center[0], center[1])
-                        print(f"[ActionExecutor] LLM检测到障碍物，点击: {elem.get('text') or elem.get('content_desc') or f'元素{idx}'}")
+                        logger.info("[ActionExecutor] LLM检测到障碍物，点击: %s", elem.get('text') or elem.get('content_desc') or f'元素{idx}')
                         await self.device_controller.tap(point)  # type: ignore
-                        import asyncio
                         await asyncio.sleep(0.5)
                         return True
             elif action == "back":
-                print(f"[ActionExecutor] LLM建议返回关闭障碍物")
+                logger.debug("[ActionExecutor] LLM建议返回关闭障碍物")
                 await self.device_controller.press_key("BACK")  # type: ignore
-                import asyncio
                 await asyncio.sleep(0.5)
                 return True
         
         return False
     
+    @staticmethod
+    def _is_home_screen(ui_elements: list[dict[str, Any]]) -> bool:
+        """Whether the snapshot is a launcher home screen, judged by resource ids."""
+        for elem in ui_elements:
+            elem_id = elem.get("id")
+            if not elem_id:
+                continue
+            package, _, name = elem_id.partition(":")
+            if package in _LAUNCHER_PACKAGES:
+                return True
+            name = name.lower()
+            if any(hint in name for hint in _LAUNCHER_ID_HINTS):
+                return True
+        return False
+
     def _filter_system_elements(self, ui_elements: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """过滤掉系统元素（如ATX悬浮窗）。"""
-        filtered = []
-        for elem in ui_elements:
-            text = (elem.get("text", "") or "").lower()
-            desc = (elem.get("content_desc", "") or "").lower()
-            pkg = (elem.get("package", "") or "").lower()
-            combined = text + " " + desc + " " + pkg
-            
-            # 跳过系统元素
-            is_system = any(kw in combined for kw in self.ignore_elements)
-            if not is_system:
-                filtered.append(elem)
-        
-        return filtered
+        if not self.ignore_elements:
+            return list(ui_elements)
+
+        # 按列取出快照中的小写文本/描述/包名，一次扫描命中任一关键词即视为系统元素
+        index = self._ui_index(ui_elements)
+        is_system = _keyword_matcher(tuple(self.ignore_elements))
+        return [
+            elem
+            for elem, text, desc, pkg in zip(ui_elements, index.texts_lower, index.descs_lower, index.packages)
+            if not is_system(f"{text}\n{desc}\n{pkg}")
+        ]
     
+    @staticmethod
+    def _obstacle_needs_vision(ui_elements: list[dict[str, Any]]) -> bool:
+        """Whether an obstacle check needs the screenshot, not just the element list.
+
+        True when few elements carry a label (likely a full-screen image ad)
+        or when a label hints at an ad or skip/close overlay.
+        """
+        labeled = 0
+        for elem in ui_elements[:30]:
+            label = f"{elem.get('text') or ''} {elem.get('content_desc') or ''}".lower()
+            if not label.strip():
+                continue
+            labeled += 1
+            if any(hint in label for hint in _OBSTACLE_VISION_HINTS):
+                return True
+        return labeled < 5
+
     async def _detect_obstacle_with_llm(
         self,
         ui_elements: list[dict[str, Any]],
         context: AgentContext
     ) -> dict[str, Any] | None:
         """使用LLM分析当前页面是否有障碍物（广告、弹窗等）。"""
-        import json
-        
-        # 获取截图
-        screenshot_b64 = None
-        try:
-            screenshot = await self.device_controller.take_screenshot()  # type: ignore
-            if screenshot and hasattr(screenshot, 'data'):
-                import base64
-                screenshot_b64 = base64.b64encode(screenshot.data).decode('utf-8')
-        except Exception as e:
-            print(f"[ActionExecutor] 获取截图失败: {e}")
-        
-        # 构建元素列表
-        elements_info = []
+        # 只有元素列表不足以判断时才截图，截图在后台进行，同时构建元素列表
+        screenshot_task = None
+        if self._obstacle_needs_vision(ui_elements):
+            # 截图只给视觉模型看，控制器支持时使用缩略图
+            if hasattr(self.device_controller, "take_screenshot_thumbnail"):
+                shot = self.device_controller.take_screenshot_thumbnail()  # type: ignore
+            else:
+                shot = self.device_controller.take_screenshot()  # type: ignore
+            screenshot_task = asyncio.create_task(shot)
+
+        # 构建元素列表，每行: [index, text, desc, clickable]
+        rows = []
         for i, elem in enumerate(ui_elements[:30]):
-            text = elem.get("text", "") or ""
-            desc = elem.get("content_desc", "") or ""
+            text = (elem.get("text") or "")[:self.PROMPT_LABEL_MAX_CHARS]
+            desc = (elem.get("content_desc") or "")[:self.PROMPT_LABEL_MAX_CHARS]
             clickable = elem.get("clickable", False)
             if text or desc or clickable:
-                elements_info.append({
-                    "index": i,
-                    "text": text,
-                    "desc": desc,
-                    "clickable": clickable
-                })
+                rows.append([i, text, desc, int(clickable)])
+
+        # 获取截图（原始字节，编码交给 LLM provider 处理）
+        screenshot_data: bytes | None = None
+        if screenshot_task is not None:
+            try:
+                screenshot = await screenshot_task
+                data = getattr(screenshot, 'data', None)
+                if isinstance(data, dict):
+                    data = data.get("screenshot")
+                if isinstance(data, (bytes, bytearray)):
+                    screenshot_data = bytes(data)
+            except Exception as e:
+                logger.warning("[ActionExecutor] 获取截图失败: %s", e)
+
+        cache_key = self._llm_cache_key(
+            "obstacle", context.instruction, ui_elements[:30], screenshot_data
+        )
+        cached = self._llm_cache_get(cache_key)
+        if cached is not None:
+            logger.debug("[ActionExecutor] 复用障碍物检测结果: %s", cached.get('reason'))
+            return cached
         
         # 构建prompt - 更严格的障碍物判断
         prompt = f"""判断当前手机屏幕是否有**真正的弹窗**需要关闭。
 
 当前任务: {context.instruction}
 
-页面元素列表:
-{json.dumps(elements_info, ensure_ascii=False, indent=2)}
+页面元素列表（每行为 [index, text, desc, clickable]）:
+{_compact_json(rows)}
 
 **什么是需要处理的障碍物：**
 - 模态对话框（有明确的"关闭"、"取消"、"跳过"按钮）
@@ -679,72 +1201,141 @@ class ActionExecutorAgent(BaseAgent):
 
         try:
             # 如果有截图，使用多模态
-            if screenshot_b64 and hasattr(self.llm_provider, 'generate_with_image'):
-                response = await self.llm_provider.generate_with_image(prompt, screenshot_b64)
+            if screenshot_data and hasattr(self.llm_provider, 'analyze_image'):
+                response = await self.llm_provider.analyze_image(screenshot_data, prompt)
             else:
                 response = await self.llm_provider.generate(prompt)
             
             # 解析响应
-            json_str = response
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0].strip()
-            elif "```" in response:
-                json_str = response.split("```")[1].split("```")[0].strip()
-            
-            result = json.loads(json_str)
+            result = _parse_llm_json(response)
+            self._llm_cache_put(cache_key, result)
             
             if result.get("has_obstacle"):
-                print(f"[ActionExecutor] LLM检测到障碍物: {result.get('reason')}")
+                logger.info("[ActionExecutor] LLM检测到障碍物: %s", result.get('reason'))
             
             return result
             
         except Exception as e:
-            print(f"[ActionExecutor] LLM障碍物检测失败: {e}")
+            logger.warning("[ActionExecutor] LLM障碍物检测失败: %s", e)
             return None
     
+    def _pick_llm_candidates(
+        self,
+        target: str,
+        ui_elements: list[dict[str, Any]],
+        limit: int = 20
+    ) -> list[int]:
+        """Pick the element positions to show the LLM when selecting a target.
+
+        Clickable elements are preferred (labeled ones if none are
+        clickable) and ranked by how many target keywords their label
+        contains; the top ``limit`` are returned in document order so
+        positional hints such as "first" still hold.
+        """
+        positions = [i for i, e in enumerate(ui_elements) if e.get("clickable")]
+        if not positions:
+            positions = [i for i, e in enumerate(ui_elements) if e.get("text") or e.get("content_desc")]
+        if len(positions) <= limit:
+            return positions
+
+        keywords = self._extract_keywords(target.lower())
+        index = self._ui_index(ui_elements)
+        texts, descs = index.texts_lower, index.descs_lower
+
+        def score(i: int) -> int:
+            return sum(1 for kw in keywords if kw in texts[i] or kw in descs[i])
+
+        ranked = sorted(positions, key=score, reverse=True)[:limit]
+        return sorted(ranked)
+
+    def _llm_cache_key(
+        self,
+        kind: str,
+        query: str,
+        ui_elements: list[dict[str, Any]],
+        screenshot: bytes | None = None
+    ) -> bytes:
+        """Build an LLM decision cache key from the screen and query.
+
+        Elements are fingerprinted by text, content_desc and center, and the
+        screenshot (if any) is hashed with BLAKE2b.
+        """
+        fingerprints = tuple(
+            (e.get("text"), e.get("content_desc"), tuple(e.get("center") or ()))
+            for e in ui_elements
+        )
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{kind}\0{query}\0{fingerprints!r}".encode("utf-8"))
+        if screenshot:
+            h.update(hashlib.blake2b(screenshot, digest_size=16).digest())
+        return h.digest()
+
+    def _llm_cache_get(self, key: bytes) -> dict[str, Any] | None:
+        """Look up a cached LLM decision, marking it recently used."""
+        result = self._llm_cache.get(key)
+        if result is not None:
+            self._llm_cache.move_to_end(key)
+        return result
+
+    def _llm_cache_put(self, key: bytes, result: dict[str, Any]) -> None:
+        """Store a parsed LLM decision, evicting the least recently used."""
+        self._llm_cache[key] = result
+        self._llm_cache.move_to_end(key)
+        if len(self._llm_cache) > self.LLM_CACHE_SIZE:
+            self._llm_cache.popitem(last=False)
+
     async def _find_element_with_llm(
         self,
         target: str,
         ui_elements: list[dict[str, Any]]
     ) -> dict[str, Any] | None:
         """使用LLM智能选择最匹配的元素."""
-        import json
-        
-        # 构建元素列表描述
-        elements_info = []
-        for i, elem in enumerate(ui_elements[:50]):  # 限制50个元素
-            text = elem.get("text", "") or ""
-            desc = elem.get("content_desc", "") or ""
-            class_name = elem.get("class_name", "") or ""
-            clickable = elem.get("clickable", False)
-            bounds = elem.get("bounds", {})
-            center = elem.get("center", [0, 0])
-            
-            if text or desc or clickable:
-                elements_info.append({
-                    "index": i,
-                    "text": text,
-                    "content_desc": desc,
-                    "class": class_name.split(".")[-1] if class_name else "",
-                    "clickable": clickable,
-                    "position": {"x": center[0], "y": center[1]} if center else None
-                })
-        
-        if not elements_info:
+        picked = self._pick_llm_candidates(target, ui_elements)
+        if not picked:
+            return None
+
+        # 构建元素列表，每行: [index, text, desc, class序号, x, y]
+        classes: list[str] = []
+        class_codes: dict[str, int] = {}
+        rows = []
+        for i in picked:
+            elem = ui_elements[i]
+            class_name = (elem.get("class_name", "") or "").split(".")[-1]
+            code = class_codes.get(class_name)
+            if code is None:
+                code = class_codes[class_name] = len(classes)
+                classes.append(class_name)
+            center = elem.get("center") or (0, 0)
+            rows.append([
+                i,
+                (elem.get("text") or "")[:self.PROMPT_LABEL_MAX_CHARS],
+                (elem.get("content_desc") or "")[:self.PROMPT_LABEL_MAX_CHARS],
+                code,
+                center[0],
+                center[1]
+            ])
+
+        cache_key = self._llm_cache_key("element", f"{target}\0{picked}", [ui_elements[i] for i in picked])
+        cached = self._llm_cache_get(cache_key)
+        if cached is not None:
+            selected_index = cached.get("selected_index", -1)
+            logger.debug("[ActionExecutor] 复用LLM选择: index=%s", selected_index)
+            if selected_index >= 0 and selected_index < len(ui_elements):
+                return ui_elements[selected_index]
             return None
         
         prompt = f"""你是一个UI元素选择助手。用户想要点击"{target}"。
 
-当前页面的UI元素列表如下（JSON格式）：
-{json.dumps(elements_info, ensure_ascii=False, indent=2)}
+当前页面的可点击元素如下，每行为 [index, text, desc, class序号, x, y]，class序号对应 classes 列表：
+classes: {_compact_json(classes)}
+elements: {_compact_json(rows)}
 
 请分析这些元素，找出最符合用户意图"{target}"的元素。
 
 规则：
 1. "第一个视频"通常指页面上第一个视频内容区域，可能是一个可点击的卡片或图片
 2. 视频元素通常有封面图、标题、播放量等特征
-3. 优先选择clickable=true的元素
-4. 考虑元素的位置（y坐标较小的在上方）
+3. 考虑元素的位置（y坐标较小的在上方）
 
 请只返回一个JSON对象，格式为：
 {{"selected_index": <元素的index>, "reason": "<选择原因>"}}
@@ -754,26 +1345,22 @@ class ActionExecutorAgent(BaseAgent):
 
         try:
             response = await self.llm_provider.generate(prompt)
-            print(f"[ActionExecutor] LLM选择响应: {response[:200]}")
+            logger.debug("[ActionExecutor] LLM选择响应: %s", response[:200])
             
             # 解析JSON
-            json_str = response
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0].strip()
-            elif "```" in response:
-                json_str = response.split("```")[1].split("```")[0].strip()
-            
-            result = json.loads(json_str)
-            selected_index = result.get("selected_index", -1)
+            result = _parse_llm_json(response)
+            # 模型可能把编号写成字符串，缓存前统一为 int，无法转换的不缓存
+            selected_index = int(result.get("selected_index", -1))
             reason = result.get("reason", "")
+            self._llm_cache_put(cache_key, {"selected_index": selected_index, "reason": reason})
             
-            print(f"[ActionExecutor] LLM选择: index={selected_index}, reason={reason}")
+            logger.debug("[ActionExecutor] LLM选择: index=%s, reason=%s", selected_index, reason)
             
             if selected_index >= 0 and selected_index < len(ui_elements):
                 return ui_elements[selected_index]
             
         except Exception as e:
-            print(f"[ActionExecutor] LLM选择失败: {e}")
+            logger.warning("[ActionExecutor] LLM选择失败: %s", e)
         
         return None
 
@@ -796,42 +1383,212 @@ class ActionExecutorAgent(BaseAgent):
         4. 点击替代元素 - 可能有相似的可点击项
         5. 等待重试 - 页面可能还在加载
         6. LLM智能决策 - 让AI分析情况并决定
+
+        每个步骤的恢复进度记录在 ``_recovery_fsm`` 中，再次进入时
+        从上次的状态继续，已尝试过的策略不会重复执行。
         """
-        import asyncio
-        
-        print(f"[Recovery] 开始自主恢复，失败动作: {failed_action}, 目标: {failed_target}")
-        
-        # 记录恢复尝试
-        recovery_attempt = {
-            "failed_action": failed_action,
-            "failed_target": failed_target,
-            "attempts": []
-        }
-        
-        # 获取当前恢复尝试次数
-        current_attempts = len([h for h in self.recovery_history 
-                               if h.get("failed_target") == failed_target])
-        
-        if current_attempts >= self.max_recovery_attempts:
-            print(f"[Recovery] 已达到最大恢复尝试次数 ({self.max_recovery_attempts})")
+        logger.info("[Recovery] 开始自主恢复，失败动作: %s, 目标: %s", failed_action, failed_target)
+
+        key = self._recovery_key(context.current_step, failed_action, failed_target)
+        record = self._recovery_fsm.get(key)
+        if record is None:
+            record = self._recovery_fsm[key] = RecoveryRecord()
+            # 只保留最近的步骤，最早的记录按插入顺序淘汰
+            if len(self._recovery_fsm) > self.RECOVERY_HISTORY_STEPS:
+                del self._recovery_fsm[next(iter(self._recovery_fsm))]
+
+        if record.state is RecoveryState.EXHAUSTED or record.attempts >= self.max_recovery_attempts:
+            record.state = RecoveryState.EXHAUSTED
+            logger.warning("[Recovery] 已达到最大恢复尝试次数 (%s)", self.max_recovery_attempts)
             return {"recovered": False, "reason": "Max recovery attempts reached"}
-        
-        # 如果有LLM，让LLM决定恢复策略
+
+        if record.elapsed > self.RECOVERY_BUDGET_S:
+            record.state = RecoveryState.EXHAUSTED
+            logger.warning("[Recovery] 恢复耗时超过 %ss，停止恢复", self.RECOVERY_BUDGET_S)
+            return {"recovered": False, "reason": "Recovery time budget exceeded"}
+
+        # 退避等待、缓存查找和构建提示词期间预热LLM连接，不等待其完成
+        warmup = getattr(self.llm_provider, "warmup", None)
+        if warmup is not None and (self._llm_warmup is None or self._llm_warmup.done()):
+            self._llm_warmup = asyncio.create_task(warmup())
+
+        started = time.monotonic()
+        try:
+            # 重复进入时指数退避，避免在慢页面上来回抖动
+            if record.attempts:
+                await asyncio.sleep(min(0.1 * 2 ** record.attempts, 2.0))
+            return await self._recover_step(record, failed_action, failed_target, context, step)
+        finally:
+            record.elapsed += time.monotonic() - started
+
+    async def _recover_step(
+        self,
+        record: RecoveryRecord,
+        failed_action: str,
+        failed_target: str | None,
+        context: AgentContext,
+        step: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Advance the step's recovery by one strategy."""
+        # 如果有LLM，按LLM给出的候选策略依次尝试：
+        # 先用上次决策剩下的候选，其次复用相同页面上成功过的决策，最后才请求LLM
         if self.llm_provider:
-            result = await self._llm_decide_recovery(
-                failed_action, failed_target, context, step, current_attempts
-            )
-            if result.get("recovered"):
-                self.recovery_history.append(recovery_attempt)
-                return result
-        
-        # 没有LLM时使用规则恢复
-        result = await self._rule_based_recovery(
-            failed_action, failed_target, context, current_attempts
+            cache_key = self._recovery_cache_key(failed_action, failed_target, context.ui_elements)
+            candidates = [
+                c for c in record.pending
+                if c[0] != "tap_element" or record.pending_screen == cache_key
+            ]
+            record.pending = []
+            shape = self._screen_shape(context.ui_elements)
+            if not candidates:
+                cached = self._recovery_cache_get(cache_key, record)
+                remembered = self._screen_memory_get(shape, record)
+                if cached is not None:
+                    logger.info("[Recovery] 复用恢复决策: %s", cached[0])
+                    candidates = [cached]
+                elif remembered is not None:
+                    logger.info("[Recovery] 同类页面上常用的恢复策略: %s", remembered)
+                    candidates = [(remembered, None)]
+                else:
+                    candidates = await self._llm_decide_recovery(
+                        failed_action, failed_target, context, step, record
+                    ) or []
+
+            for i, (strategy, element_index) in enumerate(candidates):
+                if strategy == "give_up":
+                    record.state = RecoveryState.EXHAUSTED
+                    logger.info("[Recovery] 放弃恢复")
+                    return {"recovered": False, "reason": "LLM decided to give up"}
+                if strategy in record.tried and strategy not in self.REPEATABLE_STRATEGIES:
+                    logger.info("[Recovery] 策略 %s 已尝试过，跳过", strategy)
+                    continue
+                result = await self._run_recovery_strategy(
+                    record, strategy, element_index, context, failed_target, RecoveryState.LLM_DECIDED
+                )
+                if result.get("recovered"):
+                    record.last_decision = (cache_key, (strategy, element_index))
+                    record.last_shape = shape
+                    # 剩下的候选留到下次进入时使用，无需再次请求LLM
+                    record.pending = candidates[i + 1:]
+                    record.pending_screen = cache_key
+                    return result
+
+        # 没有LLM或LLM策略无效时使用规则恢复
+        strategy = self._rule_based_recovery(record)
+        if strategy is None:
+            record.state = RecoveryState.EXHAUSTED
+            return {"recovered": False, "reason": "All strategies exhausted"}
+
+        logger.info("[Recovery] 规则恢复，尝试策略: %s", strategy)
+        record.last_decision = None
+        return await self._run_recovery_strategy(record, strategy, None, context, failed_target)
+
+    @classmethod
+    def _recovery_cache_key(
+        cls,
+        failed_action: str,
+        failed_target: str | None,
+        ui_elements: list[dict[str, Any]] | None
+    ) -> bytes:
+        """Build a recovery decision cache key from the failure and screen labels.
+
+        Only the labels of the elements shown to the LLM are hashed, so the
+        key survives small layout shifts while element indices stay valid.
+        """
+        labels = tuple(
+            (e.get("text") or "", e.get("content_desc") or "")
+            for e in itertools.islice(ui_elements or (), cls.RECOVERY_PROMPT_ELEMENTS)
         )
-        
-        self.recovery_history.append(recovery_attempt)
-        return result
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{failed_action}\0{failed_target}\0{labels!r}".encode("utf-8"))
+        return h.digest()
+
+    def _recovery_cache_get(self, key: bytes, record: RecoveryRecord) -> tuple[str, int | None] | None:
+        """Look up a cached recovery decision that is fresh and still applicable."""
+        entry = self._recovery_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, decision = entry
+        if time.monotonic() - stored_at > self.RECOVERY_CACHE_TTL_S:
+            del self._recovery_cache[key]
+            return None
+        if decision[0] in record.tried and decision[0] not in self.REPEATABLE_STRATEGIES:
+            return None
+        self._recovery_cache.move_to_end(key)
+        return decision
+
+    def _recovery_cache_put(self, key: bytes, decision: tuple[str, int | None]) -> None:
+        """Store a recovery decision after the retried step succeeded, evicting the least recently used."""
+        self._recovery_cache[key] = (time.monotonic(), decision)
+        self._recovery_cache.move_to_end(key)
+        if len(self._recovery_cache) > self.RECOVERY_CACHE_SIZE:
+            self._recovery_cache.popitem(last=False)
+
+    @staticmethod
+    def _screen_shape(ui_elements: list[dict[str, Any]] | None) -> frozenset[tuple[str, int]]:
+        """Structural fingerprint of a screen: short class names and their counts."""
+        counts = Counter(
+            (e.get("class_name") or "").rpartition(".")[2] for e in (ui_elements or [])
+        )
+        return frozenset(counts.items())
+
+    def _screen_memory_get(self, shape: frozenset[tuple[str, int]], record: RecoveryRecord) -> str | None:
+        """Strategy that most often resolved failures on this screen shape.
+
+        Only returned once it has worked ``SCREEN_MEMORY_MIN_HITS`` times
+        and has not been tried for the current step yet.
+        """
+        wins = self._screen_memory.get(shape)
+        if not wins:
+            return None
+        self._screen_memory.move_to_end(shape)
+        for strategy, count in wins.most_common():
+            if count < self.SCREEN_MEMORY_MIN_HITS:
+                return None
+            if strategy not in record.tried:
+                return strategy
+        return None
+
+    def _screen_memory_put(self, shape: frozenset[tuple[str, int]], strategy: str) -> None:
+        """Count a strategy that fixed a step on a screen shape.
+
+        Called only once the retried step has succeeded. ``tap_element``
+        is not recorded since its element index is specific to one page.
+        """
+        if strategy == "tap_element" or not shape:
+            return
+        wins = self._screen_memory.get(shape)
+        if wins is None:
+            wins = self._screen_memory[shape] = Counter()
+            if len(self._screen_memory) > self.SCREEN_MEMORY_SIZE:
+                self._screen_memory.popitem(last=False)
+        self._screen_memory.move_to_end(shape)
+        wins[strategy] += 1
+
+    @staticmethod
+    def _recovery_key(step_index: int, action: str, target: str | None) -> tuple[int, str]:
+        """Key of a step in the recovery state machine."""
+        return step_index, f"{action}\0{target}"
+
+    async def _run_recovery_strategy(
+        self,
+        record: RecoveryRecord,
+        strategy: str,
+        element_index: int | None,
+        context: AgentContext,
+        original_target: str | None,
+        state: RecoveryState | None = None
+    ) -> dict[str, Any]:
+        """Record a strategy as attempted, then execute it.
+
+        The record is updated before the device action so that a re-entry
+        after a timeout or crash does not repeat the strategy.
+        """
+        record.tried.add(strategy)
+        record.attempts += 1
+        record.state = state or self.STRATEGY_STATES.get(strategy, record.state)
+        self.recovery_history.append({"strategy": strategy, "target": original_target, "state": record.state.value})
+        return await self._execute_recovery_strategy(strategy, element_index, context, original_target)
 
     async def _llm_decide_recovery(
         self,
@@ -839,120 +1596,90 @@ class ActionExecutorAgent(BaseAgent):
         failed_target: str | None,
         context: AgentContext,
         step: dict[str, Any],
-        attempt_count: int
-    ) -> dict[str, Any]:
-        """让LLM分析当前情况并决定恢复策略。"""
-        import json
-        
-        # 构建当前页面元素信息
-        elements_info = []
-        if context.ui_elements:
-            for i, elem in enumerate(context.ui_elements[:40]):
-                text = elem.get("text", "") or ""
-                desc = elem.get("content_desc", "") or ""
-                clickable = elem.get("clickable", False)
-                center = elem.get("center", [0, 0])
-                class_name = (elem.get("class_name", "") or "").split(".")[-1]
-                
-                if text or desc or clickable:
-                    elements_info.append({
-                        "index": i,
-                        "text": text,
-                        "desc": desc,
-                        "class": class_name,
-                        "clickable": clickable,
-                        "y": center[1] if center else 0
-                    })
-        
-        prompt = f"""你是一个移动应用自动化助手。当前执行遇到了问题，需要你决定如何恢复。
+        record: RecoveryRecord
+    ) -> list[tuple[str, int | None]] | None:
+        """让LLM分析当前情况并给出按优先级排序的候选恢复策略 [(策略, 元素索引)]，失败时返回 None。"""
+        elements_info = list(self._iter_recovery_elements(context.ui_elements))
 
-## 失败信息
+        # 只有失败信息和页面元素是可变部分，放在固定前缀之后
+        prompt = f"""## 失败信息
 - 失败动作: {failed_action}
 - 目标元素: {failed_target}
-- 已尝试恢复次数: {attempt_count}
+- 已尝试恢复次数: {record.attempts}
+- 已尝试过的策略（不要重复）: {", ".join(sorted(record.tried)) or "无"}
 - 原始步骤描述: {step.get('description', '')}
 
 ## 当前页面元素
-{json.dumps(elements_info, ensure_ascii=False, indent=2)}
-
-## 可选恢复策略
-1. scroll_down - 向下滚动（目标可能在下方）
-2. scroll_up - 向上滚动（目标可能在上方）
-3. swipe_left - 向左滑动（可能需要切换tab或页面）
-4. swipe_right - 向右滑动
-5. go_back - 返回上一页（可能进入了错误页面）
-6. close_popup - 关闭弹窗（如果有遮挡）
-7. tap_element - 点击一个替代元素（指定index）
-8. wait - 等待页面加载
-9. give_up - 放弃恢复
-
-## 分析要求
-1. 分析当前页面元素，判断目标"{failed_target}"是否可能存在
-2. 如果页面上有相似或相关的元素，可以选择点击它
-3. 如果目标可能在屏幕外，选择滚动
-4. 如果页面看起来不对，选择返回
-5. 如果有弹窗遮挡，选择关闭
-
-请返回JSON格式：
-{{
-    "strategy": "策略名称",
-    "element_index": 如果是tap_element则填写元素index否则为null,
-    "reason": "选择这个策略的原因",
-    "confidence": 0.0-1.0
-}}"""
+{_compact_json(elements_info)}"""
 
         try:
-            response = await self.llm_provider.generate(prompt)
-            print(f"[Recovery] LLM决策响应: {response[:300]}")
-            
-            json_str = response
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0].strip()
-            elif "```" in response:
-                json_str = response.split("```")[1].split("```")[0].strip()
+            for attempt in range(self.RECOVERY_LLM_ATTEMPTS):
+                try:
+                    response = await self.llm_provider.generate(prompt, system_prompt=_RECOVERY_PROMPT_PREFIX)
+                    break
+                except Exception as e:
+                    if attempt + 1 >= self.RECOVERY_LLM_ATTEMPTS or not self._is_transient_llm_error(e):
+                        raise
+                    # 全抖动退避，避免多个任务同时重试压垮服务端
+                    delay = random.uniform(0, min(0.5 * 2 ** attempt, 4.0))
+                    logger.info("[Recovery] LLM请求失败 (%s)，%.1f秒后重试", e, delay)
+                    await asyncio.sleep(delay)
+            logger.debug("[Recovery] LLM决策响应: %s", response[:300])
             
-            decision = json.loads(json_str)
-            strategy = decision.get("strategy", "give_up")
-            element_index = decision.get("element_index")
+            decision = _parse_llm_json(response)
+            # 兼容只返回单个策略的旧格式
+            options = decision.get("strategies") or [decision]
+            candidates = [
+                (option.get("strategy", "give_up"), option.get("element_index"))
+                for option in options[:self.RECOVERY_CANDIDATES]
+            ]
             reason = decision.get("reason", "")
             
-            print(f"[Recovery] LLM决策: {strategy}, 原因: {reason}")
-            
-            # 执行恢复策略
-            return await self._execute_recovery_strategy(
-                strategy, element_index, context, failed_target
-            )
+            logger.info("[Recovery] LLM决策: %s, 原因: %s", [c[0] for c in candidates], reason)
+            return candidates
             
         except Exception as e:
-            print(f"[Recovery] LLM决策失败: {e}")
+            logger.warning("[Recovery] LLM决策失败: %s", e)
             # 回退到规则恢复
-            return await self._rule_based_recovery(
-                failed_action, failed_target, context, attempt_count
-            )
+            return None
 
-    async def _rule_based_recovery(
-        self,
-        failed_action: str,
-        failed_target: str | None,
-        context: AgentContext,
-        attempt_count: int
-    ) -> dict[str, Any]:
-        """基于规则的恢复策略（无LLM时使用）。"""
-        
-        # 根据尝试次数选择不同策略
-        strategies_order = [
-            "scroll_down",   # 第1次：向下滚动
-            "scroll_up",     # 第2次：向上滚动
-            "go_back",       # 第3次：返回
-        ]
-        
-        if attempt_count < len(strategies_order):
-            strategy = strategies_order[attempt_count]
-        else:
-            return {"recovered": False, "reason": "All strategies exhausted"}
-        
-        print(f"[Recovery] 规则恢复，尝试策略: {strategy}")
-        return await self._execute_recovery_strategy(strategy, None, context, failed_target)
+    def _iter_recovery_elements(self, ui_elements: list[dict[str, Any]] | None) -> Iterator[dict[str, Any]]:
+        """Yield the compact element rows listed in the recovery prompt."""
+        max_chars = self.PROMPT_LABEL_MAX_CHARS
+        for i, elem in enumerate(itertools.islice(ui_elements or (), self.RECOVERY_PROMPT_ELEMENTS)):
+            # 截断过长的文本，减少提示词 token
+            text = (elem.get("text") or "")[:max_chars]
+            desc = (elem.get("content_desc") or "")[:max_chars]
+            clickable = elem.get("clickable", False)
+            if text or desc or clickable:
+                center = elem.get("center")
+                yield {
+                    "index": i,
+                    "text": text,
+                    "desc": desc,
+                    "class": (elem.get("class_name") or "").rpartition(".")[2],
+                    "clickable": clickable,
+                    "y": center[1] if center else 0
+                }
+
+    @staticmethod
+    def _is_transient_llm_error(error: Exception) -> bool:
+        """Whether an LLM call failure is worth retrying (timeouts, 429 and 5xx)."""
+        if isinstance(error, (TimeoutError, ConnectionError)):
+            return True
+        status = getattr(error, "status_code", None)
+        if status is not None:
+            return status == 429 or status >= 500
+        # SDK 的连接/超时异常没有状态码，按类名识别
+        name = type(error).__name__
+        return "Timeout" in name or "Connection" in name
+
+    def _rule_based_recovery(self, record: RecoveryRecord) -> str | None:
+        """基于规则选择下一个未尝试过的恢复策略（无LLM或LLM无效时使用）。"""
+        for strategy in self.RULE_STRATEGIES:
+            if strategy not in record.tried:
+                return strategy
+        return None
 
     async def _execute_recovery_strategy(
         self,
@@ -962,61 +1689,36 @@ class ActionExecutorAgent(BaseAgent):
         original_target: str | None
     ) -> dict[str, Any]:
         """执行具体的恢复策略。"""
-        import asyncio
-        
         screen_info = context.screen_info or {}
         width = screen_info.get("width", 1080)
         height = screen_info.get("height", 1920)
         
         try:
-            if strategy == "scroll_down":
-                print("[Recovery] 执行: 向下滚动")
-                start = Point(width // 2, int(height * 0.7))
-                end = Point(width // 2, int(height * 0.3))
-                await self.device_controller.swipe(start, end, 500)  # type: ignore
-                await asyncio.sleep(0.5)
-                return {"recovered": True, "action_taken": "scroll_down"}
-                
-            elif strategy == "scroll_up":
-                print("[Recovery] 执行: 向上滚动")
-                start = Point(width // 2, int(height * 0.3))
-                end = Point(width // 2, int(height * 0.7))
-                await self.device_controller.swipe(start, end, 500)  # type: ignore
-                await asyncio.sleep(0.5)
-                return {"recovered": True, "action_taken": "scroll_up"}
-                
-            elif strategy == "swipe_left":
-                print("[Recovery] 执行: 向左滑动")
-                start = Point(int(width * 0.8), height // 2)
-                end = Point(int(width * 0.2), height // 2)
-                await self.device_controller.swipe(start, end, 300)  # type: ignore
-                await asyncio.sleep(0.5)
-                return {"recovered": True, "action_taken": "swipe_left"}
-                
-            elif strategy == "swipe_right":
-                print("[Recovery] 执行: 向右滑动")
-                start = Point(int(width * 0.2), height // 2)
-                end = Point(int(width * 0.8), height // 2)
-                await self.device_controller.swipe(start, end, 300)  # type: ignore
+            swipe = self.RECOVERY_SWIPES.get(strategy)
+            if swipe is not None:
+                direction, duration_ms, label = swipe
+                logger.info("[Recovery] 执行: %s", label)
+                start, end = _swipe_endpoints(width, height, direction)
+                await self.device_controller.swipe(start, end, duration_ms)  # type: ignore
                 await asyncio.sleep(0.5)
-                return {"recovered": True, "action_taken": "swipe_right"}
+                return {"recovered": True, "action_taken": strategy}
                 
             elif strategy == "go_back":
-                print("[Recovery] 执行: 返回上一页")
+                logger.info("[Recovery] 执行: 返回上一页")
                 await self.device_controller.press_key("BACK")  # type: ignore
                 await asyncio.sleep(0.5)
                 return {"recovered": True, "action_taken": "go_back"}
                 
             elif strategy == "close_popup":
-                print("[Recovery] 执行: 尝试关闭弹窗")
+                logger.info("[Recovery] 执行: 尝试关闭弹窗")
                 if context.ui_elements:
-                    handled = await self._handle_obstacles(context.ui_elements)
+                    handled = await self._handle_obstacles(context.ui_elements, context)
                     if handled:
                         return {"recovered": True, "action_taken": "close_popup"}
                 return {"recovered": False, "reason": "No popup found to close"}
                 
             elif strategy == "tap_element" and element_index is not None:
-                print(f"[Recovery] 执行: 点击替代元素 index={element_index}")
+                logger.info("[Recovery] 执行: 点击替代元素 index=%s", element_index)
                 if context.ui_elements and element_index < len(context.ui_elements):
                     elem = context.ui_elements[element_index]
                     if elem.get("center"):
@@ -1031,22 +1733,23 @@ class ActionExecutorAgent(BaseAgent):
                 return {"recovered": False, "reason": "Invalid element index"}
                 
             elif strategy == "wait":
-                print("[Recovery] 执行: 等待页面加载")
+                logger.info("[Recovery] 执行: 等待页面加载")
                 await asyncio.sleep(2)
                 return {"recovered": True, "action_taken": "wait"}
                 
             elif strategy == "give_up":
-                print("[Recovery] 放弃恢复")
+                logger.info("[Recovery] 放弃恢复")
                 return {"recovered": False, "reason": "LLM decided to give up"}
                 
             else:
-                print(f"[Recovery] 未知策略: {strategy}")
+                logger.warning("[Recovery] 未知策略: %s", strategy)
                 return {"recovered": False, "reason": f"Unknown strategy: {strategy}"}
                 
         except Exception as e:
-            print(f"[Recovery] 执行恢复策略失败: {e}")
+            logger.warning("[Recovery] 执行恢复策略失败: %s", e)
             return {"recovered": False, "reason": str(e)}
 
     def clear_recovery_history(self):
         """清除恢复历史（新任务开始时调用）。"""
         self.recovery_history.clear()
+        self._recovery_fsm.clear()
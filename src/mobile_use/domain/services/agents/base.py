@@ -1,10 +1,12 @@
 """Base agent interface and common types."""
 
+import time
 from abc import ABC, abstractmethod
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any
+from typing import Any, ClassVar
 
 
 class AgentStatus(Enum):
@@ -15,7 +17,7 @@ class AgentStatus(Enum):
     FAILED = "failed"
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentContext:
     """Context passed between agents during task execution.
 
@@ -30,17 +32,24 @@ class AgentContext:
     ui_elements: list[dict[str, Any]] = field(default_factory=list)
     current_step: int = 0
     total_steps: int = 0
-    history: list[dict[str, Any]] = field(default_factory=list)
+    history: deque[dict[str, Any]] = field(default_factory=lambda: deque(maxlen=AgentContext.HISTORY_SIZE))
     metadata: dict[str, Any] = field(default_factory=dict)
     created_at: datetime = field(default_factory=datetime.now)
 
+    # Number of most recent actions kept in history
+    HISTORY_SIZE: ClassVar[int] = 100
+
     def add_history(self, action: str, result: dict[str, Any]) -> None:
-        """Add an action to the history."""
+        """Add an action to the history.
+
+        The entry records a monotonic ``t_ns`` timestamp
+        (``time.perf_counter_ns()``), suitable for measuring intervals.
+        """
         self.history.append({
             "step": self.current_step,
             "action": action,
             "result": result,
-            "timestamp": datetime.now().isoformat()
+            "t_ns": time.perf_counter_ns()
         })
 
     def get_last_action(self) -> dict[str, Any] | None:
@@ -48,7 +57,7 @@ class AgentContext:
         return self.history[-1] if self.history else None
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentResult:
     """Result returned by an agent after execution.
 
@@ -139,12 +148,12 @@ class BaseAgent(ABC):
         This is the main entry point for running an agent. It handles
         the execution lifecycle including pre/post hooks and error handling.
         """
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         try:
             await self.pre_execute(context)
             result = await self.execute(context)
             await self.post_execute(context, result)
-            result.duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
+            result.duration_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             return result
         except Exception as e:
             self.status = AgentStatus.FAILED
@@ -1,6 +1,9 @@
 """Context Analyzer Agent - Analyzes screen state and UI elements."""
 
+import json
+import re
 from dataclasses import dataclass, field
+from itertools import chain
 from typing import Any, Protocol
 
 from mobile_use.domain.services.agents.base import (
@@ -9,6 +12,9 @@ from mobile_use.domain.services.agents.base import (
     BaseAgent,
 )
 
+# Class names that indicate an on-screen keyboard (group 1) or a dialog (group 2)
+_KB_DIALOG_RE = re.compile(r"(keyboard)|(dialog)", re.IGNORECASE)
+
 
 class VisionProvider(Protocol):
     """Protocol for vision/image analysis providers."""
@@ -17,7 +23,7 @@ class VisionProvider(Protocol):
         ...
 
 
-@dataclass
+@dataclass(slots=True)
 class UIElementInfo:
     """Information about a UI element."""
     id: str | None = None
@@ -49,7 +55,7 @@ class UIElementInfo:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class ScreenAnalysis:
     """Complete screen analysis result."""
     app_name: str | None = None
@@ -62,14 +68,43 @@ class ScreenAnalysis:
     has_keyboard: bool = False
     has_dialog: bool = False
     confidence: float = 1.0
+    # Lowercased label index, invalidated when elements is replaced or resized
+    _text_index: dict[str, UIElementInfo] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _labels_lower: list[tuple[str, str, UIElementInfo]] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    _indexed_key: tuple[int, int] | None = field(default=None, init=False, repr=False, compare=False)
+
+    def _ensure_text_index(self) -> None:
+        """Build the lowercased label index, rebuilding if elements changed."""
+        key = (id(self.elements), len(self.elements))
+        if key == self._indexed_key:
+            return
+        self._indexed_key = key
+        self._text_index = {}
+        self._labels_lower = []
+        for element in self.elements:
+            text = element.text.lower() if element.text else ""
+            desc = element.content_desc.lower() if element.content_desc else ""
+            if text:
+                self._text_index.setdefault(text, element)
+            if desc:
+                self._text_index.setdefault(desc, element)
+            self._labels_lower.append((text, desc, element))
 
     def find_element_by_text(self, text: str) -> UIElementInfo | None:
-        """Find element by text content."""
+        """Find element by text content.
+
+        An exact (case-insensitive) text or description match is returned
+        first; otherwise the first element containing ``text``.
+        """
+        self._ensure_text_index()
         text_lower = text.lower()
-        for element in self.elements:
-            if element.text and text_lower in element.text.lower():
-                return element
-            if element.content_desc and text_lower in element.content_desc.lower():
+        exact = self._text_index.get(text_lower)
+        if exact is not None:
+            return exact
+        for elem_text, elem_desc, element in self._labels_lower:
+            if text_lower in elem_text or text_lower in elem_desc:
                 return element
         return None
 
@@ -85,6 +120,9 @@ class ContextAnalyzerAgent(BaseAgent):
     and provides contextual information for decision making.
     """
 
+    # Vision results below this confidence (e.g. the parse-failure fallback) are not merged
+    VISION_MIN_CONFIDENCE = 0.5
+
     def __init__(self, vision_provider: VisionProvider | None = None):
         super().__init__(
             name="ContextAnalyzer",
@@ -113,13 +151,20 @@ class ContextAnalyzerAgent(BaseAgent):
                 context.screenshot,
                 context.instruction
             )
-            analysis = self._merge_analysis(analysis, vision_analysis)
+            if vision_analysis.confidence >= self.VISION_MIN_CONFIDENCE:
+                analysis = self._merge_analysis(analysis, vision_analysis)
+            else:
+                analysis.has_keyboard = analysis.has_keyboard or vision_analysis.has_keyboard
+                analysis.has_dialog = analysis.has_dialog or vision_analysis.has_dialog
 
         # Extract screen info
         if context.screen_info:
             analysis.app_name = context.screen_info.get("app_name")
             analysis.activity_name = context.screen_info.get("activity_name")
 
+        # Interactive elements are usually among the first 50; export each element once
+        exported = {id(e): e.to_dict() for e in analysis.elements[:50]}
+
         return AgentResult.success_result(
             message=f"Analyzed screen with {len(analysis.elements)} elements",
             data={
@@ -134,9 +179,9 @@ class ContextAnalyzerAgent(BaseAgent):
                     "has_dialog": analysis.has_dialog,
                     "confidence": analysis.confidence
                 },
-                "elements": [e.to_dict() for e in analysis.elements[:50]],
+                "elements": list(exported.values()),
                 "interactive_elements": [
-                    e.to_dict() for e in analysis.interactive_elements[:20]
+                    exported.get(id(e)) or e.to_dict() for e in analysis.interactive_elements[:20]
                 ]
             },
             confidence=analysis.confidence
@@ -145,36 +190,47 @@ class ContextAnalyzerAgent(BaseAgent):
     def _analyze_ui_hierarchy(self, ui_elements: list[dict[str, Any]]) -> ScreenAnalysis:
         """Analyze UI hierarchy from device."""
         analysis = ScreenAnalysis()
+        elements = analysis.elements
+        text_content = analysis.text_content
+        interactive = analysis.interactive_elements
+        has_keyboard = has_dialog = False
 
         for elem_data in ui_elements:
+            get = elem_data.get
+            text = get("text")
+            class_name = get("class_name")
+            clickable = get("clickable", False)
+            enabled = get("enabled", True)
             element = UIElementInfo(
-                id=elem_data.get("id"),
-                text=elem_data.get("text"),
-                content_desc=elem_data.get("content_desc"),
-                class_name=elem_data.get("class_name"),
-                bounds=elem_data.get("bounds"),
-                center=elem_data.get("center"),
-                clickable=elem_data.get("clickable", False),
-                scrollable=elem_data.get("scrollable", False),
-                enabled=elem_data.get("enabled", True),
-                visible=elem_data.get("visible", True)
+                get("id"),
+                text,
+                get("content_desc"),
+                class_name,
+                get("bounds"),
+                get("center"),
+                clickable,
+                get("scrollable", False),
+                enabled,
+                get("visible", True)
             )
-            analysis.elements.append(element)
+            elements.append(element)
 
-            if element.text:
-                analysis.text_content.append(element.text)
+            if text:
+                text_content.append(text)
 
-            if element.clickable and element.enabled:
-                analysis.interactive_elements.append(element)
+            if clickable and enabled:
+                interactive.append(element)
 
-            # Detect keyboard
-            if element.class_name and "keyboard" in element.class_name.lower():
-                analysis.has_keyboard = True
-
-            # Detect dialog
-            if element.class_name and "dialog" in element.class_name.lower():
-                analysis.has_dialog = True
+            # Detect keyboard / dialog with one scan of the class name
+            if class_name:
+                for match in _KB_DIALOG_RE.finditer(class_name):
+                    if match.group(1):
+                        has_keyboard = True
+                    else:
+                        has_dialog = True
 
+        analysis.has_keyboard = has_keyboard
+        analysis.has_dialog = has_dialog
         return analysis
 
     async def _analyze_with_vision(
@@ -183,8 +239,6 @@ class ContextAnalyzerAgent(BaseAgent):
         instruction: str
     ) -> ScreenAnalysis:
         """Analyze screenshot using vision model."""
-        import json
-
         prompt = f"""Analyze this mobile screen screenshot.
 User wants to: {instruction}
 
@@ -245,9 +299,10 @@ Return JSON:
             activity_name=hierarchy_analysis.activity_name,
             screen_type=vision_analysis.screen_type,
             elements=hierarchy_analysis.elements,
-            text_content=list(set(
-                hierarchy_analysis.text_content + vision_analysis.text_content
-            )),
+            # Order-preserving dedup keeps downstream prompts stable between calls
+            text_content=list(dict.fromkeys(chain(
+                hierarchy_analysis.text_content, vision_analysis.text_content
+            ))),
             interactive_elements=hierarchy_analysis.interactive_elements,
             has_keyboard=hierarchy_analysis.has_keyboard or vision_analysis.has_keyboard,
             has_dialog=hierarchy_analysis.has_dialog or vision_analysis.has_dialog,
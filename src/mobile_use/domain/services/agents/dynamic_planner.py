@@ -3,10 +3,47 @@
 根据当前UI状态、总任务目标、已完成步骤，动态规划下一步操作。
 """
 
+import copy
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
-from typing import Any, Protocol
+from typing import Any, ClassVar, Protocol
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the stdlib json module
+    orjson = None
+
+# 数字键盘按键名称
+_DIGIT_NAMES = frozenset("0123456789")
+# 密码/验证码输入界面的提示词
+_PASSWORD_HINTS = ("密码", "password", "pin", "验证码", "解锁")
+# 暂停/播放相关的描述关键词
+_PAUSE_PLAY_KWS = frozenset(("暂停", "播放", "pause", "play"))
+# 表明是搜索类任务的关键词
+_SEARCH_KEYWORDS = ("搜索", "查找", "找", "播放", "听", "看")
+# 检查是否已输入搜索关键词时回看的步骤数
+_SEARCH_LOOKBACK_STEPS = 10
+# 任务描述中书名号/引号内的关键词
+_QUOTE_RE = re.compile(r'[《「『"](.+?)[》」』"]')
+# LLM 回复中最外层的 JSON 对象
+_JSON_RE = re.compile(r'\{[\s\S]*\}')
+
+
+def _json_loads(text: str) -> Any:
+    """Parse JSON with orjson when installed.
+
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers
+    catch the same exception either way.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
 
 class LLMProvider(Protocol):
     """LLM提供者协议"""
@@ -22,25 +59,78 @@ class TaskStatus(Enum):
     FAILED = "failed"
 
 
-@dataclass
+@dataclass(slots=True)
 class UIContext:
     """当前UI上下文"""
     elements: list[dict[str, Any]] = field(default_factory=list)
     screenshot: bytes | None = None
     screen_info: dict[str, Any] = field(default_factory=dict)
+    # 编号元素列表的缓存，elements 被替换或增删时失效
+    _indexed_cache: dict[bool, tuple[tuple[int, str, dict[str, Any]], ...]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _indexed_key: tuple[int, int] | None = field(default=None, init=False, repr=False, compare=False)
+    # 小写文本索引（has_element 使用），与编号缓存同时失效
+    _lower_blob: str | None = field(default=None, init=False, repr=False, compare=False)
+    _lower_labels: frozenset[str] = field(default=frozenset(), init=False, repr=False, compare=False)
+    # 按列展开的元素属性（text/desc/hint 已 strip，class 已小写），同样随 elements 失效
+    _texts: list[str] | None = field(default=None, init=False, repr=False, compare=False)
+    _descs: list[str] = field(default_factory=list, init=False, repr=False, compare=False)
+    _clickables: list[bool] = field(default_factory=list, init=False, repr=False, compare=False)
+    _class_lower: list[str] = field(default_factory=list, init=False, repr=False, compare=False)
+    _centers: list[tuple[int, int]] = field(default_factory=list, init=False, repr=False, compare=False)
+    _hints: list[str] = field(default_factory=list, init=False, repr=False, compare=False)
+    # 提示词中的元素列表文本缓存
+    _listing: str | None = field(default=None, init=False, repr=False, compare=False)
+
+    def _check_cache(self) -> None:
+        """elements 被替换或增删时清空所有派生缓存"""
+        key = (id(self.elements), len(self.elements))
+        if key != self._indexed_key:
+            self._indexed_cache.clear()
+            self._lower_blob = None
+            self._texts = None
+            self._listing = None
+            self._indexed_key = key
+
+    def _build_columns(self) -> None:
+        """一次遍历 elements，把常用属性展开为并列数组"""
+        texts, descs, clickables, class_lower, centers, hints = [], [], [], [], [], []
+        for e in self.elements:
+            texts.append((e.get('text') or '').strip())
+            descs.append((e.get('content_desc') or '').strip())
+            clickables.append(bool(e.get('clickable', False)))
+            class_lower.append((e.get('class_name') or e.get('class') or '').lower())
+            centers.append(e.get('center') or (0, 0))
+            hints.append((e.get('hint') or '').strip())
+        self._texts, self._descs, self._clickables = texts, descs, clickables
+        self._class_lower, self._centers, self._hints = class_lower, centers, hints
+
+    def _build_indexed_elements(self, clickable_only: bool = True) -> tuple[tuple[int, str, dict[str, Any]], ...]:
+        """获取带编号的元素列表（按 clickable_only 分别缓存，elements 变化时重建）"""
+        self._check_cache()
+        cached = self._indexed_cache.get(clickable_only)
+        if cached is None:
+            cached = self._indexed_cache[clickable_only] = tuple(self._index_elements(clickable_only))
+        return cached
 
-    def _build_indexed_elements(self, clickable_only: bool = True) -> list[tuple[int, str, dict[str, Any]]]:
+    def _index_elements(self, clickable_only: bool) -> list[tuple[int, str, dict[str, Any]]]:
         """构建带编号的元素列表（不去重，使用位置区分同名元素）"""
+        if self._texts is None:
+            self._build_columns()
+        texts, descs, clickables = self._texts, self._descs, self._clickables
+        class_lower, centers, hints = self._class_lower, self._centers, self._hints
+
         result = []
         idx = 1
         name_counter = {}  # 记录每个名称出现的次数
         
-        for e in self.elements:
-            text = e.get('text', '').strip()
-            desc = e.get('content_desc', '').strip()
-            clickable = e.get('clickable', False)
-            class_name = e.get('class_name', '').lower() or e.get('class', '').lower()
-            center = e.get('center', (0, 0))
+        for i, e in enumerate(self.elements):
+            text = texts[i]
+            desc = descs[i]
+            clickable = clickables[i]
+            class_name = class_lower[i]
+            center = centers[i]
             
             # 判断是否为输入框（即使没有名称也要包含）
             is_input = 'edittext' in class_name or 'input' in class_name
@@ -54,7 +144,7 @@ class UIContext:
                 name = name[:15] + "..." + name[-10:]
             
             if not name and is_input:
-                hint = e.get('hint', '').strip()
+                hint = hints[i]
                 name = hint if hint else f"[输入框{idx}]"
             
             # 检查是否应该包含该元素
@@ -65,28 +155,34 @@ class UIContext:
                 should_include = bool(name)
             
             if should_include:
-                # 为同名元素添加位置后缀以区分
-                display_name = name
-                if name in name_counter:
-                    name_counter[name] += 1
-                    # 添加坐标后缀区分同名元素
-                    display_name = f"{name}@({center[0]},{center[1]})"
-                else:
-                    name_counter[name] = 1
+                # 为同名元素添加坐标后缀以区分
+                count = name_counter.get(name, 0)
+                name_counter[name] = count + 1
+                display_name = f"{name}@({center[0]},{center[1]})" if count else name
                 
                 result.append((idx, display_name, e))
                 idx += 1
         
         return result
 
-    def get_indexed_clickable_elements(self) -> list[tuple[int, str, dict[str, Any]]]:
+    def get_indexed_clickable_elements(self) -> tuple[tuple[int, str, dict[str, Any]], ...]:
         """获取带编号的可点击元素列表，返回 (编号, 名称, 元素)"""
         return self._build_indexed_elements(clickable_only=True)
 
-    def get_indexed_all_elements(self) -> list[tuple[int, str, dict[str, Any]]]:
+    def get_indexed_all_elements(self) -> tuple[tuple[int, str, dict[str, Any]], ...]:
         """获取带编号的所有元素列表，返回 (编号, 名称, 元素)"""
         return self._build_indexed_elements(clickable_only=False)
 
+    def get_element_listing(self) -> str:
+        """获取提示词用的元素列表文本，每行 "  [编号]★ 名称"（★表示可点击）"""
+        self._check_cache()
+        if self._listing is None:
+            self._listing = "".join([
+                f"  [{idx}]{'★' if elem.get('clickable', False) else ' '} {name}\n"
+                for idx, name, elem in self._build_indexed_elements(clickable_only=False)
+            ])
+        return self._listing
+
     def get_element_by_index(self, index: int) -> dict[str, Any] | None:
         """根据编号获取元素（基于所有元素的统一编号）"""
         all_indexed = self._build_indexed_elements(clickable_only=False)
@@ -104,16 +200,24 @@ class UIContext:
 
     def has_element(self, name: str) -> bool:
         """检查是否存在指定元素"""
+        self._check_cache()
+        if self._lower_blob is None:
+            if self._texts is None:
+                self._build_columns()
+            labels = []
+            for text, desc in zip(self._texts, self._descs):
+                labels.append(text.lower())
+                labels.append(desc.lower())
+            # 以换行分隔，保证子串不会跨越两个字段
+            self._lower_blob = "\n".join(labels)
+            self._lower_labels = frozenset(labels)
         name_lower = name.lower()
-        for e in self.elements:
-            text = e.get('text', '').strip().lower()
-            desc = e.get('content_desc', '').strip().lower()
-            if name_lower in text or name_lower in desc:
-                return True
-        return False
+        if name_lower in self._lower_labels:
+            return True
+        return bool(self.elements) and "\n" not in name_lower and name_lower in self._lower_blob
 
 
-@dataclass
+@dataclass(slots=True)
 class CompletedStep:
     """已完成的步骤"""
     action: str
@@ -126,6 +230,34 @@ class CompletedStep:
     ui_after: list[str] = field(default_factory=list)   # 执行后的UI元素
     ui_changed: bool = True  # UI是否发生变化
     retry_count: int = 0  # 重试次数
+    # ui_before/ui_after 的 frozenset 缓存，列表被替换或增删时重建
+    _ui_sets: dict[str, tuple[tuple[int, int], frozenset[str]]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def _ui_set(self, attr: str) -> frozenset[str]:
+        """获取 ui_before/ui_after 的 frozenset（惰性构建）"""
+        elements = getattr(self, attr)
+        key = (id(elements), len(elements))
+        cached = self._ui_sets.get(attr)
+        if cached is None or cached[0] != key:
+            cached = self._ui_sets[attr] = (key, frozenset(elements))
+        return cached[1]
+
+    @property
+    def ui_before_set(self) -> frozenset[str]:
+        """执行前UI元素集合"""
+        return self._ui_set("ui_before")
+
+    @property
+    def ui_after_set(self) -> frozenset[str]:
+        """执行后UI元素集合"""
+        return self._ui_set("ui_after")
+
+    def set_ui_after(self, ui_after: list[str]) -> None:
+        """记录执行后的UI元素，同时建好集合供后续对比使用"""
+        self.ui_after = ui_after
+        self._ui_sets["ui_after"] = ((id(ui_after), len(ui_after)), frozenset(ui_after))
     
     def to_string(self) -> str:
         """转换为字符串描述"""
@@ -149,8 +281,8 @@ class CompletedStep:
         result = self.to_string()
         if self.ui_before and self.ui_after:
             # 计算UI变化
-            before_set = set(self.ui_before)
-            after_set = set(self.ui_after)
+            before_set = self.ui_before_set
+            after_set = self.ui_after_set
             new_elements = after_set - before_set
             removed_elements = before_set - after_set
             if new_elements:
@@ -160,7 +292,7 @@ class CompletedStep:
         return result
 
 
-@dataclass
+@dataclass(slots=True)
 class NextStep:
     """下一步操作"""
     action: str
@@ -179,7 +311,7 @@ class NextStep:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class PlanningResult:
     """规划结果"""
     next_step: NextStep | None = None
@@ -201,7 +333,7 @@ class PlanningResult:
         return []
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskPlan:
     """总任务计划"""
     original_task: str  # 用户原始输入
@@ -420,9 +552,20 @@ class DynamicTaskPlanner:
 }
 """
 
-    def __init__(self, llm_provider: LLMProvider):
+    # 规划结果缓存容量（LRU）
+    PLAN_CACHE_SIZE = 128
+    # (模型, 任务, 有序UI元素及坐标, 截图, 已完成步骤) -> 规划结果；所有规划器实例共享，
+    # 因为 API 每个请求都会新建规划器
+    _plan_cache: ClassVar[OrderedDict[bytes, PlanningResult]] = OrderedDict()
+    # 任务计划模板缓存容量（LRU）
+    TASK_PLAN_CACHE_SIZE = 64
+    # (模型, 任务签名（引号内实体替换为 <ENTITY>）) -> (原实体列表, 任务计划)；所有实例共享
+    _task_plan_cache: ClassVar[OrderedDict[tuple[tuple[str, ...], str], tuple[list[str], TaskPlan]]] = OrderedDict()
+
+    def __init__(self, llm_provider: LLMProvider, enable_plan_cache: bool = True):
         self.llm_provider = llm_provider
         self.current_task_plan: TaskPlan | None = None
+        self.enable_plan_cache = enable_plan_cache
 
     async def generate_task_plan(self, user_input: str, ui_context: UIContext | None = None) -> TaskPlan:
         """根据用户输入生成总任务计划
@@ -434,6 +577,25 @@ class DynamicTaskPlanner:
         Returns:
             TaskPlan: 总任务计划
         """
+        entities = _QUOTE_RE.findall(user_input)
+        signature = _QUOTE_RE.sub("<ENTITY>", user_input).lower()
+        cache_key = (self._provider_key(), signature)
+        # 带UI上下文的计划依赖当时的屏幕，不复用也不写入缓存；
+        # 单字实体在模板中替换时容易误改无关文字，同样不走缓存
+        use_cache = (
+            self.enable_plan_cache
+            and ui_context is None
+            and all(len(entity) > 1 for entity in entities)
+        )
+        if use_cache:
+            cached = self._task_plan_cache.get(cache_key)
+            if cached is not None:
+                self._task_plan_cache.move_to_end(cache_key)
+                print(f"[TaskPlan] cache hit: {signature}")
+                task_plan = self._adapt_task_plan(cached[1], cached[0], entities, user_input)
+                self.current_task_plan = task_plan
+                return task_plan
+
         prompt = f"{self.TASK_PLAN_PROMPT}\n\n用户任务: {user_input}"
         
         # 如果有UI上下文，添加当前屏幕信息
@@ -456,6 +618,10 @@ class DynamicTaskPlanner:
             # 解析响应
             task_plan = self._parse_task_plan(user_input, response)
             self.current_task_plan = task_plan
+            if use_cache:
+                self._task_plan_cache[cache_key] = (entities, copy.deepcopy(task_plan))
+                if len(self._task_plan_cache) > self.TASK_PLAN_CACHE_SIZE:
+                    self._task_plan_cache.popitem(last=False)
             return task_plan
             
         except Exception as e:
@@ -471,16 +637,39 @@ class DynamicTaskPlanner:
                 confidence=0.5
             )
 
+    @staticmethod
+    def _adapt_task_plan(
+        template: TaskPlan,
+        old_entities: list[str],
+        new_entities: list[str],
+        user_input: str
+    ) -> TaskPlan:
+        """把缓存的任务计划中的旧实体替换为新任务的实体"""
+        task_plan = copy.deepcopy(template)
+        task_plan.original_task = user_input
+
+        replacements = {old: new for old, new in zip(old_entities, new_entities) if old != new}
+        if not replacements:
+            return task_plan
+        # 一次扫描完成全部替换（长实体优先），避免替换结果被后续实体再次改写
+        pattern = re.compile("|".join(re.escape(old) for old in sorted(replacements, key=len, reverse=True)))
+
+        def substitute(text: str) -> str:
+            return pattern.sub(lambda m: replacements[m.group()], text)
+
+        task_plan.task_summary = substitute(task_plan.task_summary)
+        task_plan.steps = [substitute(step) for step in task_plan.steps]
+        task_plan.potential_issues = [substitute(issue) for issue in task_plan.potential_issues]
+        task_plan.success_criteria = substitute(task_plan.success_criteria)
+        return task_plan
+
     def _parse_task_plan(self, user_input: str, response: str) -> TaskPlan:
         """解析LLM返回的任务计划"""
-        import json
-        import re
-        
         # 尝试提取JSON
-        json_match = re.search(r'\{[\s\S]*\}', response)
+        json_match = _JSON_RE.search(response)
         if json_match:
             try:
-                data = json.loads(json_match.group())
+                data = _json_loads(json_match.group())
                 return TaskPlan(
                     original_task=user_input,
                     task_summary=data.get("task_summary", user_input),
@@ -508,26 +697,34 @@ class DynamicTaskPlanner:
         self,
         task: str,
         ui_context: UIContext,
-        completed_steps: list[CompletedStep]
+        completed_steps: list[CompletedStep],
+        history_summary: str = ""
     ) -> PlanningResult:
         """规划下一步操作
         
         Args:
             task: 总任务目标
             ui_context: 当前UI上下文
-            completed_steps: 已完成的步骤列表
+            completed_steps: 已完成的步骤列表（最近的窗口）
+            history_summary: 窗口之外更早步骤的摘要
             
         Returns:
             PlanningResult: 规划结果
         """
-        prompt = self._build_prompt(task, ui_context, completed_steps)
+        cache_key = self._plan_cache_key(task, ui_context, completed_steps, history_summary)
+        cached = self._plan_cache.get(cache_key)
+        if cached is not None:
+            self._plan_cache.move_to_end(cache_key)
+            print("[DynamicPlanner] 命中规划缓存，跳过LLM调用")
+            return copy.deepcopy(cached)
+
+        prompt = self._build_prompt(task, ui_context, completed_steps, history_summary)
         
         try:
             # 如果有截图，使用视觉模型分析
             if ui_context.screenshot:
                 img_size_kb = len(ui_context.screenshot) / 1024
                 print(f"[DynamicPlanner] 使用视觉模型分析截图 (图片大小: {img_size_kb:.1f}KB, Prompt长度: {len(prompt)}字符)")
-                import time
                 start = time.time()
                 response = await self.llm_provider.analyze_image(
                     ui_context.screenshot,
@@ -537,89 +734,137 @@ class DynamicTaskPlanner:
                 print(f"[DynamicPlanner] LLM响应耗时: {elapsed:.2f}秒")
             else:
                 response = await self.llm_provider.generate(prompt)
-            return self._parse_response(response)
+            result = self._parse_response(response)
         except Exception as e:
             print(f"[DynamicPlanner] LLM调用失败: {e}")
             return self._fallback_plan(task, ui_context, completed_steps)
+
+        # 解析失败或没有下一步的结果不缓存，避免污染
+        if result.task_complete or result.get_all_steps():
+            self._plan_cache[cache_key] = copy.deepcopy(result)
+            if len(self._plan_cache) > self.PLAN_CACHE_SIZE:
+                self._plan_cache.popitem(last=False)
+        return result
+
+    def _plan_cache_key(
+        self,
+        task: str,
+        ui_context: UIContext,
+        completed_steps: list[CompletedStep],
+        history_summary: str = ""
+    ) -> bytes:
+        """规划缓存键：模型、任务、UI元素列表、截图和已完成步骤指纹的 SHA-256
+
+        缓存的 target_index 和坐标只对同样顺序、同样布局的元素有效，
+        所以使用带编号的元素列表文本和每个元素的中心坐标，而不是名称集合。
+        有截图时规划走视觉模型，WebView/画布页面的层级可能不变而画面已变，
+        所以截图内容也计入键中。
+        """
+        plan_summary = self.current_task_plan.task_summary if self.current_task_plan else ""
+        screenshot = ui_context.screenshot
+        fingerprint = (
+            self._provider_key(),
+            hashlib.blake2b(screenshot, digest_size=16).digest() if screenshot else None,
+            task,
+            plan_summary,
+            history_summary,
+            ui_context.get_element_listing(),
+            tuple(elem.get('center') for _, _, elem in ui_context.get_indexed_all_elements()),
+            tuple(
+                (s.action, s.target, s.description, s.success, s.ui_changed)
+                for s in completed_steps
+            ),
+        )
+        return hashlib.sha256(repr(fingerprint).encode("utf-8")).digest()
+
+    def _provider_key(self) -> tuple[str, ...]:
+        """缓存键中的模型标识：共享缓存在不同提供方/模型的规划器之间互不复用"""
+        config = getattr(self.llm_provider, "config", None)
+        if config is None:
+            return (type(self.llm_provider).__qualname__, str(id(self.llm_provider)))
+        return (str(getattr(config, "provider", "")), str(config.model), str(getattr(config, "base_url", "")))
     
     def _build_prompt(
         self,
         task: str,
         ui_context: UIContext,
-        completed_steps: list[CompletedStep]
+        completed_steps: list[CompletedStep],
+        history_summary: str = ""
     ) -> str:
         """构建LLM提示词"""
-        prompt = f"{self.SYSTEM_PROMPT}\n\n"
+        parts = [f"{self.SYSTEM_PROMPT}\n\n"]
         
         # 1. 总任务目标
-        prompt += f"## 总任务目标\n{task}\n\n"
+        parts.append(f"## 总任务目标\n{task}\n\n")
         
         # 1.1 检测搜索任务，提取并强调搜索关键词
         task_lower = task.lower()
-        search_keywords = ["搜索", "查找", "找", "播放", "听", "看"]
-        if any(kw in task_lower for kw in search_keywords):
-            # 尝试提取关键词（歌名、歌手、应用名等）
-            import re
-            # 提取引号内的内容或明显的目标词
-            quoted = re.findall(r'[《「『"](.+?)[》」』"]', task)
-            if quoted:
-                keywords = ' '.join(quoted)
-                # 检查是否已经输入过搜索关键词
-                has_searched = False
-                for step in completed_steps:
-                    if step.action == "input" and any(kw in (step.parameters.get("text", "") or "").lower() for kw in quoted):
-                        has_searched = True
-                        break
-                
-                if not has_searched:
-                    prompt += f"⚠️ **关键提醒**：这是搜索任务！必须先输入关键词：**{keywords}**\n"
-                    prompt += f"**重要**：还没有搜索过【{keywords}】！必须：\n"
-                    prompt += "  1. 找到搜索框（通常在顶部或底部）\n"
-                    prompt += f"  2. tap搜索框获取焦点\n"
-                    prompt += f"  3. input '{keywords}'\n"
-                    prompt += "  4. press_key ENTER 或点击搜索按钮\n"
-                    prompt += "  5. 等待搜索结果出现后，才能点击结果\n"
-                    prompt += "- **不要点击历史记录、热搜推荐或任何非搜索结果的内容！**\n\n"
-                else:
-                    prompt += f"✓ 已搜索关键词【{keywords}】，现在可以在搜索结果中选择\n"
-                    prompt += "**选择歌曲时注意**：\n"
-                    prompt += "  - 优先选择**原唱版本**（歌手名+歌曲名）\n"
-                    prompt += "  - **避免选择**：伴奏、翻唱、Live版、DJ版（除非任务明确要求）\n"
-                    prompt += "  - 如果误选了错误版本，使用 back 返回重新选择\n\n"
+        # 提取引号内的关键词（歌名、歌手、应用名等），没有则跳过整段
+        quoted = _QUOTE_RE.findall(task) if any(kw in task_lower for kw in _SEARCH_KEYWORDS) else None
+        if quoted:
+            keywords = ' '.join(quoted)
+            # 检查最近的步骤中是否已经输入过搜索关键词
+            has_searched = False
+            for step in completed_steps[-_SEARCH_LOOKBACK_STEPS:]:
+                if step.action != "input":
+                    continue
+                input_text = (step.parameters.get("text", "") or "").lower()
+                if any(kw in input_text for kw in quoted):
+                    has_searched = True
+                    break
+            
+            if not has_searched:
+                parts.append(f"⚠️ **关键提醒**：这是搜索任务！必须先输入关键词：**{keywords}**\n")
+                parts.append(f"**重要**：还没有搜索过【{keywords}】！必须：\n")
+                parts.append("  1. 找到搜索框（通常在顶部或底部）\n")
+                parts.append(f"  2. tap搜索框获取焦点\n")
+                parts.append(f"  3. input '{keywords}'\n")
+                parts.append("  4. press_key ENTER 或点击搜索按钮\n")
+                parts.append("  5. 等待搜索结果出现后，才能点击结果\n")
+                parts.append("- **不要点击历史记录、热搜推荐或任何非搜索结果的内容！**\n\n")
+            else:
+                parts.append(f"✓ 已搜索关键词【{keywords}】，现在可以在搜索结果中选择\n")
+                parts.append("**选择歌曲时注意**：\n")
+                parts.append("  - 优先选择**原唱版本**（歌手名+歌曲名）\n")
+                parts.append("  - **避免选择**：伴奏、翻唱、Live版、DJ版（除非任务明确要求）\n")
+                parts.append("  - 如果误选了错误版本，使用 back 返回重新选择\n\n")
         
         # 1.2 如果有总任务计划，显示详细计划
         if self.current_task_plan:
-            prompt += "## 总任务计划（AI预先规划）\n"
-            prompt += f"任务摘要: {self.current_task_plan.task_summary}\n"
-            prompt += "预期步骤:\n"
+            parts.append("## 总任务计划（AI预先规划）\n")
+            parts.append(f"任务摘要: {self.current_task_plan.task_summary}\n")
+            parts.append("预期步骤:\n")
             for i, step in enumerate(self.current_task_plan.steps, 1):
-                prompt += f"  {i}. {step}\n"
+                parts.append(f"  {i}. {step}\n")
             if self.current_task_plan.potential_issues:
-                prompt += "可能的问题:\n"
+                parts.append("可能的问题:\n")
                 for issue in self.current_task_plan.potential_issues:
-                    prompt += f"  - {issue}\n"
-            prompt += f"成功标准: {self.current_task_plan.success_criteria}\n"
-            prompt += f"预估操作数: {self.current_task_plan.estimated_steps}\n\n"
+                    parts.append(f"  - {issue}\n")
+            parts.append(f"成功标准: {self.current_task_plan.success_criteria}\n")
+            parts.append(f"预估操作数: {self.current_task_plan.estimated_steps}\n\n")
         
         # 2. 已完成的步骤（包含详细信息）
-        prompt += "## 已完成的步骤\n"
+        if history_summary:
+            parts.append("## 更早的步骤（摘要）\n")
+            parts.append(f"{history_summary}\n\n")
+        parts.append("## 已完成的步骤\n")
         if completed_steps:
             for i, step in enumerate(completed_steps, 1):
-                prompt += f"  {i}. {step.to_detailed_string()}\n"
+                parts.append(f"  {i}. {step.to_detailed_string()}\n")
             
             # 分析最近的失败和问题
             recent_failures = [s for s in completed_steps[-5:] if not s.success]
             recent_no_change = [s for s in completed_steps[-3:] if s.success and not s.ui_changed]
             
             if recent_failures:
-                prompt += "\n  ⚠️ 最近失败的操作:\n"
+                parts.append("\n  ⚠️ 最近失败的操作:\n")
                 for step in recent_failures:
-                    prompt += f"    - {step.action}: {step.error}\n"
+                    parts.append(f"    - {step.action}: {step.error}\n")
             
             if recent_no_change:
-                prompt += "\n  ⚠️ 最近UI未变化的操作（可能已到边界或操作无效）:\n"
+                parts.append("\n  ⚠️ 最近UI未变化的操作（可能已到边界或操作无效）:\n")
                 for step in recent_no_change:
-                    prompt += f"    - {step.action} {step.description}\n"
+                    parts.append(f"    - {step.action} {step.description}\n")
             
             # 检测连续UI未变化（页面卡住）
             consecutive_no_change = 0
@@ -630,18 +875,18 @@ class DynamicTaskPlanner:
                     break
             
             if consecutive_no_change >= 2:
-                prompt += f"\n  🚨 严重警告: 连续{consecutive_no_change}次操作后页面无变化！\n"
-                prompt += "  必须立即改变策略：\n"
+                parts.append(f"\n  🚨 严重警告: 连续{consecutive_no_change}次操作后页面无变化！\n")
+                parts.append("  必须立即改变策略：\n")
                 last_action = completed_steps[-1].action if completed_steps else ""
                 if last_action == "scroll":
                     # 获取最后滑动方向
                     last_dir = completed_steps[-1].parameters.get("direction", "")
-                    prompt += f"  - 滑动方向'{last_dir}'已到边界，尝试反方向或其他操作\n"
-                    prompt += "  - 可选：up↔down, left↔right 互换\n"
+                    parts.append(f"  - 滑动方向'{last_dir}'已到边界，尝试反方向或其他操作\n")
+                    parts.append("  - 可选：up↔down, left↔right 互换\n")
                 elif last_action == "tap":
-                    prompt += "  - 点击无效，目标可能不可交互，尝试其他元素\n"
+                    parts.append("  - 点击无效，目标可能不可交互，尝试其他元素\n")
                 else:
-                    prompt += "  - 当前操作无效，尝试完全不同的方法\n"
+                    parts.append("  - 当前操作无效，尝试完全不同的方法\n")
             
             # 检测重复相同操作
             if len(completed_steps) >= 3:
@@ -649,8 +894,8 @@ class DynamicTaskPlanner:
                     (s.action, s.target, s.parameters.get("direction", ""))
                     for s in completed_steps[-3:]
                 ]
-                if len({str(a) for a in last_actions}) == 1:
-                    prompt += "\n  🚨 警告: 连续3次执行完全相同的操作，必须尝试不同的方法！\n"
+                if last_actions[0] == last_actions[1] == last_actions[2]:
+                    parts.append("\n  🚨 警告: 连续3次执行完全相同的操作，必须尝试不同的方法！\n")
             
             # 检测暂停/播放循环
             if len(completed_steps) >= 4:
@@ -659,79 +904,77 @@ class DynamicTaskPlanner:
                 for step in completed_steps[-6:]:
                     if step.action == "click" and step.description:
                         desc_lower = step.description.lower()
-                        if "暂停" in desc_lower or "播放" in desc_lower or "pause" in desc_lower or "play" in desc_lower:
+                        if any(kw in desc_lower for kw in _PAUSE_PLAY_KWS):
                             pause_play_actions.append(step)
                 
                 if len(pause_play_actions) >= 3:
-                    prompt += "\n  🚨 严重警告: 检测到暂停/播放循环！\n"
-                    prompt += "  - 反复点击暂停/播放无法解决问题\n"
-                    prompt += "  - 可能原因：播放了错误的歌曲（如伴奏版）、广告、或其他内容\n"
-                    prompt += "  - **必须改变策略**：\n"
-                    prompt += "    1. 使用 back 返回上一页\n"
-                    prompt += "    2. 重新搜索并选择正确的歌曲（注意区分原唱/伴奏/翻唱）\n"
-                    prompt += "    3. 或者点击'下一曲'跳过当前内容\n"
-                    prompt += "  - **禁止**继续点击暂停/播放按钮！\n\n"
+                    parts.append("\n  🚨 严重警告: 检测到暂停/播放循环！\n")
+                    parts.append("  - 反复点击暂停/播放无法解决问题\n")
+                    parts.append("  - 可能原因：播放了错误的歌曲（如伴奏版）、广告、或其他内容\n")
+                    parts.append("  - **必须改变策略**：\n")
+                    parts.append("    1. 使用 back 返回上一页\n")
+                    parts.append("    2. 重新搜索并选择正确的歌曲（注意区分原唱/伴奏/翻唱）\n")
+                    parts.append("    3. 或者点击'下一曲'跳过当前内容\n")
+                    parts.append("  - **禁止**继续点击暂停/播放按钮！\n\n")
         else:
-            prompt += "  （这是第一步，还没有完成任何操作）\n"
-        prompt += "\n"
+            parts.append("  （这是第一步，还没有完成任何操作）\n")
+        parts.append("\n")
         
         # 3. 当前UI状态（带编号，统一编号系统）
-        prompt += "## 当前屏幕UI元素（使用编号指定操作目标）\n"
-        prompt += "**注意：元素列表中的元素都是当前屏幕上可见的，不要根据坐标推断元素是否在屏幕外！**\n"
+        parts.append("## 当前屏幕UI元素（使用编号指定操作目标）\n")
+        parts.append("**注意：元素列表中的元素都是当前屏幕上可见的，不要根据坐标推断元素是否在屏幕外！**\n")
         # 使用统一的编号系统：所有元素共用一套编号
         all_indexed = ui_context.get_indexed_all_elements()
 
+        # 一次遍历同时生成名称集合，以及数字键盘/密码界面特征
+        current_elements = set()
+        digit_count = 0
+        has_password_hint = False
+        for _, name, _ in all_indexed:
+            current_elements.add(name)
+            name_lower = name.lower()
+            if name_lower in _DIGIT_NAMES:
+                digit_count += 1
+            if not has_password_hint and any(kw in name_lower for kw in _PASSWORD_HINTS):
+                has_password_hint = True
+
         if all_indexed:
-            prompt += f"元素列表（共{len(all_indexed)}个，★表示可点击）:\n"
+            parts.append(f"元素列表（共{len(all_indexed)}个，★表示可点击）:\n")
             # 显示所有元素，不跳过任何元素
-            for idx, name, elem in all_indexed:
-                clickable = elem.get('clickable', False)
-                marker = "★" if clickable else " "
-                prompt += f"  [{idx}]{marker} {name}\n"
+            parts.append(ui_context.get_element_listing())
         else:
-            prompt += "  （未检测到UI元素）\n"
+            parts.append("  （未检测到UI元素）\n")
         
         # 4. 与上一步的UI对比（如果有）
         if completed_steps and completed_steps[-1].ui_before:
             last_step = completed_steps[-1]
-            current_names = [name for _, name, _ in all_indexed]
-            current_elements = set(current_names)
-            prev_elements = set(last_step.ui_after) if last_step.ui_after else set(last_step.ui_before)
+            prev_elements = last_step.ui_after_set if last_step.ui_after else last_step.ui_before_set
 
             new_elements = current_elements - prev_elements
             removed_elements = prev_elements - current_elements
             
             if new_elements or removed_elements:
-                prompt += "\n## UI变化（与上一步对比）\n"
+                parts.append("\n## UI变化（与上一步对比）\n")
                 if new_elements:
-                    prompt += f"  新出现: {list(new_elements)[:5]}\n"
+                    parts.append(f"  新出现: {list(new_elements)[:5]}\n")
                 if removed_elements:
-                    prompt += f"  已消失: {list(removed_elements)[:5]}\n"
-        
-        # 5. 检测是否是密码/数字键盘场景，强制提醒使用批量操作
-        element_names = [name.lower() for _, name, _ in all_indexed]
-        element_names_str = " ".join(element_names)
-        
-        # 检测数字键盘特征：包含多个数字0-9
-        digit_count = sum(1 for name in element_names if name in ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9'])
-        has_password_hint = any(kw in element_names_str for kw in ['密码', 'password', 'pin', '验证码', '解锁'])
+                    parts.append(f"  已消失: {list(removed_elements)[:5]}\n")
         
+        # 5. 检测是否是密码/数字键盘场景（包含多个数字0-9或密码提示），强制提醒使用批量操作
         if digit_count >= 6 or has_password_hint:
-            prompt += "\n## ⚠️ 检测到数字键盘/密码输入界面！\n"
-            prompt += "**必须使用 next_steps 批量操作一次性输入所有数字！**\n"
-            prompt += "示例格式：\n"
-            prompt += '{"next_steps": [{"action": "click", "target_index": 1, "description": "点击数字X"}, ...], "task_complete": false, "reason": "输入密码"}\n'
-            prompt += "**禁止一个数字一个数字地单独返回！**\n\n"
+            parts.append("\n## ⚠️ 检测到数字键盘/密码输入界面！\n")
+            parts.append("**必须使用 next_steps 批量操作一次性输入所有数字！**\n")
+            parts.append("示例格式：\n")
+            parts.append('{"next_steps": [{"action": "click", "target_index": 1, "description": "点击数字X"}, ...], "task_complete": false, "reason": "输入密码"}\n')
+            parts.append("**禁止一个数字一个数字地单独返回！**\n\n")
         
-        prompt += "\n## 请规划下一步操作\n"
-        prompt += "根据以上信息，特别注意失败的操作和UI变化，规划最合适的下一步。\n"
+        parts.append("\n## 请规划下一步操作\n")
+        parts.append("根据以上信息，特别注意失败的操作和UI变化，规划最合适的下一步。\n")
         
-        return prompt
+        return "".join(parts)
     
     def _parse_response(self, response: str) -> PlanningResult:
         """解析LLM响应"""
-        import json
-        
         # 提取JSON
         json_str = response
         if "```json" in response:
@@ -740,7 +983,7 @@ class DynamicTaskPlanner:
             json_str = response.split("```")[1].split("```")[0].strip()
         
         try:
-            data = json.loads(json_str)
+            data = _json_loads(json_str)
         except json.JSONDecodeError as e:
             print(f"[DynamicPlanner] JSON解析失败: {e}")
             return PlanningResult(reason=f"JSON解析失败: {response[:100]}")
@@ -817,6 +1060,53 @@ class DynamicTaskPlanner:
         )
 
 
+class StepHistory:
+    """规划用的步骤历史
+
+    保留最近 WINDOW 个步骤的完整信息，更早的步骤每 SUMMARY_GROUP_SIZE 步
+    压缩为一行摘要，避免提示词随任务步数无限增长。
+    """
+
+    # 保留完整信息的最近步骤数
+    WINDOW = 20
+    # 每条摘要合并的步骤数
+    SUMMARY_GROUP_SIZE = 5
+
+    def __init__(self) -> None:
+        self.recent: deque[CompletedStep] = deque(maxlen=self.WINDOW)
+        self._summary_lines: list[str] = []
+        self._evicted: list[str] = []
+
+    def append(self, step: CompletedStep) -> None:
+        """记录步骤，窗口已满时把最早的步骤并入摘要"""
+        if len(self.recent) == self.recent.maxlen:
+            self._evict(self.recent[0])
+        self.recent.append(step)
+
+    def _evict(self, step: CompletedStep) -> None:
+        """把移出窗口的步骤并入摘要"""
+        self._evicted.append(step.to_string())
+        if len(self._evicted) == self.SUMMARY_GROUP_SIZE:
+            self._summary_lines.append(self._summary_line(self._evicted))
+            self._evicted.clear()
+
+    def _summary_line(self, steps: list[str]) -> str:
+        """生成一行步骤摘要"""
+        start = len(self._summary_lines) * self.SUMMARY_GROUP_SIZE + 1
+        return f"  步骤{start}-{start + len(steps) - 1}: " + " → ".join(steps)
+
+    def steps(self) -> list[CompletedStep]:
+        """窗口内的步骤（传给 plan_next_step）"""
+        return list(self.recent)
+
+    def summary(self) -> str:
+        """窗口之外更早步骤的摘要（没有则为空字符串）"""
+        lines = list(self._summary_lines)
+        if self._evicted:
+            lines.append(self._summary_line(self._evicted))
+        return "\n".join(lines)
+
+
 class TaskExecutionManager:
     """任务执行管理器
     
@@ -834,6 +1124,7 @@ class TaskExecutionManager:
         self.planner = planner
         self.max_steps = max_steps
         self.completed_steps: list[CompletedStep] = []
+        self.history = StepHistory()
         self.current_task: str = ""
         self.status = TaskStatus.PENDING
     
@@ -841,6 +1132,7 @@ class TaskExecutionManager:
         """开始新任务"""
         self.current_task = task
         self.completed_steps = []
+        self.history = StepHistory()
         self.status = TaskStatus.IN_PROGRESS
         print(f"[TaskManager] 开始任务: {task}")
     
@@ -856,7 +1148,8 @@ class TaskExecutionManager:
         result = await self.planner.plan_next_step(
             self.current_task,
             ui_context,
-            self.completed_steps
+            self.history.steps(),
+            self.history.summary()
         )
         
         if result.task_complete:
@@ -867,6 +1160,7 @@ class TaskExecutionManager:
     def record_step(self, step: CompletedStep) -> None:
         """记录已完成的步骤"""
         self.completed_steps.append(step)
+        self.history.append(step)
         print(f"[TaskManager] 完成步骤 {len(self.completed_steps)}: {step.to_string()}")
     
     def get_progress(self) -> dict[str, Any]:
@@ -9,17 +9,20 @@
 """
 
 import asyncio
+import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any, Callable
 
+from mobile_use.domain.services.agents.base import AgentContext
 from mobile_use.domain.services.agents.dynamic_planner import (
     DynamicTaskPlanner,
     UIContext,
     CompletedStep,
     NextStep,
     PlanningResult,
+    StepHistory,
     TaskStatus,
 )
 
@@ -100,6 +103,8 @@ class ModularOrchestrator:
         self.state = ExecutionState.RUNNING
         
         completed_steps: list[CompletedStep] = []
+        # 规划只看最近的步骤窗口，更早的步骤以摘要形式提供
+        history = StepHistory()
         step_count = 0
         
         print(f"\n{'='*50}")
@@ -134,7 +139,8 @@ class ModularOrchestrator:
                 plan_result = await self.planner.plan_next_step(
                     task=task,
                     ui_context=ui_context,
-                    completed_steps=completed_steps
+                    completed_steps=history.steps(),
+                    history_summary=history.summary()
                 )
                 
                 # 3. 检查是否完成
@@ -166,7 +172,6 @@ class ModularOrchestrator:
                         if combined_text:
                             print(f"[Step {step_count}] 智能转换: 批量click -> input '{combined_text}' (检测到输入框)")
                             # 替换为单个 input 操作
-                            from mobile_use.domain.services.agents.dynamic_planner import NextStep
                             all_steps = [NextStep(
                                 action="input",
                                 target=None,
@@ -181,7 +186,6 @@ class ModularOrchestrator:
                         combined_text = self._extract_digits_from_clicks(all_steps)
                         if combined_text:
                             print(f"[Step {step_count}] 智能转换: click -> input '{combined_text}' (上一步点击了输入框)")
-                            from mobile_use.domain.services.agents.dynamic_planner import NextStep
                             all_steps = [NextStep(
                                 action="input",
                                 target=None,
@@ -201,7 +205,7 @@ class ModularOrchestrator:
                                 print(f"[Step {step_count}] 自动修正: 滑动方向 {original_dir} -> {reverse_dir} (检测到边界)")
                                 next_step.parameters["direction"] = reverse_dir
                 
-                # 执行所有步骤
+                # 先根据编号解析所有步骤的目标（同一UI快照，与逐步解析结果相同）
                 for step_idx, next_step in enumerate(all_steps):
                     if plan_result.has_batch_steps():
                         print(f"[Step {step_count}.{step_idx + 1}] 执行: {next_step.description}")
@@ -320,6 +324,12 @@ class ModularOrchestrator:
                     elif not plan_result.has_batch_steps():
                         print(f"[Step {step_count}] 下一步: [{next_step.action}] {next_step.description}")
 
+                # 执行所有步骤：批量操作整体交给执行器，执行器会在同一轮内合并后续的简单动作，
+                # 未被合并的步骤从中断处继续执行
+                step_idx = 0
+                while step_idx < len(all_steps):
+                    next_step = all_steps[step_idx]
+
                     # 4. 通知进度
                     if self.on_progress:
                         self.on_progress(
@@ -335,7 +345,8 @@ class ModularOrchestrator:
                         ui_before = ui_context.get_all_elements()
 
                     # 6. 执行动作
-                    step_result = await self._execute_step(next_step, ui_context)
+                    pending = all_steps[step_idx:] if plan_result.has_batch_steps() else [next_step]
+                    step_results, batch_aborted = await self._execute_steps(pending, ui_context)
                     
                     # 7. 批量操作之间短暂等待，单步操作正常等待
                     if plan_result.has_batch_steps():
@@ -343,22 +354,39 @@ class ModularOrchestrator:
                     else:
                         await asyncio.sleep(0.5)  # 单步操作等待UI更新
                     
-                    # 8. 记录结果
-                    completed_step = CompletedStep(
-                        action=next_step.action,
-                        target=next_step.target,
-                        description=next_step.description,
-                        success=step_result.success,
-                        error=step_result.error if not step_result.success else None,
-                        parameters=next_step.parameters,
-                        ui_before=ui_before[:20] if step_idx == 0 else [],
-                        ui_after=[],  # 批量操作中间不检测UI变化
-                        ui_changed=False
-                    )
-                    completed_steps.append(completed_step)
+                    # 8. 记录结果（执行器合并执行的步骤逐个补记进度）
+                    for offset, step_result in enumerate(step_results):
+                        done_step = pending[offset]
+                        if offset and self.on_progress:
+                            self.on_progress(
+                                len(completed_steps),
+                                len(completed_steps) + 1,
+                                done_step.action,
+                                done_step.description,
+                                done_step.target or ""
+                            )
+                        completed_step = CompletedStep(
+                            action=done_step.action,
+                            target=done_step.target,
+                            description=done_step.description,
+                            success=step_result.success,
+                            error=step_result.error if not step_result.success else None,
+                            parameters=done_step.parameters,
+                            ui_before=ui_before[:20] if step_idx + offset == 0 else [],
+                            ui_after=[],  # 批量操作中间不检测UI变化
+                            ui_changed=False
+                        )
+                        completed_steps.append(completed_step)
+                        history.append(completed_step)
+                    step_idx += len(step_results)
+
+                    if batch_aborted:
+                        # 合并执行异常中断，无法确定哪些后续步骤已执行，续跑会重复操作，改为重新规划
+                        print(f"[Step {step_count}] 合并执行状态未知，停止批量操作并重新规划")
+                        break
                     
-                    if not step_result.success:
-                        print(f"[Step {step_count}] 执行失败: {step_result.error}")
+                    if not step_results[-1].success:
+                        print(f"[Step {step_count}] 执行失败: {step_results[-1].error}")
                         if plan_result.has_batch_steps():
                             print(f"[Step {step_count}] 批量操作中断")
                             break  # 批量操作中有失败则中断
@@ -371,7 +399,7 @@ class ModularOrchestrator:
                 
                 # 更新最后一个步骤的UI信息
                 if completed_steps:
-                    completed_steps[-1].ui_after = ui_after[:20]
+                    completed_steps[-1].set_ui_after(ui_after[:20])
                     completed_steps[-1].ui_changed = ui_changed
                 
                 if ui_changed:
@@ -455,12 +483,18 @@ class ModularOrchestrator:
                 print(f"[Orchestrator] 获取UI元素失败: {e}")
             
             try:
-                result = await self.device_controller.take_screenshot()
-                if result.success:
-                    screenshot = result.data.get("screenshot")
-                    # 压缩截图以加快API调用
-                    if screenshot:
-                        screenshot = self._compress_screenshot(screenshot)
+                # 控制器支持时直接截取缩略JPEG，省去PNG编码再解码压缩
+                if hasattr(self.device_controller, "take_screenshot_thumbnail"):
+                    result = await self.device_controller.take_screenshot_thumbnail()
+                    if result.success:
+                        screenshot = result.data.get("screenshot")
+                else:
+                    result = await self.device_controller.take_screenshot()
+                    if result.success:
+                        screenshot = result.data.get("screenshot")
+                        # 压缩截图以加快API调用
+                        if screenshot:
+                            screenshot = await asyncio.to_thread(self._compress_screenshot, screenshot)
             except Exception as e:
                 print(f"[Orchestrator] 获取截图失败: {e}")
         
@@ -499,14 +533,22 @@ class ModularOrchestrator:
             print(f"[Orchestrator] 截图压缩失败: {e}，使用原图")
             return screenshot
     
-    async def _execute_step(self, step: NextStep, ui_context: UIContext) -> StepResult:
-        """执行单个步骤"""
+    async def _execute_steps(
+        self,
+        steps: list[NextStep],
+        ui_context: UIContext
+    ) -> tuple[list[StepResult], bool]:
+        """执行步骤：第一步正常执行，执行器可在同一轮内合并执行后续的简单动作
+
+        Returns:
+            (已执行步骤的结果（至少包含第一步），合并执行是否异常中断)。
+            中断时后续步骤的执行状态未知，不能从下一步续跑
+        """
         start_time = datetime.now()
+        step = steps[0]
         
         try:
             # 构建执行上下文
-            from mobile_use.domain.services.agents.base import AgentContext
-            import uuid
             
             context = AgentContext(
                 task_id=str(uuid.uuid4()),
@@ -515,7 +557,7 @@ class ModularOrchestrator:
                 screenshot=ui_context.screenshot
             )
             context.metadata["plan"] = {
-                "steps": [step.to_dict()]
+                "steps": [s.to_dict() for s in steps]
             }
             context.current_step = 0
             
@@ -527,33 +569,46 @@ class ModularOrchestrator:
             
             duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
             
-            return StepResult(
-                success=result.success,
-                action=step.action,
-                target=step.target,
-                description=step.description,
-                error=result.error if not result.success else None,
-                duration_ms=duration_ms
-            )
+            if not result.success:
+                return [StepResult(
+                    success=False,
+                    action=step.action,
+                    target=step.target,
+                    description=step.description,
+                    error=result.error,
+                    duration_ms=duration_ms
+                )], False
+            
+            executed = max(1, min(len(result.actions), len(steps)))
+            return [
+                StepResult(
+                    success=True,
+                    action=s.action,
+                    target=s.target,
+                    description=s.description,
+                    duration_ms=duration_ms
+                )
+                for s in steps[:executed]
+            ], bool(result.data.get("batch_aborted"))
             
         except asyncio.TimeoutError:
-            return StepResult(
+            return [StepResult(
                 success=False,
                 action=step.action,
                 target=step.target,
                 description=step.description,
                 error="执行超时",
                 duration_ms=self.step_timeout_ms
-            )
+            )], False
         except Exception as e:
-            return StepResult(
+            return [StepResult(
                 success=False,
                 action=step.action,
                 target=step.target,
                 description=step.description,
                 error=str(e),
                 duration_ms=int((datetime.now() - start_time).total_seconds() * 1000)
-            )
+            )], False
     
     def _count_consecutive_failures(self, completed_steps: list[CompletedStep]) -> int:
         """统计连续失败次数"""
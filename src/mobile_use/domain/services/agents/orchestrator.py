@@ -1,6 +1,7 @@
 """Agent Orchestrator - Coordinates agent workflow for task execution."""
 
 import asyncio
+import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -83,7 +84,8 @@ class AgentOrchestrator:
         device_id: str | None = None,
         initial_screenshot: bytes | None = None,
         initial_ui_elements: list[dict[str, Any]] | None = None,
-        screen_info: dict[str, Any] | None = None
+        screen_info: dict[str, Any] | None = None,
+        initial_plan: AgentResult | None = None
     ) -> ExecutionResult:
         """Execute a complete automation task.
 
@@ -93,11 +95,11 @@ class AgentOrchestrator:
             initial_screenshot: Initial screen screenshot
             initial_ui_elements: Initial UI element hierarchy
             screen_info: Screen information
+            initial_plan: Planner result from plan_only(), used for the first step
 
         Returns:
             ExecutionResult with task outcome
         """
-        import uuid
         start_time = datetime.now()
         task_id = str(uuid.uuid4())
 
@@ -117,56 +119,64 @@ class AgentOrchestrator:
             instruction=instruction
         )
 
+        capture_task: asyncio.Task | None = None
+        plan_task: asyncio.Task | None = None
         try:
             # 动态规划模式：每次只规划下一步
             iteration = 0
             completed_steps = []  # 已完成的步骤描述
+            if self.device_controller:
+                capture_task = asyncio.create_task(self._capture_state())
             
             while iteration < self.max_iterations:
                 iteration += 1
                 
-                # 每次循环前重新获取UI元素和截图
-                if self.device_controller:
-                    try:
-                        print(f"[Orchestrator] 步骤 {iteration}: 刷新UI元素和截图...")
-                        ui_elements = await self.device_controller.get_ui_hierarchy()
+                # 每次循环前使用预取的UI元素和截图
+                if capture_task is not None:
+                    print(f"[Orchestrator] 步骤 {iteration}: 刷新UI元素和截图...")
+                    ui_elements, screenshot = await capture_task
+                    capture_task = None
+                    if ui_elements is not None:
                         context.ui_elements = ui_elements
                         print(f"[Orchestrator] 获取到 {len(ui_elements)} 个UI元素")
-                        
-                        # 刷新截图
-                        screenshot_result = await self.device_controller.take_screenshot()
-                        if screenshot_result.success:
-                            context.screenshot = screenshot_result.data.get("screenshot")
-                            print(f"[Orchestrator] 截图已更新")
-                    except Exception as e:
-                        print(f"[Orchestrator] 获取UI/截图失败: {e}")
+                    if screenshot is not None:
+                        context.screenshot = screenshot
+                        print(f"[Orchestrator] 截图已更新")
 
                 # 动态规划：根据当前UI状态规划下一步
                 self.state = OrchestratorState.PLANNING
                 context.metadata["completed_steps"] = completed_steps
                 
-                plan_result = await self._run_agent_with_timeout(
-                    self.task_planner, context
-                )
-
-                if not plan_result.success:
-                    result.error = plan_result.error or "Planning failed"
-                    result.state = OrchestratorState.FAILED
-                    break
-
-                plan = plan_result.data.get("plan", {})
-                steps = plan.get("steps", [])
-                
-                # 检查是否任务已完成
-                if not steps or plan.get("task_complete"):
-                    print(f"[Orchestrator] 任务完成！")
-                    result.success = True
-                    result.state = OrchestratorState.COMPLETED
-                    break
-                
-                # 只取第一个步骤执行
-                next_step = steps[0]
-                context.metadata["plan"] = {"steps": [next_step]}
+                next_step = None
+                if initial_plan is not None:
+                    plan_result, initial_plan = initial_plan, None
+                else:
+                    # 流式规划：第一个步骤解析完成即开始执行，其余输出在后台继续接收
+                    plan_result, next_step, plan_task = await self._plan_next_step(context)
+
+                if next_step is None:
+                    if not plan_result.success:
+                        result.error = plan_result.error or "Planning failed"
+                        result.state = OrchestratorState.FAILED
+                        break
+
+                    plan = plan_result.data.get("plan", {})
+                    steps = plan.get("steps", [])
+
+                    # 检查是否任务已完成
+                    if not steps or plan.get("task_complete"):
+                        print(f"[Orchestrator] 任务完成！")
+                        result.success = True
+                        result.state = OrchestratorState.COMPLETED
+                        break
+
+                    # 执行第一个步骤，后续可直接执行的简单动作由执行器在同一轮内合并
+                    next_step = steps[0]
+                    plan_steps = steps
+                else:
+                    print("[Orchestrator] 流式规划已得到下一步，提前开始执行")
+                    plan_steps = [next_step]
+                context.metadata["plan"] = {"steps": plan_steps}
                 context.current_step = 0
                 
                 step_desc = next_step.get("description", f"执行步骤 {iteration}")
@@ -192,6 +202,35 @@ class AgentOrchestrator:
                     result.state = OrchestratorState.FAILED
                     break
 
+                # 流式执行时等待本轮规划输出接收完毕：核对已执行的步骤，
+                # 一致时与非流式路径一样合并执行最终计划中后续的简单动作
+                plan_mismatch = False
+                if plan_task is not None:
+                    final_plan = await plan_task
+                    plan_task = None
+                    final_steps = final_plan.data.get("plan", {}).get("steps", []) if final_plan.success else []
+                    if (
+                        not final_steps
+                        or final_steps[0].get("action") != step_action
+                        or final_steps[0].get("target", "") != step_target
+                    ):
+                        # 流式解析出的步骤与最终计划不一致（如完整响应解析失败），
+                        # 该步骤记为未确认，下一轮基于新界面重新规划
+                        plan_mismatch = True
+                        print(f"[Orchestrator] 警告: 已执行的流式步骤与最终规划不一致: {final_plan.error or final_steps[:1]}")
+                    else:
+                        plan_steps = final_steps
+                        context.metadata["plan"] = {"steps": plan_steps}
+                        followups, _ = await asyncio.wait_for(
+                            self.action_executor.execute_batch_after(plan_steps, 1, context),
+                            timeout=self.step_timeout_ms / 1000
+                        )
+                        exec_result.actions.extend(followups)
+
+                # 动作已完成，立即预取下一轮的设备状态
+                if self.device_controller:
+                    capture_task = asyncio.create_task(self._capture_state())
+
                 # Record action
                 for action in exec_result.actions:
                     result.actions.append(action)
@@ -205,9 +244,19 @@ class AgentOrchestrator:
                     "action": step_action,
                     "target": step_target,
                     "description": step_desc,
-                    "success": True
+                    "success": not plan_mismatch
                 }
+                if plan_mismatch:
+                    completed_step_info["error"] = "已执行，但与最终规划不一致"
                 completed_steps.append(completed_step_info)
+                # 同一轮内合并执行的后续动作，与计划中的步骤一一对应
+                for plan_step, action in zip(plan_steps[1:], exec_result.actions[1:]):
+                    completed_steps.append({
+                        "action": action.get("action", "unknown"),
+                        "target": action.get("target"),
+                        "description": plan_step.get("description") or action.get("action", ""),
+                        "success": True
+                    })
                 result.steps_executed = len(completed_steps)
                 result.total_steps = len(completed_steps)  # 动态更新总步数
                 context.current_step += 1
@@ -223,6 +272,12 @@ class AgentOrchestrator:
         except Exception as e:
             result.error = str(e)
             result.state = OrchestratorState.FAILED
+        finally:
+            if capture_task is not None:
+                capture_task.cancel()
+            if plan_task is not None:
+                plan_task.cancel()
+            context.metadata.pop("on_plan_step", None)
 
         # Calculate duration
         result.duration_ms = int(
@@ -232,6 +287,101 @@ class AgentOrchestrator:
 
         return result
 
+    async def plan_only(
+        self,
+        instruction: str,
+        screen_info: dict[str, Any] | None = None,
+        ui_elements: list[dict[str, Any]] | None = None,
+        screenshot: bytes | None = None
+    ) -> AgentResult:
+        """Plan the first step of a task without executing anything.
+
+        Planning calls for independent tasks can be gathered concurrently
+        and the results passed to execute_task() as ``initial_plan``.
+
+        Args:
+            instruction: Natural language instruction
+            screen_info: Screen information
+            ui_elements: UI element hierarchy to plan against
+            screenshot: Screenshot to plan against
+
+        Returns:
+            Planner AgentResult
+        """
+        context = AgentContext(
+            task_id=str(uuid.uuid4()),
+            instruction=instruction,
+            screenshot=screenshot,
+            screen_info=screen_info,
+            ui_elements=ui_elements or []
+        )
+        context.metadata["completed_steps"] = []
+        return await self._run_agent_with_timeout(self.task_planner, context)
+
+    async def _plan_next_step(
+        self,
+        context: AgentContext
+    ) -> tuple[AgentResult | None, dict[str, Any] | None, asyncio.Task | None]:
+        """Run the planner, returning early if a step streams in first.
+
+        The planner reports each step through ``context.metadata["on_plan_step"]``
+        as soon as it is parsed from a streamed LLM response, so the first
+        action can start while the rest of the response is still generating.
+
+        Returns:
+            ``(plan_result, None, None)`` if the planner finished first, or
+            ``(None, first_step, plan_task)`` if a step arrived before the
+            planner finished; ``plan_task`` is still running and must be awaited
+        """
+        first_step: asyncio.Future = asyncio.get_running_loop().create_future()
+
+        def on_step(step: dict[str, Any]) -> None:
+            if not first_step.done():
+                first_step.set_result(step)
+
+        context.metadata["on_plan_step"] = on_step
+        plan_task = asyncio.create_task(
+            self._run_agent_with_timeout(self.task_planner, context)
+        )
+        await asyncio.wait({first_step, plan_task}, return_when=asyncio.FIRST_COMPLETED)
+
+        if plan_task.done():
+            return plan_task.result(), None, None
+        return None, first_step.result(), plan_task
+
+    async def _capture_state(self) -> tuple[list[dict[str, Any]] | None, bytes | None]:
+        """Capture UI hierarchy and screenshot concurrently.
+
+        The screenshot only feeds vision LLM calls, so a reduced JPEG
+        thumbnail is used when the controller provides one.
+
+        Returns:
+            Tuple of (ui_elements, screenshot); either is None if its capture failed
+        """
+        if hasattr(self.device_controller, "take_screenshot_thumbnail"):
+            shot = self.device_controller.take_screenshot_thumbnail()
+        else:
+            shot = self.device_controller.take_screenshot()
+        ui_result, shot_result = await asyncio.gather(
+            self.device_controller.get_ui_hierarchy(),
+            shot,
+            return_exceptions=True
+        )
+
+        ui_elements = None
+        if isinstance(ui_result, BaseException):
+            print(f"[Orchestrator] 获取UI失败: {ui_result}")
+        else:
+            ui_elements = ui_result
+
+        screenshot = None
+        if isinstance(shot_result, BaseException):
+            print(f"[Orchestrator] 获取截图失败: {shot_result}")
+        elif shot_result.success:
+            screenshot = shot_result.data.get("screenshot")
+
+        return ui_elements, screenshot
+
     async def _run_agent_with_timeout(
         self,
         agent: BaseAgent,
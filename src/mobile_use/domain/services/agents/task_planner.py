@@ -1,7 +1,9 @@
 """Task Planner Agent - Decomposes natural language into executable steps."""
 
+import json
+import re
 from dataclasses import dataclass, field
-from typing import Any, Protocol
+from typing import Any, Callable, Protocol
 
 from mobile_use.domain.services.agents.base import (
     AgentContext,
@@ -58,6 +60,64 @@ class TaskPlan:
         return step
 
 
+# 流式响应中 task_complete 字段的取值
+_TASK_COMPLETE_RE = re.compile(r'"task_complete"\s*:\s*(true|false)')
+
+
+class StepStreamParser:
+    """Incrementally extracts step objects from a streamed plan response.
+
+    Feeds text chunks of ``{"steps": [{...}, ...], ...}`` and returns
+    each step object as soon as its closing brace arrives, so the first
+    action is known before the rest of the response (e.g. ``reason``)
+    has been generated. Text outside the top-level object, such as
+    markdown code fences, is ignored.
+    """
+
+    def __init__(self) -> None:
+        self._buffer: list[str] = []
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._capturing = False
+
+    def feed(self, chunk: str) -> list[dict[str, Any]]:
+        """Consume a chunk and return any step objects completed by it."""
+        steps: list[dict[str, Any]] = []
+        for ch in chunk:
+            if self._capturing:
+                self._buffer.append(ch)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"' and self._stack:
+                self._in_string = True
+            elif ch in "{[":
+                # A step object opens directly inside the top-level array
+                if ch == "{" and self._stack == ["{", "["]:
+                    self._capturing = True
+                    self._buffer = ["{"]
+                self._stack.append(ch)
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+                if self._capturing and self._stack == ["{", "["]:
+                    self._capturing = False
+                    try:
+                        step = json.loads("".join(self._buffer))
+                    except ValueError:
+                        step = None
+                    if isinstance(step, dict):
+                        steps.append(step)
+        return steps
+
+
 class TaskPlannerAgent(BaseAgent):
     """Agent responsible for planning and decomposing tasks.
 
@@ -90,7 +150,7 @@ class TaskPlannerAgent(BaseAgent):
 - 如果UI元素包含"首页"、"推荐"、"搜索" = 在应用内
 
 输出JSON格式：
-{"steps": [{"action": "动作", "target": "元素名称", "parameters": {}, "description": "描述"}], "task_complete": false, "reason": "原因"}
+{"task_complete": false, "steps": [{"action": "动作", "target": "元素名称", "parameters": {}, "description": "描述"}], "reason": "原因"}
 
 可用操作：
 - tap: 点击元素
@@ -103,19 +163,19 @@ class TaskPlannerAgent(BaseAgent):
 用户指令："打开哔哩哔哩"
 当前UI元素：互联网、WLAN、蓝牙、设置
 返回：
-{"steps": [{"action": "home", "target": null, "parameters": {}, "description": "回到桌面"}], "task_complete": false, "reason": "当前在设置页面，需要先回到桌面找哔哩哔哩"}
+{"task_complete": false, "steps": [{"action": "home", "target": null, "parameters": {}, "description": "回到桌面"}], "reason": "当前在设置页面，需要先回到桌面找哔哩哔哩"}
 
 示例2 - 在桌面，目标不在屏幕：
 用户指令："打开哔哩哔哩"
 当前UI元素：微信、QQ、游戏中心（桌面图标，但没有哔哩哔哩）
 返回：
-{"steps": [{"action": "scroll", "target": null, "parameters": {"direction": "left"}, "description": "滑动桌面寻找哔哩哔哩"}], "task_complete": false, "reason": "在桌面但没找到哔哩哔哩，滑动寻找"}
+{"task_complete": false, "steps": [{"action": "scroll", "target": null, "parameters": {"direction": "left"}, "description": "滑动桌面寻找哔哩哔哩"}], "reason": "在桌面但没找到哔哩哔哩，滑动寻找"}
 
 示例3 - 找到目标应用：
 用户指令："打开哔哩哔哩"
 当前UI元素：哔哩哔哩、微信、QQ
 返回：
-{"steps": [{"action": "tap", "target": "哔哩哔哩", "parameters": {}, "description": "点击哔哩哔哩"}], "task_complete": false, "reason": "找到哔哩哔哩，点击打开"}
+{"task_complete": false, "steps": [{"action": "tap", "target": "哔哩哔哩", "parameters": {}, "description": "点击哔哩哔哩"}], "reason": "找到哔哩哔哩，点击打开"}
 """
 
     def __init__(self, llm_provider: LLMProvider | None = None):
@@ -225,11 +285,8 @@ class TaskPlannerAgent(BaseAgent):
         context: AgentContext
     ) -> TaskPlan:
         """Generate plan using LLM."""
-        import json
-
-        # 构建动态规划prompt
-        prompt = f"{self.SYSTEM_PROMPT}\n\n"
-        prompt += f"用户指令: {instruction}\n"
+        # 构建动态规划prompt（系统提示词作为固定前缀单独发送，便于服务端前缀缓存）
+        prompt = f"用户指令: {instruction}\n"
         
         # 添加已完成的步骤（详细信息）
         completed_steps = context.metadata.get("completed_steps", [])
@@ -243,7 +300,10 @@ class TaskPlannerAgent(BaseAgent):
                     prompt += f"  {i}. [{action}] {desc}"
                     if target:
                         prompt += f" (目标: {target})"
-                    prompt += " ✓\n"
+                    if step.get("success", True):
+                        prompt += " ✓\n"
+                    else:
+                        prompt += f" ✗ {step.get('error', '')}\n"
                 else:
                     prompt += f"  {i}. {step} ✓\n"
         else:
@@ -282,7 +342,11 @@ class TaskPlannerAgent(BaseAgent):
             
             # 注意：DeepSeek 不支持图片分析，只使用文本
             # 如果需要图片分析，请切换到支持视觉的模型（如 GPT-4V、Claude 等）
-            response = await self.llm_provider.generate(prompt)  # type: ignore
+            on_step = context.metadata.get("on_plan_step")
+            if on_step is not None and hasattr(self.llm_provider, "generate_stream"):
+                response = await self._generate_streaming(prompt, on_step)
+            else:
+                response = await self.llm_provider.generate(prompt, system_prompt=self.SYSTEM_PROMPT)  # type: ignore
             
             print(f"[TaskPlanner] LLM响应: {response[:300] if response else 'Empty'}")
             
@@ -322,6 +386,52 @@ class TaskPlannerAgent(BaseAgent):
             print(f"[TaskPlanner] 回退到简单规划")
             return self._generate_simple_plan(instruction)
 
+    async def _generate_streaming(
+        self,
+        prompt: str,
+        on_step: Callable[[dict[str, Any]], None]
+    ) -> str:
+        """Stream the LLM response, reporting each step as soon as it is parsed.
+
+        Steps are held back until the response has stated
+        ``"task_complete": false``; if the task is complete, or the field
+        never arrives, no step is reported and the caller acts on the
+        finished plan instead.
+
+        Args:
+            prompt: Planning prompt
+            on_step: Called with each step dict (same shape as in the plan result)
+
+        Returns:
+            Complete response text
+        """
+        parser = StepStreamParser()
+        chunks: list[str] = []
+        held: list[dict[str, Any]] = []
+        index = 0
+        task_complete: bool | None = None
+        async for chunk in self.llm_provider.generate_stream(prompt, system_prompt=self.SYSTEM_PROMPT):  # type: ignore
+            chunks.append(chunk)
+            for step_data in parser.feed(chunk):
+                held.append({
+                    "index": index,
+                    "action": step_data.get("action", "tap"),
+                    "target": step_data.get("target"),
+                    "parameters": step_data.get("parameters", {}),
+                    "description": step_data.get("description", ""),
+                    "expected_result": step_data.get("expected_result", "")
+                })
+                index += 1
+            if task_complete is None:
+                match = _TASK_COMPLETE_RE.search("".join(chunks))
+                if match:
+                    task_complete = match.group(1) == "true"
+            if task_complete is False:
+                for step in held:
+                    on_step(step)
+                held = []
+        return "".join(chunks)
+
     def _generate_simple_plan(self, instruction: str) -> TaskPlan:
         """Generate a simple plan without LLM (fallback)."""
         plan = TaskPlan(instruction=instruction, confidence=0.5)
@@ -461,7 +571,6 @@ class TaskPlannerAgent(BaseAgent):
 
     def _extract_text_to_input(self, instruction: str) -> str:
         """Extract text to input from instruction."""
-        import re
         # Look for text in quotes
         quoted = re.findall(r'["\'](.+?)["\']', instruction)
         if quoted:
@@ -1,6 +1,7 @@
 """Screen information value object."""
 
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Optional
 
 from mobile_use.domain.value_objects.point import Point
@@ -31,10 +32,28 @@ class ScreenInfo:
         if self.orientation not in ("portrait", "landscape"):
             raise ValueError("Orientation must be 'portrait' or 'landscape'")
     
-    @property
+    @cached_property
     def center(self) -> Point:
         """Get the center point of the screen."""
         return Point(self.width // 2, self.height // 2)
+
+    @cached_property
+    def swipe_endpoints(self) -> dict[str, tuple[Point, Point]]:
+        """Get (start, end) points for a swipe in each direction.
+
+        Vertical swipes run between 70% and 30% of the height through the
+        center column; horizontal swipes between 80% and 20% of the width
+        through the center row. Computed once per screen.
+        """
+        cx, cy = self.center.x, self.center.y
+        top, bottom = Point(cx, int(self.height * 0.3)), Point(cx, int(self.height * 0.7))
+        left, right = Point(int(self.width * 0.2), cy), Point(int(self.width * 0.8), cy)
+        return {
+            "up": (bottom, top),
+            "down": (top, bottom),
+            "left": (right, left),
+            "right": (left, right),
+        }
     
     @property
     def aspect_ratio(self) -> float:
@@ -0,0 +1,221 @@
+"""UI hierarchy index value object."""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable
+
+try:
+    import msgpack
+except ImportError:  # Optional: fall back to JSON bytes
+    msgpack = None
+
+
+ElementPredicate = Callable[[dict[str, Any]], bool]
+
+
+@dataclass(frozen=True)
+class UIIndex:
+    """Lookup index over a single UI hierarchy snapshot.
+
+    Built once per snapshot so repeated text/id/class queries become
+    dict lookups instead of full scans with ``.get(...) or ...`` chains.
+    Text matching keeps the semantics of the plain scans it replaces:
+    an element's label is its text, falling back to its content_desc,
+    and the first label in document order containing the query wins.
+    """
+
+    elements: list[dict[str, Any]] = field(default_factory=list)
+    by_id: dict[str, dict[str, Any]] = field(default_factory=dict)
+    by_class: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+    haystack: list[tuple[str, dict[str, Any]]] = field(default_factory=list)
+    _masks: dict[int, int] = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def build(cls, elements: list[dict[str, Any]]) -> "UIIndex":
+        """Build an index from a ``get_ui_hierarchy()`` element list.
+
+        Args:
+            elements: Element dicts in document order
+
+        Returns:
+            New UIIndex instance
+        """
+        by_id: dict[str, dict[str, Any]] = {}
+        by_class: dict[str, list[dict[str, Any]]] = {}
+        haystack: list[tuple[str, dict[str, Any]]] = []
+
+        for elem in elements:
+            text = elem.get("text") or ""
+            desc = elem.get("content_desc") or ""
+            elem_id = elem.get("id")
+            if elem_id:
+                by_id.setdefault(elem_id, elem)
+            class_name = elem.get("class_name")
+            if class_name:
+                by_class.setdefault(class_name, []).append(elem)
+            label = text or desc
+            if label:
+                haystack.append((label, elem))
+
+        return cls(
+            elements=elements,
+            by_id=by_id,
+            by_class=by_class,
+            haystack=haystack
+        )
+
+    def find_text(
+        self,
+        text: str,
+        predicate: ElementPredicate | None = None
+    ) -> dict[str, Any] | None:
+        """Find the first element (in document order) whose label contains ``text``.
+
+        Scans the precomputed labels, so each element's text/desc fallback
+        is resolved once per snapshot rather than on every query.
+
+        Args:
+            text: Text to search for
+            predicate: Optional extra filter (e.g. clickable only)
+
+        Returns:
+            Matching element dict or None
+        """
+        for label, elem in self.haystack:
+            if label.find(text) != -1 and (predicate is None or predicate(elem)):
+                return elem
+        return None
+
+    def find_id(self, element_id: str) -> dict[str, Any] | None:
+        """Find an element whose resource id contains ``element_id``."""
+        exact = self.by_id.get(element_id)
+        if exact is not None:
+            return exact
+        for elem_id, elem in self.by_id.items():
+            if element_id in elem_id:
+                return elem
+        return None
+
+    def find_class(self, class_fragment: str) -> dict[str, Any] | None:
+        """Find the first element whose class name contains ``class_fragment``."""
+        exact = self.by_class.get(class_fragment)
+        if exact:
+            return exact[0]
+        for class_name, elems in self.by_class.items():
+            if class_fragment in class_name:
+                return elems[0]
+        return None
+
+    @cached_property
+    def clickable_labeled(self) -> list[dict[str, Any]]:
+        """Clickable elements that have a text or content_desc label.
+
+        Computed on first access and cached for the snapshot's lifetime.
+        """
+        return [elem for _, elem in self.haystack if elem.get("clickable")]
+
+    @cached_property
+    def clickable_by_position(self) -> list[dict[str, Any]]:
+        """Clickable elements with a center, ordered top-to-bottom then left-to-right."""
+        clickable = [elem for elem in self.elements if elem.get("clickable") and elem.get("center")]
+        clickable.sort(key=lambda e: (e["center"][1], e["center"][0]))
+        return clickable
+
+    @cached_property
+    def texts_lower(self) -> list[str]:
+        """Lowercased text of each element, by position."""
+        return [(elem.get("text") or "").lower() for elem in self.elements]
+
+    @cached_property
+    def descs_lower(self) -> list[str]:
+        """Lowercased content_desc of each element, by position."""
+        return [(elem.get("content_desc") or "").lower() for elem in self.elements]
+
+    @cached_property
+    def packages(self) -> list[str]:
+        """Package of each element (the ``package`` key or its resource-id prefix)."""
+        packages: list[str] = []
+        for elem in self.elements:
+            package = elem.get("package") or ""
+            elem_id = elem.get("id") or ""
+            if not package and ":" in elem_id:
+                package = elem_id.partition(":")[0]
+            packages.append(package.lower())
+        return packages
+
+    def clickable_mask(self, min_y: int = 0) -> int:
+        """Bitmask of clickable elements whose center y is at least ``min_y``.
+
+        Bit ``i`` is set for the element at position ``i``. Computed once
+        per threshold, so membership checks become a shift and an AND.
+        """
+        mask = self._masks.get(min_y)
+        if mask is None:
+            mask = 0
+            for i, elem in enumerate(self.elements):
+                if elem.get("clickable") and (elem.get("center") or (0, 0))[1] >= min_y:
+                    mask |= 1 << i
+            self._masks[min_y] = mask
+        return mask
+
+    @cached_property
+    def by_exact_lower(self) -> dict[str, list[int]]:
+        """Element positions keyed by lowercased text and content_desc."""
+        postings: dict[str, list[int]] = {}
+        for i, (text, desc) in enumerate(zip(self.texts_lower, self.descs_lower)):
+            if text:
+                postings.setdefault(text, []).append(i)
+            if desc and desc != text:
+                postings.setdefault(desc, []).append(i)
+        return postings
+
+    @cached_property
+    def by_shingle(self) -> dict[str, set[int]]:
+        """Inverted index from lowercased 2-character shingles to element positions."""
+        postings: dict[str, set[int]] = {}
+        for i, (text, desc) in enumerate(zip(self.texts_lower, self.descs_lower)):
+            for label in (text, desc):
+                for j in range(len(label) - 1):
+                    postings.setdefault(label[j:j + 2], set()).add(i)
+        return postings
+
+    def positions_containing(self, needle: str) -> set[int]:
+        """Positions of elements whose lowercased text or desc contains ``needle``.
+
+        Candidates come from intersecting the needle's shingle postings and
+        are then confirmed with a substring check.
+
+        Args:
+            needle: Lowercased search string
+        """
+        if len(needle) < 2:
+            return {
+                i for i, (text, desc) in enumerate(zip(self.texts_lower, self.descs_lower))
+                if needle in text or needle in desc
+            }
+
+        postings = [self.by_shingle.get(needle[j:j + 2]) for j in range(len(needle) - 1)]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        texts, descs = self.texts_lower, self.descs_lower
+        return {i for i in candidates if needle in texts[i] or needle in descs[i]}
+
+    @cached_property
+    def packed(self) -> bytes:
+        """Snapshot serialized once (msgpack when installed, else JSON bytes)."""
+        if msgpack is not None:
+            return msgpack.packb(self.elements, use_bin_type=True)
+        return json.dumps(self.elements, ensure_ascii=False).encode("utf-8")
+
+    @cached_property
+    def digest(self) -> bytes:
+        """Content hash of the snapshot, used to detect UI changes."""
+        return hashlib.blake2b(self.packed).digest()
+
+    def __len__(self) -> int:
+        """Number of elements in the snapshot."""
+        return len(self.elements)
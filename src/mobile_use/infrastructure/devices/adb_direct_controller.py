@@ -0,0 +1,221 @@
+"""Direct ADB input backend using one persistent shell session."""
+
+import asyncio
+import shlex
+from typing import Any
+
+from mobile_use.domain.value_objects.point import Point
+from mobile_use.infrastructure.devices.base_controller import ActionResult, ActionType
+
+
+class AdbDirectController:
+    """Sends input events through a long-lived ``adb shell`` process.
+
+    Commands are written to the shell's stdin and each is followed by an
+    echo of its exit status, so every action costs one write/read on an
+    already-open connection instead of a new adb (or UIAutomator2 HTTP)
+    round-trip. Only the action subset used by ``ActionExecutorAgent`` is
+    implemented; callers should fall back to a full controller when an
+    action returns ``success=False``.
+    """
+
+    # Marker echoed with the exit status after each command
+    _DONE_MARKER = "__mu_done__"
+    # Marker echoed after each successful command in run_batch
+    _STEP_MARKER = "__mu_step__"
+
+    # Executor key names that differ from Android KEYCODE_* names
+    _KEY_ALIASES = {
+        "RECENT": "APP_SWITCH",
+        "UP": "DPAD_UP",
+        "DOWN": "DPAD_DOWN",
+        "LEFT": "DPAD_LEFT",
+        "RIGHT": "DPAD_RIGHT",
+        "CENTER": "DPAD_CENTER",
+    }
+
+    def __init__(self, serial: str, adb_path: str = "adb", timeout: float = 10.0):
+        self.serial = serial
+        self.adb_path = adb_path
+        self.timeout = timeout
+        self._proc: asyncio.subprocess.Process | None = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_shell(self) -> asyncio.subprocess.Process:
+        """Start the persistent shell if it is not running."""
+        if self._proc is None or self._proc.returncode is not None:
+            self._proc = await asyncio.create_subprocess_exec(
+                self.adb_path, "-s", self.serial, "shell",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT
+            )
+        return self._proc
+
+    async def run(self, command: str) -> tuple[int, str]:
+        """Run one shell command on the device.
+
+        Args:
+            command: Shell command line
+
+        Returns:
+            Tuple of (exit status, combined output)
+        """
+        async with self._lock:
+            proc = await self._ensure_shell()
+            proc.stdin.write(f"{command}; echo {self._DONE_MARKER}$?\n".encode("utf-8"))
+            await proc.stdin.drain()
+
+            output: list[str] = []
+            try:
+                while True:
+                    line = await asyncio.wait_for(proc.stdout.readline(), self.timeout)
+                    if not line:
+                        raise ConnectionError("adb shell exited")
+                    text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+                    head, marker, status = text.partition(self._DONE_MARKER)
+                    if head:
+                        output.append(head)
+                    if marker:
+                        return int(status or 1), "\n".join(output)
+            except BaseException:
+                # The session is out of sync with its output; start a fresh one next time
+                await self._kill()
+                raise
+
+    async def run_batch(self, commands: list[str], gap_s: float = 0.3) -> tuple[int, str]:
+        """Run several commands as one ``&&``-chained script.
+
+        Execution stops at the first failing command.
+
+        Args:
+            commands: Shell commands, e.g. from ``tap_command()``
+            gap_s: Pause between commands so the UI can react
+
+        Returns:
+            Tuple of (number of commands that succeeded, combined output)
+        """
+        parts: list[str] = []
+        for i, command in enumerate(commands):
+            if i and gap_s > 0:
+                parts.append(f"sleep {gap_s:g}")
+            parts.append(command)
+            parts.append(f"echo {self._STEP_MARKER}")
+        _, output = await self.run(" && ".join(parts))
+        return output.count(self._STEP_MARKER), output.replace(self._STEP_MARKER, "").strip()
+
+    @staticmethod
+    def tap_command(point: Point) -> str:
+        """Build the shell command for a tap."""
+        return f"input tap {point.x} {point.y}"
+
+    @staticmethod
+    def text_command(text: str) -> str | None:
+        """Build the shell command for typing text, or None if it is not ASCII.
+
+        ``input text`` cannot type non-ASCII characters; such text must go
+        through an IME-based controller.
+        """
+        if not text.isascii():
+            return None
+        # `input text` treats %s as a space
+        return f"input text {shlex.quote(text.replace(' ', '%s'))}"
+
+    @classmethod
+    def key_command(cls, key: str) -> str:
+        """Build the shell command for a key press by name (e.g. ``BACK``)."""
+        name = key.upper()
+        return f"input keyevent KEYCODE_{cls._KEY_ALIASES.get(name, name)}"
+
+    async def _input(self, action_type: ActionType, command: str, data: dict[str, Any]) -> ActionResult:
+        """Run an ``input`` command and wrap its status in an ActionResult."""
+        try:
+            status, output = await self.run(command)
+        except Exception as e:
+            return ActionResult(success=False, action_type=action_type, error=str(e))
+        if status != 0:
+            return ActionResult(
+                success=False,
+                action_type=action_type,
+                error=output or f"exit status {status}"
+            )
+        return ActionResult(success=True, action_type=action_type, data=data)
+
+    async def tap(self, point: Point) -> ActionResult:
+        """Tap at the specified point."""
+        return await self._input(ActionType.TAP, self.tap_command(point), {"x": point.x, "y": point.y})
+
+    async def swipe(self, start: Point, end: Point, duration_ms: int = 500) -> ActionResult:
+        """Swipe from start point to end point."""
+        return await self._input(
+            ActionType.SWIPE,
+            f"input swipe {start.x} {start.y} {end.x} {end.y} {int(duration_ms)}",
+            {
+                "start": {"x": start.x, "y": start.y},
+                "end": {"x": end.x, "y": end.y},
+                "duration_ms": duration_ms
+            }
+        )
+
+    async def input_text(self, text: str) -> ActionResult:
+        """Type ASCII text into the focused field (non-ASCII is rejected)."""
+        command = self.text_command(text)
+        if command is None:
+            return ActionResult(
+                success=False,
+                action_type=ActionType.INPUT_TEXT,
+                error="Non-ASCII text is not supported by 'input text'"
+            )
+        return await self._input(ActionType.INPUT_TEXT, command, {"text": text})
+
+    async def press_key(self, key: str) -> ActionResult:
+        """Press a key by name (e.g. ``BACK``, ``HOME``, ``ENTER``)."""
+        return await self._input(ActionType.PRESS_KEY, self.key_command(key), {"key": key})
+
+    async def take_screenshot(self, save_path: str | None = None) -> ActionResult:
+        """Capture a PNG screenshot with ``adb exec-out screencap -p``."""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                self.adb_path, "-s", self.serial, "exec-out", "screencap", "-p",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            screenshot_data, stderr = await asyncio.wait_for(proc.communicate(), self.timeout)
+            if proc.returncode != 0 or not screenshot_data.startswith(b"\x89PNG"):
+                raise RuntimeError(stderr.decode("utf-8", errors="replace") or "screencap failed")
+
+            if save_path:
+                await asyncio.to_thread(_write_file, save_path, screenshot_data)
+
+            return ActionResult(
+                success=True,
+                action_type=ActionType.SCREENSHOT,
+                data={"screenshot": screenshot_data, "path": save_path},
+                screenshot_path=save_path
+            )
+        except Exception as e:
+            return ActionResult(success=False, action_type=ActionType.SCREENSHOT, error=str(e))
+
+    async def _kill(self) -> None:
+        """Terminate the shell process."""
+        proc, self._proc = self._proc, None
+        if proc is not None and proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+    async def close(self) -> None:
+        """Close the persistent shell session."""
+        async with self._lock:
+            if self._proc is not None and self._proc.returncode is None:
+                self._proc.stdin.close()
+                try:
+                    await asyncio.wait_for(self._proc.wait(), 2.0)
+                except asyncio.TimeoutError:
+                    pass
+            await self._kill()
+
+
+def _write_file(path: str, data: bytes) -> None:
+    """Write bytes to a file (blocking, run in a thread)."""
+    with open(path, "wb") as f:
+        f.write(data)
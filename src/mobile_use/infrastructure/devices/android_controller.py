@@ -2,7 +2,9 @@
 
 import asyncio
 import io
-from typing import Any
+import re
+import xml.etree.ElementTree as ET
+from typing import Any, AsyncIterator, Callable
 
 from mobile_use.domain.entities.device import Device, DevicePlatform, DeviceStatus
 from mobile_use.domain.value_objects.point import Point
@@ -15,6 +17,18 @@ from mobile_use.infrastructure.devices.base_controller import (
     UIElement,
 )
 
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # Optional: fall back to xml.etree
+    lxml_etree = None
+
+# Bounds string like "[0,0][100,100]"
+_BOUNDS_RE = re.compile(r'\[(\d+),(\d+)\]\[(\d+),(\d+)\]')
+
+if lxml_etree is not None:
+    _LXML_PARSER = lxml_etree.XMLParser(huge_tree=True, collect_ids=False)
+    _XP_NODES = lxml_etree.XPath("//node")
+
 
 class AndroidController(DeviceController):
     """Android device controller using UIAutomator2.
@@ -23,6 +37,35 @@ class AndroidController(DeviceController):
     through the UIAutomator2 framework and ADB.
     """
 
+    # Android keycodes for `input keyevent`
+    KEYCODES = {
+        "HOME": 3,
+        "BACK": 4,
+        "VOLUME_UP": 24,
+        "VOLUME_DOWN": 25,
+        "POWER": 26,
+        "ENTER": 66,
+        "MENU": 82,
+        "RECENT": 187,
+    }
+
+    # Marker echoed after each successful command in shell_batch
+    _BATCH_MARKER = "__mu_ok__"
+
+    # One on-device pipeline for snapshot(): stale files are removed, then
+    # screencap and uiautomator dump run concurrently and both files are
+    # streamed back split by a marker. If either command fails (or leaves an
+    # empty file) the script exits before printing anything.
+    _SNAPSHOT_SEP = b"\n__mu_snapshot_sep__\n"
+    _SNAPSHOT_SCRIPT = (
+        "rm -f /data/local/tmp/mu_s.png /data/local/tmp/mu_u.xml; "
+        "screencap -p /data/local/tmp/mu_s.png & pid=$!; "
+        "uiautomator dump /data/local/tmp/mu_u.xml > /dev/null && wait $pid "
+        "&& [ -s /data/local/tmp/mu_s.png ] && [ -s /data/local/tmp/mu_u.xml ] || exit 1; "
+        "cat /data/local/tmp/mu_s.png; echo; echo __mu_snapshot_sep__; "
+        "cat /data/local/tmp/mu_u.xml"
+    )
+
     def __init__(self, device: Device, adb_host: str = "localhost", adb_port: int = 5037):
         super().__init__(device)
         self.adb_host = adb_host
@@ -119,18 +162,8 @@ class AndroidController(DeviceController):
             )
 
         try:
-            # Get screenshot as PIL Image
-            image = self._u2_device.screenshot()
-
-            # Convert to bytes
-            img_bytes = io.BytesIO()
-            image.save(img_bytes, format="PNG")
-            screenshot_data = img_bytes.getvalue()
-
-            # Save to file if path provided
-            if save_path:
-                with open(save_path, "wb") as f:
-                    f.write(screenshot_data)
+            # Capture, PNG-encode and write off the event loop
+            screenshot_data = await asyncio.to_thread(self._capture_png, save_path)
 
             return ActionResult(
                 success=True,
@@ -146,6 +179,123 @@ class AndroidController(DeviceController):
                 error=str(e)
             )
 
+    def _capture_png(self, save_path: str | None = None) -> bytes:
+        """Capture the screen and encode it as PNG (blocking, run in a thread)."""
+        image = self._u2_device.screenshot()
+
+        img_bytes = io.BytesIO()
+        image.save(img_bytes, format="PNG")
+        screenshot_data = img_bytes.getvalue()
+
+        if save_path:
+            with open(save_path, "wb") as f:
+                f.write(screenshot_data)
+
+        return screenshot_data
+
+    def _capture_jpeg_thumbnail(self, max_width: int, quality: int) -> bytes:
+        """Capture the screen as a downscaled JPEG (blocking, run in a thread)."""
+        image = self._u2_device.screenshot()
+
+        if image.width > max_width:
+            height = int(image.height * max_width / image.width)
+            image = image.resize((max_width, height))
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        img_bytes = io.BytesIO()
+        image.save(img_bytes, format="JPEG", quality=quality)
+        return img_bytes.getvalue()
+
+    def _read_snapshot(self) -> tuple[bytes, str]:
+        """Run the snapshot pipeline and split its output (blocking).
+
+        Uses the ``exec:`` service (as ``adb exec-out`` does) rather than
+        ``shell:``, so binary PNG data is not mangled by a PTY's newline
+        translation on older devices.
+        """
+        conn = self._u2_device.adb_device.open_transport()
+        conn.send_command("exec:" + self._SNAPSHOT_SCRIPT)
+        conn.check_okay()
+        sock = getattr(conn, "conn", conn)
+        chunks: list[bytes] = []
+        try:
+            while True:
+                chunk = sock.recv(1 << 16)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            conn.close()
+
+        output = b"".join(chunks)
+        if not output:
+            raise RuntimeError("Snapshot pipeline failed (screencap or uiautomator dump)")
+        png, sep, xml = output.rpartition(self._SNAPSHOT_SEP)
+        if not sep or not png.startswith(b"\x89PNG") or b"<hierarchy" not in xml:
+            raise ValueError("Malformed snapshot output")
+        return png, xml.decode("utf-8", errors="replace")
+
+    async def snapshot(self) -> tuple[bytes | None, list[dict[str, Any]]]:
+        """Capture a PNG screenshot and the UI hierarchy in one adb round-trip.
+
+        Falls back to separate ``take_screenshot()`` / ``get_ui_hierarchy()``
+        calls when the device-side pipeline fails (e.g. ``uiautomator dump``
+        is blocked while the UIAutomator2 service holds the accessibility
+        connection).
+
+        Returns:
+            Tuple of (PNG bytes or None, element dicts)
+        """
+        if not await self.is_connected():
+            return None, []
+
+        try:
+            png, xml_content = await asyncio.to_thread(self._read_snapshot)
+            return png, self._parse_hierarchy(xml_content)
+        except Exception:
+            pass
+
+        screenshot_result, elements = await asyncio.gather(
+            self.take_screenshot(),
+            self.get_ui_hierarchy()
+        )
+        screenshot = screenshot_result.data.get("screenshot") if screenshot_result.success else None
+        return screenshot, elements
+
+    async def take_screenshot_thumbnail(self, max_width: int = 540, quality: int = 70) -> ActionResult:
+        """Take a reduced-resolution JPEG screenshot for LLM input.
+
+        Args:
+            max_width: Maximum output width in pixels (aspect ratio kept)
+            quality: JPEG quality (1-95)
+
+        Returns:
+            ActionResult with JPEG bytes in data["screenshot"]
+        """
+        if not await self.is_connected():
+            return ActionResult(
+                success=False,
+                action_type=ActionType.SCREENSHOT,
+                error="Device not connected"
+            )
+
+        try:
+            screenshot_data = await asyncio.to_thread(self._capture_jpeg_thumbnail, max_width, quality)
+
+            return ActionResult(
+                success=True,
+                action_type=ActionType.SCREENSHOT,
+                data={"screenshot": screenshot_data, "format": "jpeg"}
+            )
+
+        except Exception as e:
+            return ActionResult(
+                success=False,
+                action_type=ActionType.SCREENSHOT,
+                error=str(e)
+            )
+
     async def tap(self, point: Point) -> ActionResult:
         """Tap at the specified point."""
         if not await self.is_connected():
@@ -290,6 +440,52 @@ class AndroidController(DeviceController):
                 error=str(e)
             )
 
+    async def shell_batch(self, commands: list[str]) -> ActionResult:
+        """Run several shell commands in a single adb round-trip.
+
+        Commands are chained with ``&&`` so execution stops at the first
+        failure; ``data["completed"]`` is the number that succeeded.
+
+        Args:
+            commands: Shell commands, e.g. ``["input keyevent 4", "sleep 0.5"]``
+
+        Returns:
+            ActionResult with completed count and combined output
+        """
+        if not await self.is_connected():
+            return ActionResult(
+                success=False,
+                action_type=ActionType.SHELL,
+                error="Device not connected",
+                data={"completed": 0}
+            )
+
+        parts: list[str] = []
+        for i, command in enumerate(commands):
+            parts.append(command)
+            parts.append(f"echo {self._BATCH_MARKER}{i}")
+        script = " && ".join(parts)
+
+        try:
+            output, exit_code = await asyncio.to_thread(self._u2_device.shell, script)
+            completed = output.count(self._BATCH_MARKER)
+            success = exit_code == 0 and completed == len(commands)
+
+            return ActionResult(
+                success=success,
+                action_type=ActionType.SHELL,
+                data={"completed": completed, "output": output, "exit_code": exit_code},
+                error=None if success else f"Command {completed + 1} failed: {commands[min(completed, len(commands) - 1)]}"
+            )
+
+        except Exception as e:
+            return ActionResult(
+                success=False,
+                action_type=ActionType.SHELL,
+                error=str(e),
+                data={"completed": 0}
+            )
+
     async def find_elements(self, selector: ElementSelector) -> list[UIElement]:
         """Find UI elements matching the selector."""
         if not await self.is_connected():
@@ -391,71 +587,122 @@ class AndroidController(DeviceController):
         if not await self.is_connected():
             return []
 
-        elements: list[dict[str, Any]] = []
-
         try:
-            # Get XML hierarchy - 使用 compressed=False 获取完整层级
-            # 使用 all=True 尝试获取所有窗口（包括浮层/弹窗）
-            try:
-                xml_content = self._u2_device.dump_hierarchy(compressed=False)
-            except Exception:
-                # 如果失败，回退到默认方式
-                xml_content = self._u2_device.dump_hierarchy()
-            
-            # 调试：保存原始XML
-            if save_xml:
-                with open("ui_hierarchy.xml", "w", encoding="utf-8") as f:
-                    f.write(xml_content)
-                print(f"[UI] XML已保存到 ui_hierarchy.xml")
-
-            # Parse XML to extract elements
-            import xml.etree.ElementTree as ET
-            root = ET.fromstring(xml_content)
-
-            def parse_node(node: ET.Element) -> None:
-                bounds_str = node.get("bounds", "[0,0][0,0]")
-                # Parse bounds string like "[0,0][100,100]"
-                import re
-                match = re.findall(r'\[(\d+),(\d+)\]', bounds_str)
-                if len(match) >= 2:
-                    left, top = int(match[0][0]), int(match[0][1])
-                    right, bottom = int(match[1][0]), int(match[1][1])
-                    center = ((left + right) // 2, (top + bottom) // 2)
-                else:
-                    left = top = right = bottom = 0
-                    center = (0, 0)
-
-                elem = {
-                    "id": node.get("resource-id"),
-                    "text": node.get("text"),
-                    "content_desc": node.get("content-desc"),
-                    "class_name": node.get("class"),
-                    "bounds": (left, top, right, bottom),
-                    "center": center,
-                    "clickable": node.get("clickable") == "true",
-                    "scrollable": node.get("scrollable") == "true",
-                    "enabled": node.get("enabled") == "true",
-                    "visible": True
-                }
+            # Dump off the event loop so it can overlap other device/network I/O
+            xml_content = await asyncio.to_thread(self._dump_hierarchy_xml, save_xml)
+            return self._parse_hierarchy(xml_content)
+        except Exception:
+            return []
 
-                # 添加有标识信息的元素，或者可点击的元素，或者输入框
-                has_identity = elem["text"] or elem["content_desc"] or elem["id"]
-                is_interactive = elem["clickable"] and (right - left) > 10 and (bottom - top) > 10
-                class_lower = (elem["class_name"] or "").lower()
-                is_input = "edittext" in class_lower or "input" in class_lower
-                
-                if has_identity or is_interactive or is_input:
-                    elements.append(elem)
+    def _parse_hierarchy(self, xml_content: str) -> list[dict[str, Any]]:
+        """Parse hierarchy XML into element dicts (document order).
 
-                for child in node:
-                    parse_node(child)
+        Uses libxml2 via lxml with a precompiled XPath when installed.
+        """
+        elements: list[dict[str, Any]] = []
+        if lxml_etree is not None:
+            nodes = _XP_NODES(lxml_etree.fromstring(xml_content.encode("utf-8"), _LXML_PARSER))
+        else:
+            nodes = ET.fromstring(xml_content).iter("node")
+        for node in nodes:
+            elem = self._node_to_element(node.attrib)
+            if elem is not None:
+                elements.append(elem)
+        return elements
 
-            parse_node(root)
+    async def iter_ui_hierarchy(
+        self,
+        predicate: Callable[[dict[str, Any]], bool] | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream UI elements matching ``predicate`` in document order.
+
+        The device returns the whole dump as one string, so the dump itself
+        is not streamed; nodes are then parsed from it incrementally and
+        released as soon as they are closed, so callers that stop at the
+        first hit skip parsing the rest of the document and building its
+        element dicts.
+
+        Args:
+            predicate: Optional filter applied to each element dict
+
+        Yields:
+            Element dicts with the same shape as ``get_ui_hierarchy()``
+        """
+        if not await self.is_connected():
+            return
 
+        try:
+            xml_content = await asyncio.to_thread(self._dump_hierarchy_xml)
+            events = ET.iterparse(io.StringIO(xml_content), events=("start", "end"))
         except Exception:
-            pass
+            return
 
-        return elements
+        try:
+            for event, node in events:
+                if event == "end":
+                    node.clear()
+                    continue
+                elem = self._node_to_element(node.attrib)
+                if elem is not None and (predicate is None or predicate(elem)):
+                    yield elem
+        except ET.ParseError:
+            return
+
+    def _dump_hierarchy_xml(self, save_xml: bool = False) -> str:
+        """Dump the raw UI hierarchy XML from the device."""
+        # Get XML hierarchy - 使用 compressed=False 获取完整层级
+        # 使用 all=True 尝试获取所有窗口（包括浮层/弹窗）
+        try:
+            xml_content = self._u2_device.dump_hierarchy(compressed=False)
+        except Exception:
+            # 如果失败，回退到默认方式
+            xml_content = self._u2_device.dump_hierarchy()
+
+        # 调试：保存原始XML
+        if save_xml:
+            with open("ui_hierarchy.xml", "w", encoding="utf-8") as f:
+                f.write(xml_content)
+            print(f"[UI] XML已保存到 ui_hierarchy.xml")
+
+        return xml_content
+
+    @staticmethod
+    def _node_to_element(attrib: dict[str, str]) -> dict[str, Any] | None:
+        """Convert a hierarchy node's attributes to an element dict.
+
+        Returns None for nodes that carry no identity and are neither
+        interactive nor input fields.
+        """
+        match = _BOUNDS_RE.match(attrib.get("bounds", ""))
+        if match:
+            left, top, right, bottom = map(int, match.groups())
+            center = ((left + right) // 2, (top + bottom) // 2)
+        else:
+            left = top = right = bottom = 0
+            center = (0, 0)
+
+        elem = {
+            "id": attrib.get("resource-id"),
+            "text": attrib.get("text"),
+            "content_desc": attrib.get("content-desc"),
+            "class_name": attrib.get("class"),
+            "bounds": (left, top, right, bottom),
+            "center": center,
+            "clickable": attrib.get("clickable") == "true",
+            "scrollable": attrib.get("scrollable") == "true",
+            "enabled": attrib.get("enabled") == "true",
+            "visible": True
+        }
+
+        # 添加有标识信息的元素，或者可点击的元素，或者输入框
+        has_identity = elem["text"] or elem["content_desc"] or elem["id"]
+        is_interactive = elem["clickable"] and (right - left) > 10 and (bottom - top) > 10
+        class_lower = (elem["class_name"] or "").lower()
+        is_input = "edittext" in class_lower or "input" in class_lower
+
+        if has_identity or is_interactive or is_input:
+            return elem
+        return None
 
     async def launch_app(self, package_name: str) -> ActionResult:
         """Launch an app by package name."""
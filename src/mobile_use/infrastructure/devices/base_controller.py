@@ -19,6 +19,7 @@ class ActionType(Enum):
     LONG_PRESS = "long_press"
     SCROLL = "scroll"
     SCREENSHOT = "screenshot"
+    SHELL = "shell"
 
 
 @dataclass
@@ -1,13 +1,17 @@
 """LLM providers and integrations."""
 
 from mobile_use.infrastructure.llm.base import BaseLLMProvider, LLMConfig, LLMResponse
+from mobile_use.infrastructure.llm.cache import CachedLLMProvider
 from mobile_use.infrastructure.llm.openai_provider import OpenAIProvider
 from mobile_use.infrastructure.llm.factory import LLMFactory
+from mobile_use.infrastructure.llm.rate_limit import LLMGate
 
 __all__ = [
     "BaseLLMProvider",
+    "CachedLLMProvider",
     "LLMConfig",
     "LLMResponse",
     "OpenAIProvider",
     "LLMFactory",
+    "LLMGate",
 ]
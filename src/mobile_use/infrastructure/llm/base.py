@@ -3,7 +3,7 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from typing import Any, AsyncIterator
 
 
 class LLMProviderType(Enum):
@@ -25,6 +25,10 @@ class LLMConfig:
     max_tokens: int | None = None
     timeout: int = 30
     retry_attempts: int = 3
+    max_concurrency: int = 10
+    qpm: int | None = 500  # requests per minute, None to disable
+    tpm: int | None = None  # tokens per minute, None to disable
+    vision_downscale: int = 1  # >1: send images as grayscale, 1/N size per side
     extra_params: dict[str, Any] = field(default_factory=dict)
 
     def __post_init__(self) -> None:
@@ -33,6 +37,10 @@ class LLMConfig:
             raise ValueError("Temperature must be between 0 and 2")
         if self.max_tokens is not None and self.max_tokens <= 0:
             raise ValueError("Max tokens must be positive")
+        if self.max_concurrency <= 0:
+            raise ValueError("Max concurrency must be positive")
+        if self.vision_downscale < 1:
+            raise ValueError("Vision downscale must be at least 1")
 
 
 @dataclass
@@ -111,6 +119,27 @@ class BaseLLMProvider(ABC):
         """
         pass
 
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Generate text from a prompt, yielding content as it arrives.
+
+        Providers without native streaming yield the complete response
+        as a single chunk.
+
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            **kwargs: Additional provider-specific parameters
+
+        Yields:
+            Generated text fragments in order
+        """
+        yield await self.generate(prompt, system_prompt, **kwargs)
+
     @abstractmethod
     async def chat(
         self,
@@ -147,6 +176,14 @@ class BaseLLMProvider(ABC):
         """
         pass
 
+    async def warmup(self) -> None:
+        """Open a connection ahead of an expected request.
+
+        Lets callers hide connection setup behind other work. The default
+        is a no-op; it must never raise.
+        """
+        return None
+
     async def generate_with_retry(
         self,
         prompt: str,
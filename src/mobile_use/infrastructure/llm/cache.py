@@ -0,0 +1,219 @@
+"""Response caching wrapper for LLM providers."""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator
+
+from mobile_use.infrastructure.llm.base import (
+    BaseLLMProvider,
+    LLMMessage,
+    LLMResponse,
+)
+
+
+class _LRUStore:
+    """Minimal LRU mapping used when cachetools is not installed."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, Any] = OrderedDict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        return self._data.pop(key, default)
+
+
+class CachedLLMProvider(BaseLLMProvider):
+    """Exact-match response cache in front of another LLM provider.
+
+    Keys are derived from the model, temperature and full message
+    content, so only byte-identical requests are served from cache.
+    Entries live in a local LFU cache (LRU if cachetools is missing)
+    and, when ``redis_url`` is given, in Redis with the same TTL.
+    """
+
+    def __init__(
+        self,
+        provider: BaseLLMProvider,
+        ttl: int = 3600,
+        maxsize: int = 512,
+        redis_url: str | None = None
+    ):
+        super().__init__(provider.config)
+        self.provider = provider
+        self.ttl = ttl
+        self.redis_url = redis_url
+        self._redis: Any = None
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            from cachetools import LFUCache
+            self._local: Any = LFUCache(maxsize=maxsize)
+        except ImportError:
+            self._local = _LRUStore(maxsize)
+
+    async def initialize(self) -> None:
+        """Initialize the wrapped provider and optional Redis store."""
+        await self.provider.initialize()
+        if self.redis_url and self._redis is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise ImportError(
+                    "redis package not installed. "
+                    "Install with: pip install redis"
+                )
+            self._redis = redis.from_url(self.redis_url)
+        self._initialized = True
+
+    def _make_key(self, kind: str, payload: Any, temperature: float) -> str:
+        """Build the cache key from model, payload and temperature."""
+        raw = self.config.model + json.dumps(payload, sort_keys=True, ensure_ascii=False) + str(temperature)
+        return f"llm:{kind}:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    async def _get(self, key: str) -> Any:
+        """Look up a cached value locally, then in Redis."""
+        entry = self._local.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                return value
+            self._local.pop(key, None)
+
+        if self._redis is not None:
+            raw = await self._redis.get(key)
+            if raw is not None:
+                value = json.loads(raw)
+                self._local[key] = (time.monotonic() + self.ttl, value)
+                return value
+        return None
+
+    async def _set(self, key: str, value: Any) -> None:
+        """Store a value locally and in Redis."""
+        self._local[key] = (time.monotonic() + self.ttl, value)
+        if self._redis is not None:
+            await self._redis.setex(key, self.ttl, json.dumps(value, ensure_ascii=False))
+
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        **kwargs: Any
+    ) -> str:
+        """Generate text, serving identical requests from cache."""
+        temperature = kwargs.get("temperature", self.config.temperature)
+        key = self._make_key("generate", [system_prompt, prompt, kwargs.get("max_tokens")], temperature)
+
+        cached = await self._get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        content = await self.provider.generate(prompt, system_prompt, **kwargs)
+        if content:
+            await self._set(key, content)
+        return content
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Stream generated text; a cache hit is yielded as one chunk."""
+        temperature = kwargs.get("temperature", self.config.temperature)
+        key = self._make_key("generate", [system_prompt, prompt, kwargs.get("max_tokens")], temperature)
+
+        cached = await self._get(key)
+        if cached is not None:
+            self.hits += 1
+            yield cached
+            return
+
+        self.misses += 1
+        chunks: list[str] = []
+        async for chunk in self.provider.generate_stream(prompt, system_prompt, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        content = "".join(chunks)
+        if content:
+            await self._set(key, content)
+
+    async def chat(
+        self,
+        messages: list[LLMMessage],
+        **kwargs: Any
+    ) -> LLMResponse:
+        """Send a chat conversation, serving identical requests from cache."""
+        temperature = kwargs.get("temperature", self.config.temperature)
+        payload = [
+            [msg.role, msg.content, [hashlib.sha1(image).hexdigest() for image in msg.images]]
+            for msg in messages
+        ]
+        key = self._make_key("chat", [payload, kwargs.get("max_tokens")], temperature)
+
+        cached = await self._get(key)
+        if cached is not None:
+            self.hits += 1
+            return LLMResponse(**cached)
+
+        self.misses += 1
+        response = await self.provider.chat(messages, **kwargs)
+        if response.content:
+            await self._set(key, {
+                "content": response.content,
+                "model": response.model,
+                "provider": response.provider,
+                "usage": response.usage,
+                "finish_reason": response.finish_reason
+            })
+        return response
+
+    async def analyze_image(
+        self,
+        image: bytes,
+        prompt: str,
+        **kwargs: Any
+    ) -> str:
+        """Analyze an image, serving identical requests from cache."""
+        temperature = kwargs.get("temperature", self.config.temperature)
+        key = self._make_key("image", [hashlib.sha1(image).hexdigest(), prompt], temperature)
+
+        cached = await self._get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        content = await self.provider.analyze_image(image, prompt, **kwargs)
+        if content:
+            await self._set(key, content)
+        return content
+
+    async def warmup(self) -> None:
+        """Warm up the wrapped provider's connection."""
+        await self.provider.warmup()
+
+    async def close(self) -> None:
+        """Close the wrapped provider and Redis connection."""
+        if hasattr(self.provider, "close"):
+            await self.provider.close()
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        self._initialized = False
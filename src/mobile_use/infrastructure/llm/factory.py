@@ -60,6 +60,7 @@ class LLMFactory:
             max_tokens=config_dict.get("max_tokens"),
             timeout=config_dict.get("timeout", 30),
             retry_attempts=config_dict.get("retry_attempts", 3),
+            vision_downscale=config_dict.get("vision_downscale", 1),
             extra_params=config_dict.get("extra_params", {})
         )
         return cls.create(config)
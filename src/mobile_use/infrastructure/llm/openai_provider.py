@@ -1,8 +1,12 @@
 """OpenAI LLM provider implementation."""
 
+import asyncio
 import base64
+import importlib.util
+import io
 import logging
-from typing import Any
+import random
+from typing import Any, AsyncIterator
 
 import httpx
 
@@ -12,26 +16,117 @@ from mobile_use.infrastructure.llm.base import (
     LLMMessage,
     LLMResponse,
 )
+from mobile_use.infrastructure.llm.rate_limit import LLMGate
 
 # 配置日志
 logger = logging.getLogger("mobile_use.llm")
 logger.setLevel(logging.INFO)
 
 
+def _image_mime(image: bytes) -> str:
+    """Detect the image MIME type from its magic bytes."""
+    if image[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    return "image/png"
+
+
+def _downscale_image(image: bytes, factor: int) -> bytes:
+    """Box-downscale an image by ``factor`` per side and convert to grayscale PNG.
+
+    Layout and text stay legible for UI understanding while the payload
+    (and the provider's image token count) shrinks by roughly factor².
+    Returns the original bytes if Pillow is unavailable or decoding fails.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return image
+
+    try:
+        with Image.open(io.BytesIO(image)) as img:
+            # reduce() averages factor x factor blocks; convert("L") applies ITU-R 601 luma
+            small = img.reduce(factor).convert("L")
+        output = io.BytesIO()
+        small.save(output, format="PNG")
+        return output.getvalue()
+    except Exception as e:
+        logger.warning(f"[OpenAI] 图片降采样失败: {e}，使用原图")
+        return image
+
+
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI API provider implementation.
 
     Supports GPT-4, GPT-4 Vision, and other OpenAI models.
+
+    Each provider owns one pooled HTTP client (HTTP/2 when ``h2`` is
+    installed) that is reused for every request, so create one provider
+    per process and share it instead of constructing one per task.
     """
 
-    def __init__(self, config: LLMConfig):
+    # 429 重试次数上限
+    MAX_RATE_LIMIT_RETRIES = 3
+    # 空闲连接在连接池中保留的时间（秒）
+    KEEPALIVE_EXPIRY_S = 60.0
+
+    def __init__(self, config: LLMConfig, gate: LLMGate | None = None):
         super().__init__(config)
         self._client: Any = None
+        self._http_client: httpx.AsyncClient | None = None
+        self._last_request_at: float | None = None  # 最近一次请求的时间（事件循环时钟）
+        self._transient_errors: tuple[type[Exception], ...] = ()  # 可重试的连接/超时异常
+        self.gate = gate or LLMGate(
+            max_concurrency=config.max_concurrency,
+            qpm=config.qpm,
+            tpm=config.tpm
+        )
+
+    async def _prepare_image(self, image: bytes) -> bytes:
+        """Apply the configured vision downscale off the event loop."""
+        if self.config.vision_downscale <= 1:
+            return image
+        return await asyncio.to_thread(_downscale_image, image, self.config.vision_downscale)
+
+    def _estimate_tokens(self, text_chars: int, max_tokens: int | None) -> int:
+        """Rough token estimate (~4 chars per token) plus the completion budget."""
+        return text_chars // 4 + (max_tokens or 0)
+
+    def _retry_limit(self, error: Exception) -> int:
+        """Return how many retries ``error`` allows (0 for non-retryable errors)."""
+        status = getattr(error, "status_code", None)
+        if status == 429:
+            return self.MAX_RATE_LIMIT_RETRIES
+        if (status is not None and status >= 500) or isinstance(error, self._transient_errors):
+            return self.config.retry_attempts
+        return 0
+
+    async def _create_completion(self, estimated_tokens: int, **params: Any) -> Any:
+        """Call chat.completions.create through the gate with backoff.
+
+        The SDK client is built with ``max_retries=0`` so this loop is the
+        only retry layer: every attempt (including retries) re-enters the
+        gate, and 429s back off instead of being replayed immediately.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.gate.acquire(estimated_tokens):
+                    self._last_request_at = asyncio.get_running_loop().time()
+                    return await self._client.chat.completions.create(**params)
+            except Exception as e:
+                limit = self._retry_limit(e)
+                if attempt >= limit:
+                    raise
+                delay = (2 ** attempt) + random.uniform(0, 1)
+                reason = "触发限流(429)" if getattr(e, "status_code", None) == 429 else f"请求失败({e})"
+                logger.warning(f"[OpenAI] {reason}，{delay:.1f}秒后重试 ({attempt + 1}/{limit})")
+                attempt += 1
+                await asyncio.sleep(delay)
 
     async def initialize(self) -> None:
         """Initialize OpenAI client."""
         try:
-            from openai import AsyncOpenAI
+            from openai import APIConnectionError, AsyncOpenAI
 
             # 配置超时：连接超时60秒，读取超时使用配置值（大模型需要更长时间）
             timeout = httpx.Timeout(
@@ -41,12 +136,26 @@ class OpenAIProvider(BaseLLMProvider):
                 pool=60.0  # 连接池超时60秒
             )
             
+            # 复用连接池，避免每次请求重新建立 TCP/TLS 连接
+            self._http_client = httpx.AsyncClient(
+                http2=importlib.util.find_spec("h2") is not None,
+                limits=httpx.Limits(
+                    max_keepalive_connections=32,
+                    max_connections=64,
+                    keepalive_expiry=self.KEEPALIVE_EXPIRY_S
+                ),
+                timeout=timeout
+            )
+
             self._client = AsyncOpenAI(
                 api_key=self.config.api_key,
                 base_url=self.config.base_url,
                 timeout=timeout,
-                max_retries=self.config.retry_attempts  # 使用配置的重试次数
+                max_retries=0,  # 重试统一由 _create_completion 负责，避免与 SDK 重试叠加
+                http_client=self._http_client
             )
+            # APITimeoutError 是 APIConnectionError 的子类
+            self._transient_errors = (APIConnectionError,)
             self._initialized = True
             logger.info(f"[OpenAI] 初始化成功，模型: {self.config.model}, 读取超时: {self.config.timeout}秒")
         except ImportError:
@@ -79,11 +188,13 @@ class OpenAIProvider(BaseLLMProvider):
             print(f"📝 [AI输入] 内容预览:\n{prompt[:500]}...\n[内容过长，已截断]")
         print("⏳ [AI思考] 正在分析当前情况并制定执行策略...")
         
-        response = await self._client.chat.completions.create(
+        max_tokens = kwargs.get("max_tokens", self.config.max_tokens)
+        response = await self._create_completion(
+            self._estimate_tokens(len(prompt) + len(system_prompt or ""), max_tokens),
             model=self.config.model,
             messages=messages,
             temperature=kwargs.get("temperature", self.config.temperature),
-            max_tokens=kwargs.get("max_tokens", self.config.max_tokens),
+            max_tokens=max_tokens,
             **self.config.extra_params
         )
 
@@ -101,6 +212,45 @@ class OpenAIProvider(BaseLLMProvider):
         
         return content
 
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Generate text from prompt, yielding content deltas as they stream in."""
+        if not self._initialized:
+            await self.initialize()
+
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        logger.info(f"[LLM流式请求] 模型: {self.config.model}, Prompt长度: {len(prompt)}")
+
+        max_tokens = kwargs.get("max_tokens", self.config.max_tokens)
+        stream = await self._create_completion(
+            self._estimate_tokens(len(prompt) + len(system_prompt or ""), max_tokens),
+            model=self.config.model,
+            messages=messages,
+            temperature=kwargs.get("temperature", self.config.temperature),
+            max_tokens=max_tokens,
+            stream=True,
+            **self.config.extra_params
+        )
+
+        length = 0
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                length += len(delta)
+                yield delta
+
+        logger.info(f"[LLM响应] 响应长度: {length}")
+
     async def chat(
         self,
         messages: list[LLMMessage],
@@ -116,11 +266,12 @@ class OpenAIProvider(BaseLLMProvider):
                 # Vision model message with images
                 content: list[dict[str, Any]] = [{"type": "text", "text": msg.content}]
                 for image in msg.images:
+                    image = await self._prepare_image(image)
                     b64_image = base64.b64encode(image).decode("utf-8")
                     content.append({
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/png;base64,{b64_image}"
+                            "url": f"data:{_image_mime(image)};base64,{b64_image}"
                         }
                     })
                 formatted_messages.append({
@@ -133,11 +284,13 @@ class OpenAIProvider(BaseLLMProvider):
         logger.info(f"\n{'='*50}")
         logger.info(f"[LLM Chat] 模型: {self.config.model}, 消息数: {len(formatted_messages)}")
         
-        response = await self._client.chat.completions.create(
+        max_tokens = kwargs.get("max_tokens", self.config.max_tokens)
+        response = await self._create_completion(
+            self._estimate_tokens(sum(len(msg.content) for msg in messages), max_tokens),
             model=self.config.model,
             messages=formatted_messages,
             temperature=kwargs.get("temperature", self.config.temperature),
-            max_tokens=kwargs.get("max_tokens", self.config.max_tokens),
+            max_tokens=max_tokens,
             **self.config.extra_params
         )
 
@@ -175,6 +328,7 @@ class OpenAIProvider(BaseLLMProvider):
 
         # 使用当前配置的模型，大多数现代模型都支持图片
         model = self.config.model
+        image = await self._prepare_image(image)
         image_size_kb = len(image) / 1024
         
         print(f"\n{'='*80}")
@@ -185,7 +339,9 @@ class OpenAIProvider(BaseLLMProvider):
         
         b64_image = base64.b64encode(image).decode("utf-8")
 
-        response = await self._client.chat.completions.create(
+        max_tokens = kwargs.get("max_tokens", self.config.max_tokens or 4096)
+        response = await self._create_completion(
+            self._estimate_tokens(len(prompt), max_tokens),
             model=model,
             messages=[
                 {
@@ -195,7 +351,7 @@ class OpenAIProvider(BaseLLMProvider):
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/png;base64,{b64_image}",
+                                "url": f"data:{_image_mime(image)};base64,{b64_image}",
                                 "detail": kwargs.get("detail", "auto")
                             }
                         }
@@ -203,7 +359,7 @@ class OpenAIProvider(BaseLLMProvider):
                 }
             ],
             temperature=kwargs.get("temperature", self.config.temperature),
-            max_tokens=kwargs.get("max_tokens", self.config.max_tokens or 4096),
+            max_tokens=max_tokens,
             **self.config.extra_params
         )
 
@@ -217,9 +373,30 @@ class OpenAIProvider(BaseLLMProvider):
         
         return content
 
+    async def warmup(self) -> None:
+        """Open a pooled connection to the API host if none is likely alive.
+
+        Sends a HEAD request to the base URL so DNS, TCP and TLS setup
+        are done before the next completion. Skipped when a request was
+        made within the keep-alive window. Errors are ignored.
+        """
+        now = asyncio.get_running_loop().time()
+        if self._last_request_at is not None and now - self._last_request_at < self.KEEPALIVE_EXPIRY_S:
+            return
+        self._last_request_at = now
+        try:
+            if not self._initialized:
+                await self.initialize()
+            await self._http_client.head(str(self._client.base_url))
+        except Exception as e:
+            logger.debug(f"[OpenAI] 预热连接失败: {e}")
+
     async def close(self) -> None:
         """Close the client connection."""
         if self._client:
             await self._client.close()
             self._client = None
             self._initialized = False
+        if self._http_client:
+            await self._http_client.aclose()
+            self._http_client = None
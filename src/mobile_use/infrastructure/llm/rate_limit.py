@@ -0,0 +1,76 @@
+"""Client-side concurrency and rate limiting for LLM requests."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class LLMGate:
+    """Caps in-flight LLM requests and throttles to QPM/TPM budgets.
+
+    Requests and tokens are tracked as two refilling token buckets so
+    calls are delayed proactively instead of tripping provider 429s.
+    One gate should be shared by every caller hitting the same API key.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        qpm: int | None = 500,
+        tpm: int | None = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.qpm = qpm
+        self.tpm = tpm
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._request_budget = float(qpm or 0)
+        self._token_budget = float(tpm or 0)
+        self._last_refill: float | None = None
+
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int = 0) -> AsyncIterator[None]:
+        """Hold a concurrency slot after reserving request/token budget.
+
+        Args:
+            estimated_tokens: Expected prompt + completion tokens
+        """
+        async with self._semaphore:
+            await self._reserve(estimated_tokens)
+            yield
+
+    def _refill(self, now: float) -> None:
+        """Refill both buckets for the time elapsed since the last call."""
+        if self._last_refill is None:
+            self._last_refill = now
+            return
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.qpm:
+            self._request_budget = min(float(self.qpm), self._request_budget + elapsed * self.qpm / 60)
+        if self.tpm:
+            self._token_budget = min(float(self.tpm), self._token_budget + elapsed * self.tpm / 60)
+
+    async def _reserve(self, estimated_tokens: int) -> None:
+        """Wait until both budgets can cover one request of the given size."""
+        loop = asyncio.get_running_loop()
+        cost = min(estimated_tokens, self.tpm) if self.tpm else 0
+
+        async with self._lock:
+            while True:
+                self._refill(loop.time())
+
+                wait = 0.0
+                if self.qpm and self._request_budget < 1:
+                    wait = (1 - self._request_budget) * 60 / self.qpm
+                if self.tpm and self._token_budget < cost:
+                    wait = max(wait, (cost - self._token_budget) * 60 / self.tpm)
+
+                if wait <= 0:
+                    if self.qpm:
+                        self._request_budget -= 1
+                    if self.tpm:
+                        self._token_budget -= cost
+                    return
+
+                await asyncio.sleep(wait)
@@ -0,0 +1,75 @@
+"""Non-blocking console logging for async entry points."""
+
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import TextIO
+
+
+class _DeferredFlushHandler(logging.StreamHandler):
+    """StreamHandler that writes without flushing; the listener flushes."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class BatchingQueueListener(QueueListener):
+    """QueueListener that flushes its handlers once per burst of records.
+
+    Handlers are flushed when the queue drains or every ``flush_every``
+    records, so a burst of log lines costs one flush instead of one per
+    line while an idle console still shows output immediately.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, *handlers: logging.Handler, flush_every: int = 32):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_every = flush_every
+        self._pending = 0
+
+    def handle(self, record: logging.LogRecord) -> None:
+        """Dispatch a record, flushing at burst boundaries."""
+        super().handle(record)
+        self._pending += 1
+        if self._pending >= self.flush_every or self.queue.empty():
+            self._pending = 0
+            for handler in self.handlers:
+                handler.flush()
+
+
+def setup_console_logging(
+    name: str = "mobile_use",
+    stream: TextIO | None = None,
+    level: int = logging.INFO,
+    flush_every: int = 32
+) -> BatchingQueueListener:
+    """Route a logger's records to the console from a background thread.
+
+    Logging calls on the event loop only enqueue the record; formatting,
+    writes and flushes happen on the listener thread. Call ``stop()`` on
+    the returned listener before exit to drain pending records.
+
+    Args:
+        name: Logger to configure
+        stream: Output stream (defaults to stdout)
+        level: Logger level
+        flush_every: Maximum records written between flushes
+
+    Returns:
+        Started listener
+    """
+    handler = _DeferredFlushHandler(stream or sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = BatchingQueueListener(log_queue, handler, flush_every=flush_every)
+
+    logger = logging.getLogger(name)
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+    listener.start()
+    return listener
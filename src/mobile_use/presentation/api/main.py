@@ -196,17 +196,8 @@ async def swipe(request: SwipeRequest):
         return {"success": False, "error": "未连接设备"}
 
     try:
-        screen = device_controller.device.screen_info
-        cx, cy = screen.width // 2, screen.height // 2
-
-        if request.direction == "up":
-            start, end = Point(cx, int(screen.height * 0.7)), Point(cx, int(screen.height * 0.3))
-        elif request.direction == "down":
-            start, end = Point(cx, int(screen.height * 0.3)), Point(cx, int(screen.height * 0.7))
-        elif request.direction == "left":
-            start, end = Point(int(screen.width * 0.8), cy), Point(int(screen.width * 0.2), cy)
-        else:  # right
-            start, end = Point(int(screen.width * 0.2), cy), Point(int(screen.width * 0.8), cy)
+        endpoints = device_controller.device.screen_info.swipe_endpoints
+        start, end = endpoints.get(request.direction, endpoints["right"])
 
         result = await device_controller.swipe(start, end)
         return {"success": result.success, "direction": request.direction}